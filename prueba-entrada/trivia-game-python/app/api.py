@@ -1,52 +1,118 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Union
 import asyncio
-import random
-import secrets
-import json
+import time
+import logging
 from enum import Enum
 import os
+from fastapi.responses import PlainTextResponse, Response
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from app.models.question import Question
-from app.models.db_manager import DBManager
+from app.logging_config import configure_logging
+from app.metrics import MetricsRegistry, MetricsMiddleware
+from app.serialization import dumps, question_fragment, questions_payload
+from app.models.db_manager import DBManager, DB_POOL_WARMUP
 from app.models.difficulty import DifficultyLevel
 from app.models.game_stats import GameStats
+from app.models.shared_game_stats import SharedGameStats
+from app.models.question_bank import QuestionBankStore
+from app.models.answer_store import AnswerKeyStore
+from app.models.question_token import GradedTokens, QuestionTokenSigner
+from app.models.question_deck import DeckStore, deck_key
+from app.models.question_index import compose_quiz
+from app.models.leaderboard import Leaderboard
+from app.models.answer_log import AnswerLogFull, answer_event, create_answer_log
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 SECRET_KEY = os.getenv("SECRET_KEY", "defaultsecretkey")
+QUESTION_BANK_RELOAD_INTERVAL = float(os.getenv("QUESTION_BANK_RELOAD_INTERVAL", "5"))
+QUESTION_TOKENS = os.getenv("QUESTION_TOKENS", "false").lower() in ("1", "true", "yes")
+QUESTION_TOKEN_MAX_AGE = float(os.getenv("QUESTION_TOKEN_MAX_AGE", "3600"))
+STATS_SHARED_FILE = os.getenv("STATS_SHARED_FILE")
+STATS_SHARED_SLOTS = int(os.getenv("STATS_SHARED_SLOTS", "64"))
 
 db_manager = None
-questions_cache = {}
-current_question_id = 1
+answer_log = None
+metrics = MetricsRegistry()
+answer_store = AnswerKeyStore()
+token_signer = QuestionTokenSigner(SECRET_KEY, max_age=QUESTION_TOKEN_MAX_AGE)
+graded_tokens = GradedTokens(max_age=QUESTION_TOKEN_MAX_AGE)
 quiz_stats = None
+question_bank = QuestionBankStore()
+question_decks = DeckStore()
+leaderboard = Leaderboard()
+
+def create_game_stats():
+    # Con varios workers de uvicorn las estadísticas viven en un archivo
+    # compartido; sin él cada proceso lleva su propio GameStats
+    if STATS_SHARED_FILE:
+        try:
+            return SharedGameStats(STATS_SHARED_FILE, STATS_SHARED_SLOTS)
+        except (ImportError, OSError, RuntimeError) as e:
+            logger.warning(f"No se pudieron compartir las estadísticas ({e}). Usando estadísticas locales.")
+    return GameStats()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global db_manager, quiz_stats
-    print("Iniciando aplicación...")
+    global db_manager, quiz_stats, answer_log
+    log_listener = configure_logging()
+    logger.info("Iniciando aplicación...")
+    if QUESTION_TOKENS and SECRET_KEY == "defaultsecretkey":
+        logger.warning("QUESTION_TOKENS activo con el SECRET_KEY por defecto; configure uno propio.")
     db_manager = DBManager()
-    quiz_stats = GameStats()
+    quiz_stats = create_game_stats()
+    bank = await asyncio.to_thread(question_bank.load)
+    logger.info(f"Banco de preguntas cargado: {len(bank)} preguntas")
+    bank_watcher = asyncio.create_task(question_bank.watch(QUESTION_BANK_RELOAD_INTERVAL))
     success = await db_manager.connect()
-    if not success:
-        print("⚠️ No se pudo conectar a la base de datos. Usando modo local.")
+    if success:
+        if DB_POOL_WARMUP:
+            warmed = await db_manager.warm_up()
+            logger.info(f"Pool de conexiones calentado: {warmed} conexiones")
+        db_manager.start_readiness_refresh()
+        if db_manager.mirror_enabled and await db_manager.is_database_ready():
+            await db_manager.load_mirror()
+            db_manager.start_mirror_refresh()
+    else:
+        logger.warning("No se pudo conectar a la base de datos. Usando modo local.")
+    answer_log = create_answer_log(db_manager)
+    if answer_log is not None:
+        answer_log.start()
+        logger.info(f"Registro de respuestas activo: {type(answer_log.writer).__name__}")
     
     yield  
     
-    print("Cerrando aplicación...")
+    logger.info("Cerrando aplicación...")
+    bank_watcher.cancel()
+    if answer_log is not None:
+        # Se escriben los eventos pendientes antes de cerrar la base de datos
+        await answer_log.stop()
     if db_manager:
         await db_manager.disconnect()
+    if isinstance(quiz_stats, SharedGameStats):
+        quiz_stats.close()
+    log_listener.stop()
+
+class FastJSONResponse(Response):
+    """Respuesta JSON que usa orjson cuando está instalado"""
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
 
 app = FastAPI(
     title="Trivia Game API", 
     description="API para el juego de trivia", 
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+app.add_middleware(MetricsMiddleware, registry=metrics)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -61,39 +127,51 @@ class DifficultyLevelAPI(str, Enum):
     HARD = "hard"
 
 def normalize_difficulty(difficulty_str: str) -> str:
-    difficulty_map = {
-        "fácil": "easy",
-        "facil": "easy",
-        "medio": "medium",
-        "difícil": "hard", 
-        "dificil": "hard",
-        "easy": "easy",
-        "medium": "medium", 
-        "hard": "hard"
-    }
-    normalized = difficulty_str.lower() if difficulty_str else "easy"
-    return difficulty_map.get(normalized, "easy")
+    return DifficultyLevel.from_string(difficulty_str).value
 
 class QuestionResponse(BaseModel):
-    id: Optional[int] = None
+    id: Optional[Union[int, str]] = None
     description: str
     options: List[str]
     difficulty: DifficultyLevelAPI = DifficultyLevelAPI.EASY
     points: int = 1
     
 class AnswerRequest(BaseModel):
-    question_id: int
+    question_id: Union[int, str]
     answer: str
+    player_id: Optional[str] = Field(None, min_length=1, max_length=64)
     
 class AnswerResponse(BaseModel):
     correct: bool
     correct_answer: Optional[str] = None
     points_earned: int = 0
     
+class BatchAnswerRequest(BaseModel):
+    answers: List[AnswerRequest] = Field(..., max_length=100)
+    player_id: Optional[str] = Field(None, min_length=1, max_length=64)
+
+class BatchAnswerResult(AnswerResponse):
+    question_id: Union[int, str]
+    found: bool = True
+
+class BatchAnswerResponse(BaseModel):
+    results: List[BatchAnswerResult]
+    correct_answers: int
+    total_score: int
+
+class QuizSessionResponse(BaseModel):
+    questions: List[QuestionResponse]
+
 class DifficultyStats(BaseModel):
     correct: int
     total: int
     
+class QuantileSummary(BaseModel):
+    count: int
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
 class QuizSummary(BaseModel):
     total_questions: int
     correct_answers: int
@@ -101,229 +179,305 @@ class QuizSummary(BaseModel):
     total_score: int = 0
     accuracy: float
     difficulty_stats: Dict[str, DifficultyStats] = {}
+    distributions: Dict[str, QuantileSummary] = {}
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    player_id: str
+    score: int
+    correct_answers: int
+    total_answers: int
+
+class LeaderboardResponse(BaseModel):
+    players: List[LeaderboardEntry]
+    total_players: int
+    snapshot_age_seconds: float
+
+class SearchResult(BaseModel):
+    id: Union[int, str]
+    description: str
+    options: List[str]
+    difficulty: str
+    category: Optional[str] = None
 
 @app.get("/")
 async def root():
     return {"message": "Bienvenido a la API del Juego de Trivia"}
 
-@app.get("/questions/random", response_model=List[QuestionResponse])
-async def get_random_questions(
-    count: int = 10, 
-    difficulty: Optional[DifficultyLevelAPI] = None
-):
-    global db_manager, questions_cache, current_question_id
-    
-    questions = []
-    
-    db_questions = []
+def issue_question_id(question, source):
+    # En modo token el id es autocontenido y no ocupa memoria del servidor
+    if QUESTION_TOKENS and question.id is not None:
+        return token_signer.issue(question.id, source)
+    return answer_store.put(question)
+
+def normalize_question_id(question_id):
+    # Un id numérico enviado como texto ("5") es una entrada del almacén, no un token
+    if isinstance(question_id, str):
+        try:
+            return int(question_id)
+        except ValueError:
+            pass
+    return question_id
+
+def mark_graded(question_id):
+    """True la primera vez que se califica esta entrega; solo esa cuenta en el ranking"""
+    question_id = normalize_question_id(question_id)
+    if isinstance(question_id, str):
+        return graded_tokens.mark(question_id)
+    return answer_store.mark_graded(question_id)
+
+async def resolve_question(question_id):
+    """Devuelve (pregunta, segundos desde que se entregó) o (None, None)"""
+    question_id = normalize_question_id(question_id)
+    if not isinstance(question_id, str):
+        return answer_store.get_with_age(question_id)
+
+    verified = token_signer.verify(question_id)
+    if verified is None:
+        return None, None
+
+    source, bank_id, issued_at = verified
+    # El token guarda la hora de emisión en segundos enteros
+    age = max(0.0, time.time() - issued_at)
+    if source == "db":
+        question = await db_manager.get_question_by_id(bank_id) if db_manager else None
+    else:
+        question = question_bank.current().get(bank_id)
+    return (question, age) if question is not None else (None, None)
+
+def issue_questions(selected, source="local"):
+    """Devuelve el JSON de las preguntas ya serializado.
+
+    Para las preguntas del banco local se reutiliza el fragmento calculado
+    al cargarlo; solo el id se serializa en cada petición.
+    """
+    bank = question_bank.current() if source == "local" else (db_manager.mirror if db_manager else None)
+    return questions_payload(
+        (issue_question_id(q, source), bank.fragment(q) if bank is not None else question_fragment(q))
+        for q in selected
+    )
+
+def sample_bank(bank, count, difficulty_level, category, session_id=None):
+    # Con session_id las preguntas salen del mazo de la sesión y no se repiten
+    # hasta agotar todas las que cumplen los filtros
+    if session_id:
+        bucket = bank.bucket(difficulty_level, category)
+        return question_decks.draw(session_id, bucket, count, deck_key(difficulty_level, category))
+    return bank.sample(count, difficulty_level, category)
+
+async def select_questions(count, difficulty, category, session_id=None):
+    difficulty_level = DifficultyLevel(difficulty.value) if difficulty else None
+    selected = []
     use_local_mode = True
     
     if db_manager and await db_manager.is_database_ready():
-        print("Intentando usar base de datos para obtener preguntas")
-        db_questions = await db_manager.get_random_questions(count)
+        logger.debug("Intentando usar base de datos para obtener preguntas")
+        if session_id and db_manager.mirror is not None:
+            db_questions = sample_bank(db_manager.mirror, count, difficulty_level, category, session_id)
+        else:
+            # Sin espejo en memoria no hay mazo: cada petición muestrea por separado
+            db_questions = await db_manager.get_random_questions(count, difficulty_level, category)
         
         if db_questions and len(db_questions) > 0:
             use_local_mode = False
-            print(f"Base de datos disponible, obteniendo {len(db_questions)} preguntas")
+            logger.debug("Base de datos disponible, obteniendo %d preguntas", len(db_questions))
+            selected = db_questions
         else:
-            print("Base de datos vacía, cambiando a modo local")
+            logger.debug("Base de datos vacía, cambiando a modo local")
     else:
-        print("Base de datos no disponible, usando modo local")
+        logger.debug("Base de datos no disponible, usando modo local")
         
-    if not use_local_mode:
-        for q in db_questions:
-            if difficulty and q.difficulty.value != difficulty:
-                continue
-                
-            question_id = current_question_id
-            current_question_id += 1
-            
-            difficulty_value = q.difficulty.value
-            points = q.get_points()
-            
-            question_data = {
-                "id": question_id,
-                "description": q.description,
-                "options": q.options,
-                "difficulty": difficulty_value,
-                "points": points
-            }
-            
-            questions_cache[question_id] = {
-                "description": q.description,
-                "options": q.options,
-                "correct_answer": q.correct_answer,
-                "difficulty": q.difficulty,
-                "points": points
-            }
-            
-            questions.append(question_data)
-    else:
-        print("Usando archivo local para obtener preguntas")
-        try:
-            json_path = "data/questions.json"
-            if not os.path.exists(json_path):
-                json_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions.json')
-                print(f"Buscando archivo en: {json_path}")
-                
-            if not os.path.exists(json_path):
-                print(f"ERROR: No se encontró el archivo 'questions.json' en {json_path}")
-                default_questions = [
-                    {
-                        "id": current_question_id,
-                        "description": "¿Cuál es la capital de Francia?",
-                        "options": ["Madrid", "Londres", "París", "Berlín"],
-                        "difficulty": "easy",
-                        "points": 1
-                    }
-                ]
-                
-                questions_cache[current_question_id] = {
-                    "description": "¿Cuál es la capital de Francia?",
-                    "options": ["Madrid", "Londres", "París", "Berlín"],
-                    "correct_answer": "París",
-                    "difficulty": DifficultyLevel.EASY,
-                    "points": 1
-                }
-                
-                current_question_id += 1
-                return default_questions
-                
-            print(f"Leyendo archivo: {json_path}")
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                print(f"Archivo JSON cargado, contiene {len(data.get('questions', []))} preguntas")
-                
-                all_questions = data.get("questions", [])
-                
-                if not all_questions:
-                    print("ERROR: El archivo JSON no contiene preguntas o tiene un formato incorrecto")
-                    default_question = {
-                        "id": current_question_id,
-                        "description": "¿Cuál es la capital de Francia?",
-                        "options": ["Madrid", "Londres", "París", "Berlín"],
-                        "difficulty": "easy",
-                        "points": 1
-                    }
-                    
-                    questions_cache[current_question_id] = {
-                        "description": "¿Cuál es la capital de Francia?",
-                        "options": ["Madrid", "Londres", "París", "Berlín"],
-                        "correct_answer": "París",
-                        "difficulty": DifficultyLevel.EASY,
-                        "points": 1
-                    }
-                    
-                    current_question_id += 1
-                    return [default_question]
-                
-                if len(all_questions) > count:
-                    print(f"Seleccionando {count} preguntas aleatorias")
-                    indices = set()
-                    while len(indices) < count:
-                        indices.add(secrets.randbelow(len(all_questions)))
-                    
-                    selected_questions = [all_questions[i] for i in indices]
-                    all_questions = selected_questions
-                
-                if difficulty:
-                    all_questions = [q for q in all_questions if normalize_difficulty(q.get("difficulty", "")) == difficulty]
-                
-                print(f"Devolviendo {len(all_questions)} preguntas")
-                for q_data in all_questions:
-                    question_id = current_question_id
-                    current_question_id += 1
-                    
-                    difficulty_normalized = normalize_difficulty(q_data.get("difficulty", "easy"))
-                    
-                    points = 1
-                    if difficulty_normalized == "medium":
-                        points = 2
-                    elif difficulty_normalized == "hard":
-                        points = 3
-                    
-                    question_response = {
-                        "id": question_id,
-                        "description": q_data["description"],
-                        "options": q_data["options"],
-                        "difficulty": difficulty_normalized,
-                        "points": points
-                    }
-                    
-                    difficulty_level = DifficultyLevel.EASY
-                    if difficulty_normalized == "medium":
-                        difficulty_level = DifficultyLevel.MEDIUM
-                    elif difficulty_normalized == "hard":
-                        difficulty_level = DifficultyLevel.HARD
-                        
-                    questions_cache[question_id] = {
-                        "description": q_data["description"],
-                        "options": q_data["options"],
-                        "correct_answer": q_data["correct_answer"],
-                        "difficulty": difficulty_level,
-                        "points": points
-                    }
-                    
-                    questions.append(question_response)
-        except Exception as e:
-            print(f"ERROR al cargar preguntas desde JSON: {e}")
-            default_questions = [
-                {
-                    "id": current_question_id,
-                    "description": "¿Cuál es la capital de Francia?",
-                    "options": ["Madrid", "Londres", "París", "Berlín"],
-                    "difficulty": "easy",
-                    "points": 1
-                }
-            ]
-            
-            questions_cache[current_question_id] = {
-                "description": "¿Cuál es la capital de Francia?",
-                "options": ["Madrid", "Londres", "París", "Berlín"],
-                "correct_answer": "París",
-                "difficulty": DifficultyLevel.EASY,
-                "points": 1
-            }
-            
-            current_question_id += 1
-            questions = default_questions
+    if use_local_mode:
+        selected = sample_bank(question_bank.current(), count, difficulty_level, category, session_id)
     
-    print(f"Devolviendo {len(questions)} preguntas")
-    return questions
+    mode = "local" if use_local_mode else "db"
+    metrics.record_questions(mode, len(selected))
+    logger.debug("Devolviendo %d preguntas", len(selected))
+    return issue_questions(selected, mode)
+
+async def select_composite_questions(composition, category, distinct_categories, session_id=None):
+    selected = []
+    mode = "local"
+    if db_manager and await db_manager.is_database_ready():
+        if session_id and db_manager.mirror is not None:
+            mirror = db_manager.mirror
+            selected = compose_quiz(
+                mirror, composition, category, distinct_categories,
+                lambda count, level, name: sample_bank(mirror, count, level, name, session_id)
+            )
+        else:
+            selected = await db_manager.get_composite_questions(composition, category, distinct_categories)
+        if selected:
+            mode = "db"
+
+    if mode == "local":
+        bank = question_bank.current()
+        selected = compose_quiz(
+            bank, composition, category, distinct_categories,
+            lambda count, level, name: sample_bank(bank, count, level, name, session_id)
+        )
+
+    metrics.record_questions(mode, len(selected))
+    return issue_questions(selected, mode)
+
+def grade_answer(question, answer):
+    is_correct = question.is_correct(answer)
+    return is_correct, {
+        "correct": is_correct,
+        "correct_answer": question.correct_answer if not is_correct else None,
+        "points_earned": question.get_points() if is_correct else 0
+    }
+
+def log_answers(events):
+    # Solo encola: la escritura la hace la tarea de fondo del registro
+    if answer_log is None or not events:
+        return
+    try:
+        answer_log.record(events)
+    except AnswerLogFull:
+        raise HTTPException(
+            status_code=503,
+            detail="El registro de respuestas está saturado, intente nuevamente",
+            headers={"Retry-After": str(max(1, int(answer_log.flush_interval)))}
+        )
+
+@app.get("/questions/random", response_model=List[QuestionResponse])
+async def get_random_questions(
+    count: int = 10, 
+    difficulty: Optional[DifficultyLevelAPI] = None,
+    category: Optional[str] = None,
+    session_id: Optional[str] = Query(None, max_length=64)
+):
+    payload = await select_questions(count, difficulty, category, session_id)
+    return Response(content=payload, media_type="application/json")
+
+@app.get("/quiz/session", response_model=QuizSessionResponse)
+async def get_quiz_session(
+    count: int = 10,
+    difficulty: Optional[DifficultyLevelAPI] = None,
+    category: Optional[str] = None,
+    session_id: Optional[str] = Query(None, max_length=64)
+):
+    """Devuelve un quiz completo en una sola petición"""
+    payload = await select_questions(count, difficulty, category, session_id)
+    return Response(content=b'{"questions":' + payload + b"}", media_type="application/json")
+
+@app.get("/quiz/composite", response_model=QuizSessionResponse)
+async def get_composite_quiz(
+    easy: int = Query(0, ge=0, le=100),
+    medium: int = Query(0, ge=0, le=100),
+    hard: int = Query(0, ge=0, le=100),
+    category: Optional[str] = None,
+    distinct_categories: bool = False,
+    session_id: Optional[str] = Query(None, max_length=64)
+):
+    """Devuelve un quiz con la cantidad pedida de cada dificultad, en ese orden"""
+    composition = {DifficultyLevel.EASY: easy, DifficultyLevel.MEDIUM: medium, DifficultyLevel.HARD: hard}
+    if not any(composition.values()):
+        raise HTTPException(status_code=400, detail="Debe pedir al menos una pregunta")
+
+    payload = await select_composite_questions(composition, category, distinct_categories, session_id)
+    return Response(content=b'{"questions":' + payload + b"}", media_type="application/json")
+
+@app.get("/questions/search", response_model=List[SearchResult])
+async def search_questions(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Busca preguntas que contengan todas las palabras de q, sin distinguir acentos"""
+    if not question_bank.search_enabled:
+        raise HTTPException(status_code=503, detail="La búsqueda está desactivada (SEARCH_INDEX=false)")
+    published = question_bank.search_snapshot()
+    if published is None:
+        raise HTTPException(
+            status_code=503,
+            detail="El índice de búsqueda se está construyendo, intente nuevamente",
+            headers={"Retry-After": "5"}
+        )
+    # Los ids se resuelven en el mismo banco que se indexó
+    bank, index = published
+
+    results = []
+    for question_id in index.search(q, limit):
+        question = bank.get(question_id)
+        if question is not None:
+            results.append({
+                "id": question.id,
+                "description": question.description,
+                "options": list(question.options),
+                "difficulty": question.difficulty.value,
+                "category": question.category
+            })
+    return results
 
 @app.post("/questions/answer", response_model=AnswerResponse)
 async def check_answer(answer_request: AnswerRequest):
-    global questions_cache, quiz_stats
-    
-    question_id = answer_request.question_id
-    
-    if question_id not in questions_cache:
+    question, age = await resolve_question(answer_request.question_id)
+    if question is None:
         raise HTTPException(status_code=404, detail="Pregunta no encontrada")
     
-    question_data = questions_cache[question_id]
-    is_correct = question_data["correct_answer"] == answer_request.answer
-    
-    question = Question(
-        description=question_data["description"],
-        options=question_data["options"],
-        correct_answer=question_data["correct_answer"],
-        difficulty=question_data["difficulty"]
-    )
-    
+    is_correct, result = grade_answer(question, answer_request.answer)
+    log_answers([answer_event(
+        question, answer_request.answer, is_correct, result["points_earned"], age, answer_request.player_id
+    )])
     quiz_stats.update_stats(question, is_correct)
+    quiz_stats.record_answer_times([age])
+    # Se marca después de encolar el evento: si el registro responde 503 el reintento aún cuenta.
+    # Una entrega ya calificada (reintento tras ver la respuesta) no suma en el ranking
+    if mark_graded(answer_request.question_id) and answer_request.player_id:
+        leaderboard.record(answer_request.player_id, [(result["points_earned"], is_correct)])
     
-    points_earned = question_data["points"] if is_correct else 0
-    
+    return result
+
+@app.post("/questions/answer/batch", response_model=BatchAnswerResponse)
+async def check_answers_batch(batch_request: BatchAnswerRequest):
+    """Califica todas las respuestas de un quiz y actualiza las estadísticas una sola vez"""
+    results = []
+    graded = []
+    ages = []
+    events = []
+    for answer_request in batch_request.answers:
+        question, age = await resolve_question(answer_request.question_id)
+        if question is None:
+            results.append({"question_id": answer_request.question_id, "correct": False, "found": False})
+            continue
+
+        is_correct, result = grade_answer(question, answer_request.answer)
+        result["question_id"] = answer_request.question_id
+        results.append(result)
+        graded.append((question, is_correct))
+        ages.append(age)
+        events.append(answer_event(
+            question, answer_request.answer, is_correct, result["points_earned"], age, batch_request.player_id
+        ))
+
+    # Si el registro rechaza el lote no se cuenta nada, así el cliente puede reintentar
+    log_answers(events)
+    correct_answers = sum(1 for _, is_correct in graded if is_correct)
+    total_score = sum(result.get("points_earned", 0) for result in results)
+
+    quiz_stats.update_many(graded)
+    if graded:
+        # Cada lote calificado es una partida
+        quiz_stats.record_game(total_score, correct_answers / len(graded) * 100)
+        quiz_stats.record_answer_times(ages)
+    # Cada entrega cuenta una vez, también si se repite dentro del mismo lote
+    counted = [
+        (result["points_earned"], result["correct"]) for result in results
+        if result.get("found", True) and mark_graded(result["question_id"])
+    ]
+    if batch_request.player_id and counted:
+        # Todo el quiz mueve al jugador una sola vez en el ranking
+        leaderboard.record(batch_request.player_id, counted)
+
     return {
-        "correct": is_correct,
-        "correct_answer": question_data["correct_answer"] if not is_correct else None,
-        "points_earned": points_earned
+        "results": results,
+        "correct_answers": correct_answers,
+        "total_score": total_score
     }
 
 @app.get("/quiz/summary", response_model=QuizSummary)
 async def get_quiz_summary():
-    global quiz_stats
-    
     summary = quiz_stats.get_summary()
     
     difficulty_stats = {}
@@ -336,12 +490,93 @@ async def get_quiz_summary():
         "incorrect_answers": summary["incorrect_answers"],
         "total_score": summary["total_score"],
         "accuracy": summary["accuracy"],
-        "difficulty_stats": difficulty_stats
+        "difficulty_stats": difficulty_stats,
+        "distributions": summary["distributions"]
+    }
+
+@app.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(limit: int = Query(10, ge=1, le=100)):
+    """Los mejores jugadores; la lista se actualiza como mucho una vez por LEADERBOARD_SNAPSHOT_INTERVAL"""
+    return {
+        "players": leaderboard.top(limit),
+        "total_players": len(leaderboard),
+        "snapshot_age_seconds": leaderboard.snapshot_age()
     }
 
+@app.get("/leaderboard/{player_id}", response_model=LeaderboardEntry)
+async def get_player_rank(player_id: str):
+    entry = leaderboard.player(player_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Jugador no encontrado")
+    return entry
+
+@app.get("/quiz/answer-cache")
+async def get_answer_cache_stats():
+    return answer_store.stats()
+
+@app.get("/quiz/answer-log")
+async def get_answer_log_stats():
+    if answer_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_log.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    cache = answer_store.stats()
+    bank = question_bank.current()
+    extra = [
+        ("trivia_answer_cache_hits_total", "counter", "Respuestas encontradas en el almacén", cache["hits"]),
+        ("trivia_answer_cache_misses_total", "counter", "Respuestas no encontradas o expiradas", cache["misses"]),
+        ("trivia_answer_cache_evictions_total", "counter", "Entradas expulsadas por capacidad", cache["evictions"]),
+        ("trivia_answer_cache_size", "gauge", "Entradas vigentes en el almacén de respuestas", cache["size"]),
+        ("trivia_answer_cache_hit_ratio", "gauge", "Proporción de aciertos del almacén de respuestas", cache["hit_rate"]),
+        ("trivia_question_bank_size", "gauge", "Preguntas en el banco local", len(bank)),
+        ("trivia_deck_sessions", "gauge", "Sesiones con mazo de preguntas activo", len(question_decks)),
+        ("trivia_deck_evictions_total", "counter", "Sesiones descartadas por inactividad o capacidad",
+         question_decks.evictions),
+        ("trivia_leaderboard_players", "gauge", "Jugadores en el ranking", len(leaderboard)),
+        ("trivia_database_ready", "gauge", "1 si la base de datos está lista según la última verificación",
+         int(bool(db_manager and db_manager.ready))),
+    ]
+    if answer_log is not None:
+        log_stats = answer_log.stats()
+        extra += [
+            ("trivia_answer_log_queued", "gauge", "Eventos de respuesta esperando ser escritos", log_stats["queued"]),
+            ("trivia_answer_log_written_total", "counter", "Eventos de respuesta escritos", log_stats["written"]),
+            ("trivia_answer_log_dropped_total", "counter", "Eventos descartados con la cola llena", log_stats["dropped"]),
+            ("trivia_answer_log_rejected_total", "counter", "Eventos rechazados con 503 por la cola llena",
+             log_stats["rejected"]),
+            ("trivia_answer_log_failed_total", "counter", "Eventos perdidos tras agotar los reintentos", log_stats["failed"]),
+        ]
+    if db_manager and db_manager.connected:
+        pool = db_manager.pool_stats()
+        breaker = db_manager.breaker
+        extra += [
+            ("trivia_db_circuit_state", "gauge", "Estado del disyuntor: 0 cerrado, 1 semiabierto, 2 abierto",
+             {"closed": 0, "half_open": 1, "open": 2}[breaker.state]),
+            ("trivia_db_circuit_trips_total", "counter", "Veces que se abrió el disyuntor", breaker.trips),
+            ("trivia_db_pool_max_size", "gauge", "Tamaño máximo del pool de conexiones", pool["max_size"]),
+            ("trivia_db_pool_in_use", "gauge", "Conexiones del pool en uso por consultas", pool["in_use"]),
+            ("trivia_db_pool_idle", "gauge", "Conexiones ociosas en el pool", pool["idle"] or 0),
+            ("trivia_db_pool_acquisitions_total", "counter", "Conexiones tomadas del pool", pool["acquisitions"]),
+            ("trivia_db_pool_wait_seconds_total", "counter", "Tiempo total esperando una conexión del pool",
+             pool["wait_seconds_total"]),
+            ("trivia_db_pool_wait_seconds_max", "gauge", "Mayor espera por una conexión del pool", pool["wait_seconds_max"]),
+        ]
+    if db_manager and db_manager.mirror_enabled:
+        mirror = db_manager.mirror_stats()
+        extra += [
+            ("trivia_db_mirror_rows", "gauge", "Preguntas en el espejo en memoria de la base de datos", mirror["rows"]),
+            ("trivia_db_mirror_bytes", "gauge", "Memoria estimada del espejo de la base de datos", mirror["estimated_bytes"]),
+            ("trivia_db_mirror_age_seconds", "gauge", "Segundos desde el último refresco del espejo",
+             mirror["seconds_since_refresh"] or 0),
+        ]
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
+
 @app.post("/quiz/reset")
 async def reset_quiz():
-    global quiz_stats, questions_cache
-    quiz_stats = GameStats()
-    questions_cache = {}
+    quiz_stats.reset()
+    answer_store.clear()
+    graded_tokens.clear()
+    leaderboard.reset()
     return {"message": "Estadísticas del quiz reiniciadas"} 
\ No newline at end of file
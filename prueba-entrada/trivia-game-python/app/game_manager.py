@@ -3,6 +3,7 @@ from app.models.question import Question
 from app.models.db_manager import DBManager
 from app.models.game_stats import GameStats
 from app.models.difficulty import DifficultyLevel
+from app.models.question_snapshot import open_snapshot_bank
 import json
 import os
 import random
@@ -39,6 +40,15 @@ class GameManager:
     def load_questions_from_local(self):
         try:
             json_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions.json')
+            snapshot_file = os.getenv("QUESTIONS_SNAPSHOT")
+            if snapshot_file:
+                # El snapshot ya está compilado: solo se decodifican las preguntas elegidas
+                bank = open_snapshot_bank(snapshot_file, json_file)
+                if bank is not None and len(bank) > 0:
+                    for question in bank.sample(self.total_rounds):
+                        self.quiz.add_question(question)
+                    return True
+
             with open(json_file, 'r', encoding='utf-8') as file:
                 data = json.load(file)
                 questions_data = data.get('questions', [])
@@ -47,19 +57,13 @@ class GameManager:
                     questions_data = random.sample(questions_data, self.total_rounds)
                 
                 for q_data in questions_data:
-                    # Convert difficulty string to enum
-                    difficulty_str = q_data.get('difficulty', 'easy').lower()
-                    difficulty = DifficultyLevel.EASY
-                    if difficulty_str == "medium" or difficulty_str == "medio":
-                        difficulty = DifficultyLevel.MEDIUM
-                    elif difficulty_str == "hard" or difficulty_str == "difícil":
-                        difficulty = DifficultyLevel.HARD
-                    
                     question = Question(
                         description=q_data['description'],
                         options=q_data['options'],
                         correct_answer=q_data['correct_answer'],
-                        difficulty=difficulty
+                        difficulty=DifficultyLevel.from_string(q_data.get('difficulty', 'easy')),
+                        category=q_data.get('category'),
+                        question_id=q_data.get('id')
                     )
                     self.quiz.add_question(question)
                 return True
@@ -0,0 +1,26 @@
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+def configure_logging(level=LOG_LEVEL):
+    """Configura el logger 'app' para escribir a través de una cola.
+
+    El QueueHandler solo encola el registro; el QueueListener lo escribe en
+    un hilo aparte, así el event loop nunca espera por E/S de consola.
+    Devuelve el listener para detenerlo al cerrar la aplicación.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    logger = logging.getLogger("app")
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,102 @@
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Métricas en memoria del proceso, expuestas en formato texto de Prometheus"""
+
+    def __init__(self):
+        self.latency = {}
+        self.requests = {}
+        self.questions_served = {"db": 0, "local": 0}
+
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+
+        request_key = (method, route, status)
+        self.requests[request_key] = self.requests.get(request_key, 0) + 1
+
+    def record_questions(self, mode, count):
+        self.questions_served[mode] = self.questions_served.get(mode, 0) + count
+
+    def render(self, extra=()):
+        """extra: tuplas (nombre, tipo, ayuda, valor) calculadas al momento del scrape"""
+        lines = [
+            "# HELP trivia_request_duration_seconds Latencia de las peticiones HTTP por ruta",
+            "# TYPE trivia_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'trivia_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'trivia_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"trivia_request_duration_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"trivia_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP trivia_requests_total Peticiones HTTP por ruta y código de estado")
+        lines.append("# TYPE trivia_requests_total counter")
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f'trivia_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        lines.append("# HELP trivia_questions_served_total Preguntas entregadas según su origen")
+        lines.append("# TYPE trivia_questions_served_total counter")
+        for mode, count in sorted(self.questions_served.items()):
+            lines.append(f'trivia_questions_served_total{{mode="{mode}"}} {count}')
+
+        for name, metric_type, help_text, value in extra:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide la latencia de cada petición por plantilla de ruta"""
+
+    def __init__(self, app, registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.registry.observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - start
+            )
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+ANSWER_LOG = os.getenv("ANSWER_LOG", "").lower()
+ANSWER_LOG_FILE = os.getenv("ANSWER_LOG_FILE", "data/answer_events.db")
+ANSWER_LOG_QUEUE_SIZE = int(os.getenv("ANSWER_LOG_QUEUE_SIZE", "10000"))
+ANSWER_LOG_BATCH_SIZE = int(os.getenv("ANSWER_LOG_BATCH_SIZE", "500"))
+ANSWER_LOG_FLUSH_INTERVAL = float(os.getenv("ANSWER_LOG_FLUSH_INTERVAL", "1"))
+ANSWER_LOG_OVERFLOW = os.getenv("ANSWER_LOG_OVERFLOW", "drop").lower()
+ANSWER_LOG_RETRIES = 3
+
+EVENT_COLUMNS = (
+    "answered_at", "question_id", "player_id", "answer", "correct", "points", "difficulty", "answer_seconds"
+)
+
+CREATE_EVENTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS answer_events (
+        id {id_type},
+        answered_at DOUBLE PRECISION NOT NULL,
+        question_id INTEGER,
+        player_id VARCHAR(64),
+        answer TEXT NOT NULL,
+        correct BOOLEAN NOT NULL,
+        points INTEGER NOT NULL,
+        difficulty VARCHAR(20),
+        answer_seconds DOUBLE PRECISION
+    )
+"""
+
+class AnswerLogFull(Exception):
+    pass
+
+def answer_event(question, answer, is_correct, points, answer_seconds=None, player_id=None):
+    """Tupla con las columnas de EVENT_COLUMNS; la hora es la del servidor al calificar"""
+    return (
+        time.time(), question.id if isinstance(question.id, int) else None, player_id, answer,
+        bool(is_correct), points, question.difficulty.value, answer_seconds
+    )
+
+class SQLiteAnswerWriter:
+    """Escribe los eventos en un archivo SQLite en modo WAL.
+
+    sqlite3 es bloqueante: write se ejecuta en un hilo aparte y la conexión
+    solo la usa ese hilo, un lote a la vez.
+    """
+
+    def __init__(self, path=ANSWER_LOG_FILE):
+        self.path = path
+        self._connection = None
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Con WAL, NORMAL solo sincroniza en los checkpoints: un corte de luz
+        # puede perder los últimos lotes pero nunca corrompe el archivo
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(CREATE_EVENTS_TABLE.format(id_type="INTEGER PRIMARY KEY"))
+        connection.commit()
+        return connection
+
+    def _write(self, events):
+        if self._connection is None:
+            self._connection = self._connect()
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT INTO answer_events ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})",
+                events
+            )
+
+    async def write(self, events):
+        await asyncio.to_thread(self._write, events)
+
+    async def close(self):
+        if self._connection is not None:
+            await asyncio.to_thread(self._connection.close)
+            self._connection = None
+
+class PostgresAnswerWriter:
+    """Escribe los eventos en la tabla answer_events de la base de datos de la API"""
+
+    def __init__(self, database):
+        self.database = database
+        self._table_ready = False
+
+    async def write(self, events):
+        async with self.database.connection() as connection:
+            if not self._table_ready:
+                await connection.execute(CREATE_EVENTS_TABLE.format(id_type="BIGSERIAL PRIMARY KEY"))
+                self._table_ready = True
+            raw_connection = connection.raw_connection
+            if hasattr(raw_connection, "copy_records_to_table"):
+                # asyncpg: COPY binario, como la carga de preguntas
+                await raw_connection.copy_records_to_table("answer_events", records=events, columns=EVENT_COLUMNS)
+            else:
+                await connection.execute_many(
+                    f"INSERT INTO answer_events ({', '.join(EVENT_COLUMNS)}) "
+                    f"VALUES ({', '.join(':' + column for column in EVENT_COLUMNS)})",
+                    [dict(zip(EVENT_COLUMNS, event)) for event in events]
+                )
+
+    async def close(self):
+        pass
+
+class AnswerEventLog:
+    """Registro append-only de las respuestas calificadas, escrito en segundo plano.
+
+    record solo agrega los eventos a una cola en memoria: la petición nunca
+    espera al disco ni a la base de datos. Una tarea los escribe por lotes
+    cuando se juntan batch_size o pasan flush_interval segundos. Si la cola
+    llega a queue_size, con overflow="drop" los eventos nuevos se descartan
+    y se cuentan; con overflow="reject" record lanza AnswerLogFull para que
+    la API responda 503 y el cliente reintente.
+    """
+
+    def __init__(self, writer, queue_size=ANSWER_LOG_QUEUE_SIZE, batch_size=ANSWER_LOG_BATCH_SIZE,
+                 flush_interval=ANSWER_LOG_FLUSH_INTERVAL, overflow=ANSWER_LOG_OVERFLOW):
+        self.writer = writer
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._queue = deque()
+        self._batch_ready = asyncio.Event()
+        self._task = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def record(self, events):
+        """Encola los eventos de una respuesta o de un lote; todos o ninguno"""
+        if len(self._queue) + len(events) > self.queue_size:
+            if self.overflow == "reject":
+                self.rejected += len(events)
+                raise AnswerLogFull(f"Cola del registro de respuestas llena ({self.queue_size} eventos)")
+            self.dropped += len(events)
+            return False
+
+        self._queue.extend(events)
+        self.enqueued += len(events)
+        if len(self._queue) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Detiene la tarea y escribe lo que quede en la cola.
+
+        No se cancela la tarea: un lote a medio escribir en el hilo de SQLite
+        terminaría igual y se volvería a escribir al reencolarlo.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        while self._queue:
+            if not await self.flush():
+                break
+        await self.writer.close()
+
+    async def _run(self):
+        while not self._stopping:
+            if len(self._queue) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()
+            if self._queue and not self._stopping:
+                await self.flush()
+
+    async def flush(self):
+        """Escribe un lote; si falla lo reintenta y, agotados los intentos, lo descarta"""
+        queue = self._queue
+        batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+        if not batch:
+            return True
+
+        try:
+            for attempt in range(1, ANSWER_LOG_RETRIES + 1):
+                try:
+                    await self.writer.write(batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                    return True
+                except Exception as e:
+                    logger.warning(f"Error al escribir {len(batch)} eventos de respuesta (intento {attempt}): {e}")
+                    if attempt < ANSWER_LOG_RETRIES:
+                        await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            # Al detenerse, el lote vuelve a la cola para la escritura final
+            queue.extendleft(reversed(batch))
+            raise
+
+        self.failed += len(batch)
+        return False
+
+    def stats(self):
+        return {
+            "queued": len(self._queue),
+            "queue_size": self.queue_size,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "batches": self.batches
+        }
+
+def create_answer_log(db_manager=None):
+    """AnswerEventLog según ANSWER_LOG (sqlite o postgres), o None si está desactivado"""
+    if ANSWER_LOG == "sqlite":
+        return AnswerEventLog(SQLiteAnswerWriter(ANSWER_LOG_FILE))
+    if ANSWER_LOG == "postgres":
+        if db_manager is None or not db_manager.connected:
+            logger.warning("ANSWER_LOG=postgres sin conexión a la base de datos. Usando SQLite.")
+            return AnswerEventLog(SQLiteAnswerWriter(ANSWER_LOG_FILE))
+        return AnswerEventLog(PostgresAnswerWriter(db_manager.database))
+    return None
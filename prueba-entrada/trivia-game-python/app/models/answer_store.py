@@ -0,0 +1,100 @@
+import os
+import time
+from array import array
+
+ANSWER_STORE_CAPACITY = int(os.getenv("ANSWER_STORE_CAPACITY", "100000"))
+ANSWER_STORE_TTL = float(os.getenv("ANSWER_STORE_TTL", "3600"))
+
+class AnswerKeyStore:
+    """Almacén acotado de las preguntas entregadas, indexado por id entero.
+
+    Los ids se asignan de forma creciente y cada uno ocupa la ranura
+    id % capacity de un buffer circular guardado como arreglos paralelos
+    (ids, referencias a la pregunta del banco y hora de emisión). No se copia
+    la descripción ni las opciones: se guarda la misma instancia de Question.
+    Al dar la vuelta se expulsa la entrada más antigua, y las que superan el
+    TTL se descartan al consultarlas.
+    """
+
+    def __init__(self, capacity=ANSWER_STORE_CAPACITY, ttl=ANSWER_STORE_TTL, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._clock = clock
+        self._ids = array('q', [0]) * capacity
+        self._issued_at = array('d', [0.0]) * capacity
+        self._questions = [None] * capacity
+        # 1 si la entrega de la ranura ya se calificó: cuenta una sola vez en el ranking
+        self._graded = bytearray(capacity)
+        self._next_id = 1
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return self._size
+
+    def put(self, question):
+        question_id = self._next_id
+        self._next_id += 1
+
+        slot = question_id % self.capacity
+        if self._questions[slot] is not None:
+            self.evictions += 1
+        else:
+            self._size += 1
+
+        self._ids[slot] = question_id
+        self._issued_at[slot] = self._clock()
+        self._questions[slot] = question
+        self._graded[slot] = 0
+        return question_id
+
+    def get(self, question_id):
+        question, _ = self.get_with_age(question_id)
+        return question
+
+    def get_with_age(self, question_id):
+        """Devuelve (pregunta, segundos desde que se emitió) o (None, None)"""
+        slot = question_id % self.capacity
+        question = self._questions[slot]
+        if question is None or self._ids[slot] != question_id:
+            self.misses += 1
+            return None, None
+
+        age = self._clock() - self._issued_at[slot]
+        if age > self.ttl:
+            self._questions[slot] = None
+            self._size -= 1
+            self.expirations += 1
+            self.misses += 1
+            return None, None
+
+        self.hits += 1
+        return question, age
+
+    def mark_graded(self, question_id):
+        """True la primera vez que se califica la entrega question_id; False si se repite o ya no está"""
+        slot = question_id % self.capacity
+        if self._questions[slot] is None or self._ids[slot] != question_id or self._graded[slot]:
+            return False
+        self._graded[slot] = 1
+        return True
+
+    def clear(self):
+        self._questions = [None] * self.capacity
+        self._size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """Disyuntor para las llamadas a la base de datos.
+
+    closed: las llamadas pasan; tras failure_threshold fallos seguidos se abre.
+    open: las llamadas fallan al instante con CircuitOpenError, sin esperar
+    a la base de datos. Pasado reset_timeout queda half_open.
+    half_open: se deja pasar una única llamada de prueba; si funciona se
+    cierra y si falla se vuelve a abrir.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, call_timeout=2.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow_request(self):
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.trips += 1
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+        self._trial_in_flight = False
+
+    async def call(self, coroutine_factory):
+        if not self.allow_request():
+            raise CircuitOpenError("Circuito abierto: la base de datos no está disponible")
+
+        try:
+            result = await asyncio.wait_for(coroutine_factory(), self.call_timeout)
+        except asyncio.CancelledError:
+            self._trial_in_flight = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
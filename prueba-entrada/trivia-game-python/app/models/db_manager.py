@@ -1,21 +1,142 @@
 import json
+import logging
 import os
 import random
+import secrets
 import asyncio
+import itertools
+import time
 from databases import Database
 from dotenv import load_dotenv
+from app.models.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.models.question import Question
+from app.models.question_bank import QuestionBank, estimate_question_bytes
+from app.models.question_index import compose_quiz
 from app.models.difficulty import DifficultyLevel
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_READINESS_TTL = float(os.getenv("DB_READINESS_TTL", "30"))
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "5"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_POOL_WARMUP = os.getenv("DB_POOL_WARMUP", "true").lower() in ("1", "true", "yes")
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "2"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "3"))
+DB_BREAKER_RESET_TIMEOUT = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "30"))
+DB_MIRROR = os.getenv("DB_MIRROR", "false").lower() in ("1", "true", "yes")
+DB_MIRROR_REFRESH_INTERVAL = float(os.getenv("DB_MIRROR_REFRESH_INTERVAL", "60"))
+DB_MIRROR_MAX_ROWS = int(os.getenv("DB_MIRROR_MAX_ROWS", "1000000"))
+DB_MIRROR_TIMEOUT = float(os.getenv("DB_MIRROR_TIMEOUT", "120"))
+
+_QUESTION_COLUMNS = """
+    SELECT q.id, q.description, q.options, q.correct_answer, q.difficulty,
+           c.name AS category
+    FROM questions q
+    LEFT JOIN categories c ON c.id = q.category_id
+"""
+
+def _build_random_query(by_difficulty, by_category, suffix=""):
+    # Muestreo por clave aleatoria indexada: se elige un pivote y se recorre
+    # el índice (difficulty, random_key) desde ahí, dando la vuelta al inicio
+    # si no alcanzan las filas. Evita ORDER BY RANDOM() que obliga a leer y
+    # ordenar toda la tabla.
+    filters = ""
+    if by_difficulty:
+        filters += f" AND q.difficulty = :difficulty{suffix}"
+    if by_category:
+        filters += " AND q.category_id = (SELECT id FROM categories WHERE lower(name) = :category)"
+    return f"""
+        ({_QUESTION_COLUMNS} WHERE q.random_key >= :pivot{suffix}{filters} ORDER BY q.random_key LIMIT :limit{suffix})
+        UNION ALL
+        ({_QUESTION_COLUMNS} WHERE q.random_key < :pivot{suffix}{filters} ORDER BY q.random_key LIMIT :limit{suffix})
+        LIMIT :limit{suffix}
+    """
+
+def _build_composite_query(difficulties, by_category):
+    # Un muestreo por dificultad, todos en la misma sentencia
+    return "\nUNION ALL\n".join(
+        f"SELECT * FROM ({_build_random_query(True, by_category, '_' + difficulty.value)}) AS {difficulty.value}_questions"
+        for difficulty in difficulties
+    )
+
+# El texto de cada consulta es siempre el mismo, así asyncpg reutiliza la
+# sentencia preparada de su caché en lugar de volver a analizarla
+_RANDOM_QUERIES = {
+    (by_difficulty, by_category): _build_random_query(by_difficulty, by_category)
+    for by_difficulty in (False, True)
+    for by_category in (False, True)
+}
+
+# Una sentencia fija por combinación de dificultades pedidas
+_COMPOSITE_QUERIES = {
+    (difficulties, by_category): _build_composite_query(difficulties, by_category)
+    for difficulties in (
+        tuple(level for level, wanted in zip(DifficultyLevel, mask) if wanted)
+        for mask in itertools.product((False, True), repeat=len(DifficultyLevel))
+    )
+    if difficulties
+    for by_category in (False, True)
+}
+
+# Con distinct_categories se traen más filas de las pedidas para poder repartir
+COMPOSITE_OVERSAMPLE = 4
+
+_random = secrets.SystemRandom()
+
+def _estimate_bank_bytes(questions):
+    return sum(estimate_question_bytes(question) for question in questions)
+
+def _build_mirror(questions):
+    return QuestionBank(questions, source="database"), _estimate_bank_bytes(questions)
+
+def _pool_options(database_url):
+    # Solo el backend asyncpg acepta opciones de pool y de caché de sentencias
+    if not database_url.startswith(("postgresql", "postgres")):
+        return {}
+    return {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE
+    }
+
+class PoolMetrics:
+    def __init__(self):
+        self.acquisitions = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.in_use = 0
+
+    def record_acquire(self, wait_seconds):
+        self.acquisitions += 1
+        self.wait_seconds_total += wait_seconds
+        if wait_seconds > self.wait_seconds_max:
+            self.wait_seconds_max = wait_seconds
 
 class DBManager:
     
     def __init__(self):
-        self.database = Database(DATABASE_URL) if DATABASE_URL else None
+        self.database = Database(DATABASE_URL, **_pool_options(DATABASE_URL)) if DATABASE_URL else None
+        self.pool_metrics = PoolMetrics()
+        self.breaker = CircuitBreaker(DB_BREAKER_FAILURE_THRESHOLD, DB_BREAKER_RESET_TIMEOUT, DB_QUERY_TIMEOUT)
         self.connected = False
+        self.readiness_ttl = DB_READINESS_TTL
+        self._ready = None
+        self._ready_checked_at = 0.0
+        self._readiness_task = None
+        self.mirror_enabled = DB_MIRROR
+        self.mirror_refresh_interval = DB_MIRROR_REFRESH_INTERVAL
+        self.mirror_max_rows = DB_MIRROR_MAX_ROWS
+        self.mirror_timeout = DB_MIRROR_TIMEOUT
+        self.mirror = None
+        self._mirror_max_id = 0
+        self._mirror_updated_at = None
+        self._mirror_bytes = 0
+        self._mirror_refreshed_at = None
+        self._mirror_task = None
         
     async def connect(self):
         if not self.database:
@@ -26,54 +147,298 @@ class DBManager:
             self.connected = True
             return True
         except Exception as e:
-            print(f"Error al conectar a la base de datos: {e}")
+            logger.warning(f"Error al conectar a la base de datos: {e}")
             return False
         
     async def disconnect(self):
+        self.stop_readiness_refresh()
+        self.stop_mirror_refresh()
         if self.connected:
             await self.database.disconnect()
             self.connected = False
     
-    async def get_random_questions(self, limit=10):
+    async def _fetch(self, method, query, values=None):
+        # Con el circuito abierto se falla al instante; si no, la consulta
+        # tiene un límite de DB_QUERY_TIMEOUT segundos
+        return await self.breaker.call(lambda: self._run_query(method, query, values))
+
+    async def _fetch_mirror(self, method, query, values=None):
+        # Leer la tabla completa tarda mucho más que DB_QUERY_TIMEOUT sin que
+        # la base de datos esté caída: las consultas del espejo tienen su
+        # propio límite y sus fallos no cuentan para abrir el circuito
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            raise CircuitOpenError("Circuito abierto: la base de datos no está disponible")
+        return await asyncio.wait_for(self._run_query(method, query, values), self.mirror_timeout)
+
+    async def _run_query(self, method, query, values):
+        # Se toma la conexión explícitamente para medir cuánto se espera al pool
+        started = time.perf_counter()
+        async with self.database.connection() as connection:
+            self.pool_metrics.record_acquire(time.perf_counter() - started)
+            self.pool_metrics.in_use += 1
+            try:
+                return await getattr(connection, method)(query, values)
+            finally:
+                self.pool_metrics.in_use -= 1
+
+    async def warm_up(self, connections=None):
+        """Abre las conexiones del pool y prepara en cada una la consulta principal"""
+        if not self.connected:
+            return 0
+
+        connections = connections or DB_POOL_MIN_SIZE
+
+        async def warm_connection():
+            # Cada tarea obtiene su propia conexión del pool
+            await self._fetch("fetch_all", _RANDOM_QUERIES[(False, False)], {"limit": 0, "pivot": 0.0})
+
+        results = await asyncio.gather(*(warm_connection() for _ in range(connections)), return_exceptions=True)
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning(f"Calentamiento del pool incompleto: {failures[0]}")
+        return connections - len(failures)
+
+    def pool_stats(self):
+        pool = getattr(getattr(self.database, "_backend", None), "_pool", None)
+        metrics = self.pool_metrics
+        stats = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "in_use": metrics.in_use,
+            "idle": None,
+            "size": None,
+            "acquisitions": metrics.acquisitions,
+            "wait_seconds_total": metrics.wait_seconds_total,
+            "wait_seconds_max": metrics.wait_seconds_max,
+            "wait_seconds_avg": metrics.wait_seconds_total / metrics.acquisitions if metrics.acquisitions else 0.0
+        }
+        if pool is not None and hasattr(pool, "get_idle_size"):
+            stats["size"] = pool.get_size()
+            stats["idle"] = pool.get_idle_size()
+        return stats
+
+    async def get_random_questions(self, limit=10, difficulty=None, category=None):
+        mirror = self.mirror
+        if mirror is not None:
+            return mirror.sample(limit, difficulty, category)
+
         if not self.connected:
             return []
             
         try:
-            query = """
-                SELECT q.id, q.description, q.options, q.correct_answer, q.difficulty
-                FROM questions q
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """
-            results = await self.database.fetch_all(query, {"limit": limit})
+            values = {"limit": limit, "pivot": _random.random()}
+            if difficulty:
+                values["difficulty"] = difficulty.value if isinstance(difficulty, DifficultyLevel) else difficulty
+            if category:
+                values["category"] = category.strip().lower()
+            query = _RANDOM_QUERIES[(bool(difficulty), bool(category))]
+            results = await self._fetch("fetch_all", query, values)
             
             questions = []
             for row in results:
-                try:
-                    options = json.loads(row["options"])
-                except (json.JSONDecodeError, TypeError):
-                    print(f"Error al deserializar opciones para pregunta ID {row['id']}")
-                    continue
-                
-                difficulty_str = row.get("difficulty", "easy").lower()
-                difficulty = DifficultyLevel.EASY
-                if difficulty_str == "medium":
-                    difficulty = DifficultyLevel.MEDIUM
-                elif difficulty_str == "hard":
-                    difficulty = DifficultyLevel.HARD
-                    
-                question = Question(
-                    description=row["description"],
-                    options=options,
-                    correct_answer=row["correct_answer"],
-                    difficulty=difficulty
-                )
-                questions.append(question)
+                question = self._row_to_question(row)
+                if question is not None:
+                    questions.append(question)
                 
             return questions
+        except CircuitOpenError:
+            return []
         except Exception as e:
-            
+            logger.error(f"Error al obtener preguntas aleatorias: {e}")
+            self.invalidate_readiness()
+            return []
+
+    async def get_composite_questions(self, composition, category=None, distinct_categories=False):
+        """Arma un quiz {dificultad: cantidad} con una sola consulta"""
+        mirror = self.mirror
+        if mirror is not None:
+            return compose_quiz(mirror, composition, category, distinct_categories)
+
+        if not self.connected:
             return []
+
+        difficulties = tuple(level for level in DifficultyLevel if composition.get(level, 0) > 0)
+        if not difficulties:
+            return []
+
+        oversample = COMPOSITE_OVERSAMPLE if distinct_categories and not category else 1
+        values = {}
+        for difficulty in difficulties:
+            values[f"difficulty_{difficulty.value}"] = difficulty.value
+            values[f"limit_{difficulty.value}"] = composition[difficulty] * oversample
+            values[f"pivot_{difficulty.value}"] = _random.random()
+        if category:
+            values["category"] = category.strip().lower()
+
+        try:
+            rows = await self._fetch("fetch_all", _COMPOSITE_QUERIES[(difficulties, bool(category))], values)
+        except CircuitOpenError:
+            return []
+        except Exception as e:
+            logger.error(f"Error al obtener el quiz compuesto: {e}")
+            self.invalidate_readiness()
+            return []
+
+        questions = [q for q in (self._row_to_question(row) for row in rows) if q is not None]
+        if oversample == 1:
+            return questions
+        # El reparto por categorías se hace sobre las filas traídas
+        return compose_quiz(QuestionBank(questions, source="database"), composition, None, True)
+
+    async def get_question_by_id(self, question_id):
+        if self.mirror is not None:
+            return self.mirror.get(question_id)
+
+        if not self.connected:
+            return None
+
+        try:
+            query = _QUESTION_COLUMNS + " WHERE q.id = :id"
+            row = await self._fetch("fetch_one", query, {"id": question_id})
+            return self._row_to_question(row) if row else None
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            logger.error(f"Error al obtener la pregunta {question_id}: {e}")
+            self.invalidate_readiness()
+            return None
+
+    async def load_mirror(self):
+        """Carga la tabla questions completa en memoria (hasta mirror_max_rows filas)"""
+        if not self.connected:
+            return False
+
+        try:
+            # Se lee antes que las filas: si algo cambia en medio, el próximo
+            # refresco lo verá como una actualización y recargará
+            stamp = await self._fetch_mirror("fetch_one", "SELECT MAX(updated_at) AS updated_at FROM questions")
+            rows = await self._fetch_mirror(
+                "fetch_all",
+                _QUESTION_COLUMNS + " ORDER BY q.id LIMIT :limit",
+                {"limit": self.mirror_max_rows}
+            )
+        except Exception as e:
+            logger.error(f"Error al cargar el espejo de preguntas: {e}")
+            return False
+
+        questions = [q for q in (self._row_to_question(row) for row in rows) if q is not None]
+        # Con un millón de filas armar el banco lleva segundos: se hace fuera
+        # del event loop y el banco terminado se publica de una vez
+        mirror, mirror_bytes = await asyncio.to_thread(_build_mirror, questions)
+        self._set_mirror(mirror, max((row["id"] for row in rows), default=0), mirror_bytes)
+        self._mirror_updated_at = stamp["updated_at"]
+        logger.info(f"Espejo de preguntas cargado: {len(questions)} preguntas, ~{self._mirror_bytes // 1024} KiB")
+        return True
+
+    async def refresh_mirror(self):
+        """Trae solo las filas nuevas (id mayor al último visto).
+
+        Si la tabla tiene menos filas de las esperadas hubo borrados, y si
+        alguna fila ya cargada tiene un updated_at posterior fue modificada
+        en su lugar (load_questions --sync); en ambos casos se recarga completa.
+        """
+        if self.mirror is None:
+            return await self.load_mirror()
+
+        try:
+            summary = await self._fetch_mirror(
+                "fetch_one",
+                "SELECT COUNT(*) AS count, COALESCE(MAX(id), 0) AS max_id, "
+                "MAX(updated_at) FILTER (WHERE id <= :max_id) AS updated_at FROM questions",
+                {"max_id": self._mirror_max_id}
+            )
+            if self._mirror_is_outdated(summary["updated_at"]):
+                return await self.load_mirror()
+            if summary["max_id"] == self._mirror_max_id and summary["count"] == len(self.mirror):
+                self._mirror_refreshed_at = time.monotonic()
+                return True
+
+            remaining = self.mirror_max_rows - len(self.mirror)
+            rows = []
+            if remaining > 0:
+                rows = await self._fetch_mirror(
+                    "fetch_all",
+                    _QUESTION_COLUMNS + " WHERE q.id > :max_id ORDER BY q.id LIMIT :limit",
+                    {"max_id": self._mirror_max_id, "limit": remaining}
+                )
+        except Exception as e:
+            logger.error(f"Error al refrescar el espejo de preguntas: {e}")
+            self.invalidate_readiness()
+            return False
+
+        if summary["count"] < len(self.mirror) + len(rows):
+            return await self.load_mirror()
+
+        new_questions = [q for q in (self._row_to_question(row) for row in rows) if q is not None]
+        if new_questions:
+            # Solo se procesan las filas nuevas; el resto del banco se reutiliza
+            mirror = await asyncio.to_thread(self.mirror.extended, new_questions)
+            self._set_mirror(
+                mirror,
+                max(row["id"] for row in rows),
+                self._mirror_bytes + _estimate_bank_bytes(new_questions)
+            )
+            logger.info(f"Espejo de preguntas actualizado: {len(new_questions)} preguntas nuevas")
+        else:
+            self._mirror_refreshed_at = time.monotonic()
+        return True
+
+    def _mirror_is_outdated(self, updated_at):
+        if updated_at is None or self._mirror_updated_at is None:
+            return False
+        return updated_at > self._mirror_updated_at
+
+    def _set_mirror(self, mirror, max_id, mirror_bytes):
+        # Se reemplaza la instantánea completa; quien ya tomó la anterior la conserva
+        self.mirror = mirror
+        self._mirror_max_id = max_id
+        self._mirror_bytes = mirror_bytes
+        self._mirror_refreshed_at = time.monotonic()
+
+    def mirror_stats(self):
+        mirror = self.mirror
+        return {
+            "enabled": self.mirror_enabled,
+            "rows": len(mirror) if mirror is not None else 0,
+            "max_rows": self.mirror_max_rows,
+            "estimated_bytes": self._mirror_bytes,
+            "refresh_interval_seconds": self.mirror_refresh_interval,
+            "seconds_since_refresh": (
+                time.monotonic() - self._mirror_refreshed_at if self._mirror_refreshed_at is not None else None
+            )
+        }
+
+    def start_mirror_refresh(self, interval=None):
+        if self._mirror_task is None:
+            interval = interval or self.mirror_refresh_interval
+            self._mirror_task = asyncio.create_task(self._refresh_mirror_periodically(interval))
+
+    def stop_mirror_refresh(self):
+        if self._mirror_task is not None:
+            self._mirror_task.cancel()
+            self._mirror_task = None
+
+    async def _refresh_mirror_periodically(self, interval):
+        while self.connected:
+            await asyncio.sleep(interval)
+            if self.breaker.state != CircuitBreaker.OPEN:
+                await self.refresh_mirror()
+
+    def _row_to_question(self, row):
+        try:
+            options = json.loads(row["options"])
+        except (json.JSONDecodeError, TypeError):
+            logger.warning(f"Error al deserializar opciones para pregunta ID {row['id']}")
+            return None
+
+        return Question(
+            description=row["description"],
+            options=options,
+            correct_answer=row["correct_answer"],
+            difficulty=DifficultyLevel.from_string(row.get("difficulty", "easy")),
+            category=row.get("category"),
+            question_id=row["id"]
+        )
     
     async def question_count(self):
         if not self.connected:
@@ -81,16 +446,61 @@ class DBManager:
             
         try:
             query = "SELECT COUNT(*) as count FROM questions"
-            result = await self.database.fetch_one(query)
+            result = await self._fetch("fetch_one", query)
             return result["count"] if result else 0
         except Exception as e:
-            print(f"Error al contar preguntas: {e}")
+            logger.error(f"Error al contar preguntas: {e}")
             return 0
             
     async def is_database_ready(self):
         if not self.connected:
             return False
-            
+
+        # Con el circuito abierto o semiabierto no se espera a la base de
+        # datos: modo local. La llamada de prueba la hace solo el sondeo de
+        # _refresh_readiness_periodically, nunca una petición
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            return False
+
+        # El estado se cachea durante readiness_ttl segundos para que cada
+        # petición no pague las consultas a information_schema y COUNT(*)
+        if self._ready is not None and time.monotonic() - self._ready_checked_at < self.readiness_ttl:
+            return self._ready
+
+        return await self.refresh_readiness()
+
+    async def refresh_readiness(self):
+        ready = await self._probe_readiness()
+        self._ready = ready
+        self._ready_checked_at = time.monotonic()
+        return ready
+
+    @property
+    def ready(self):
+        """Último estado conocido, sin consultar la base de datos"""
+        return bool(self._ready)
+
+    def invalidate_readiness(self):
+        self._ready = None
+
+    def start_readiness_refresh(self, interval=None):
+        if self._readiness_task is None:
+            # También sirve de sondeo para cerrar el circuito cuando pasa a half_open
+            interval = interval or min(self.readiness_ttl / 2, self.breaker.reset_timeout)
+            self._readiness_task = asyncio.create_task(self._refresh_readiness_periodically(interval))
+
+    def stop_readiness_refresh(self):
+        if self._readiness_task is not None:
+            self._readiness_task.cancel()
+            self._readiness_task = None
+
+    async def _refresh_readiness_periodically(self, interval):
+        while self.connected:
+            await asyncio.sleep(interval)
+            if self.breaker.state != CircuitBreaker.OPEN:
+                await self.refresh_readiness()
+
+    async def _probe_readiness(self):
         try:
             tables_query = """
                 SELECT EXISTS (
@@ -102,13 +512,15 @@ class DBManager:
                     WHERE table_name = 'categories'
                 ) as categories_exists
             """
-            tables_result = await self.database.fetch_one(tables_query)
+            tables_result = await self._fetch("fetch_one", tables_query)
             
             if not (tables_result["questions_exists"] and tables_result["categories_exists"]):
                 return False
                 
             count = await self.question_count()
             return count > 0
+        except CircuitOpenError:
+            return False
         except Exception as e:
-            print(f"Error al verificar base de datos: {e}")
+            logger.error(f"Error al verificar base de datos: {e}")
             return False 
\ No newline at end of file
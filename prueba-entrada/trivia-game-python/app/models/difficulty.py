@@ -10,4 +10,22 @@ class DifficultyLevel(Enum):
             DifficultyLevel.EASY: 1,
             DifficultyLevel.MEDIUM: 2,
             DifficultyLevel.HARD: 3
-        }[self] 
\ No newline at end of file
+        }[self]
+
+    @classmethod
+    def from_string(cls, difficulty_str):
+        """Convierte un texto (en inglés o español) en un nivel; por defecto EASY"""
+        if not difficulty_str:
+            return cls.EASY
+        return cls(_DIFFICULTY_ALIASES.get(difficulty_str.lower(), "easy"))
+
+_DIFFICULTY_ALIASES = {
+    "fácil": "easy",
+    "facil": "easy",
+    "medio": "medium",
+    "difícil": "hard",
+    "dificil": "hard",
+    "easy": "easy",
+    "medium": "medium",
+    "hard": "hard"
+}
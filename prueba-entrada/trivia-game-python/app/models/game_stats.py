@@ -1,4 +1,8 @@
 from app.models.difficulty import DifficultyLevel
+from app.models.quantile_sketch import KLLSketch
+
+# Distribuciones por partida y por respuesta, resumidas con sketches KLL
+DISTRIBUTIONS = ('game_score', 'game_accuracy', 'answer_seconds')
 
 class GameStats:
     def __init__(self):
@@ -11,6 +15,14 @@ class GameStats:
             DifficultyLevel.MEDIUM: {'correct': 0, 'total': 0},
             DifficultyLevel.HARD: {'correct': 0, 'total': 0}
         }
+        self.distributions = {name: KLLSketch() for name in DISTRIBUTIONS}
+
+    def reset(self):
+        self.__init__()
+
+    def update_many(self, graded):
+        for question, is_correct in graded:
+            self.update_stats(question, is_correct)
 
     def update_stats(self, question, is_correct):
         self.total_rounds += 1
@@ -22,6 +34,15 @@ class GameStats:
             self.incorrect_answers += 1
         self.difficulty_stats[question.difficulty]['total'] += 1
 
+    def record_game(self, score, accuracy):
+        self.distributions['game_score'].update(score)
+        self.distributions['game_accuracy'].update(accuracy)
+
+    def record_answer_times(self, seconds):
+        sketch = self.distributions['answer_seconds']
+        for value in seconds:
+            sketch.update(value)
+
     def get_summary(self):
         return {
             'total_rounds': self.total_rounds,
@@ -29,5 +50,6 @@ class GameStats:
             'incorrect_answers': self.incorrect_answers,
             'total_score': self.total_score,
             'accuracy': (self.correct_answers / self.total_rounds * 100) if self.total_rounds > 0 else 0,
-            'difficulty_stats': self.difficulty_stats
+            'difficulty_stats': self.difficulty_stats,
+            'distributions': {name: sketch.summary() for name, sketch in self.distributions.items()}
         } 
\ No newline at end of file
@@ -0,0 +1,220 @@
+import os
+import secrets
+import time
+from itertools import islice
+
+LEADERBOARD_TOP_SIZE = int(os.getenv("LEADERBOARD_TOP_SIZE", "100"))
+LEADERBOARD_SNAPSHOT_INTERVAL = float(os.getenv("LEADERBOARD_SNAPSHOT_INTERVAL", "1"))
+LEADERBOARD_MAX_PLAYERS = int(os.getenv("LEADERBOARD_MAX_PLAYERS", "1000000"))
+
+_MAX_LEVEL = 16
+_random = secrets.SystemRandom()
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        # width[i]: cuántas posiciones del nivel 0 se avanzan al seguir next[i]
+        self.width = [1] * level
+
+class SkipList:
+    """Lista ordenada de claves con inserción, borrado y rango en O(log n) esperado.
+
+    Es una skip list "indexable": cada enlace guarda cuántos elementos salta,
+    así la posición de una clave se obtiene sumando anchos durante la
+    búsqueda y el elemento en la posición k se alcanza sin recorrer los
+    anteriores.
+    """
+
+    def __init__(self, rng=None):
+        self._head = _Node(None, _MAX_LEVEL)
+        self._size = 0
+        self._random = rng or _random
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        level = 1
+        while level < _MAX_LEVEL and self._random.random() < 0.25:
+            level += 1
+        return level
+
+    def _find(self, key):
+        """Último nodo menor que key en cada nivel y su posición (la cabeza es la 0)"""
+        update = [None] * _MAX_LEVEL
+        positions = [0] * _MAX_LEVEL
+        node = self._head
+        position = 0
+        for level in reversed(range(_MAX_LEVEL)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+            update[level] = node
+            positions[level] = position
+        return update, positions
+
+    def insert(self, key):
+        update, positions = self._find(key)
+        level = self._random_level()
+        node = _Node(key, level)
+        position = positions[0] + 1
+        for i in range(level):
+            previous = update[i]
+            node.next[i] = previous.next[i]
+            previous.next[i] = node
+            skipped = position - positions[i]
+            node.width[i] = previous.width[i] - skipped + 1
+            previous.width[i] = skipped
+        for i in range(level, _MAX_LEVEL):
+            update[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        update, _ = self._find(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(_MAX_LEVEL):
+            previous = update[i]
+            if previous.next[i] is node:
+                previous.width[i] += node.width[i] - 1
+                previous.next[i] = node.next[i]
+            else:
+                previous.width[i] -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """Posición (desde 0) de key, o None si no está"""
+        update, positions = self._find(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return None
+        return positions[0]
+
+    def iter_from(self, rank):
+        """Claves desde la posición rank en adelante"""
+        if rank < 0 or rank >= self._size:
+            return
+        node = self._head
+        position = 0
+        target = rank + 1
+        for level in reversed(range(_MAX_LEVEL)):
+            while node.next[level] is not None and position + node.width[level] <= target:
+                position += node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def __getitem__(self, rank):
+        for key in self.iter_from(rank):
+            return key
+        raise IndexError(rank)
+
+class PlayerScore:
+    __slots__ = ("player_id", "score", "correct_answers", "total_answers", "key")
+
+    def __init__(self, player_id):
+        self.player_id = player_id
+        self.score = 0
+        self.correct_answers = 0
+        self.total_answers = 0
+        self.key = None
+
+    def to_dict(self, rank):
+        return {
+            "rank": rank,
+            "player_id": self.player_id,
+            "score": self.score,
+            "correct_answers": self.correct_answers,
+            "total_answers": self.total_answers
+        }
+
+class Leaderboard:
+    """Puntaje por jugador ordenado en una SkipList.
+
+    Cada actualización mueve al jugador en O(log n). La clave es
+    (-puntaje, orden de llegada): a igual puntaje va primero quien lo
+    alcanzó antes. top() se sirve de una copia de los primeros top_size
+    que se rehace como mucho una vez cada snapshot_interval segundos, así
+    muchas lecturas del ranking no recorren la lista en cada petición.
+    """
+
+    def __init__(self, top_size=LEADERBOARD_TOP_SIZE, snapshot_interval=LEADERBOARD_SNAPSHOT_INTERVAL,
+                 max_players=LEADERBOARD_MAX_PLAYERS, clock=time.monotonic):
+        self.top_size = top_size
+        self.snapshot_interval = snapshot_interval
+        self.max_players = max_players
+        self._clock = clock
+        self.reset()
+
+    def reset(self):
+        self._ranking = SkipList()
+        self._players = {}
+        self._sequence = 0
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._players)
+
+    def record(self, player_id, results):
+        """Suma al jugador los resultados [(puntos, es_correcta)] de una o varias respuestas"""
+        player = self._players.get(player_id)
+        if player is None:
+            player = self._players[player_id] = PlayerScore(player_id)
+
+        points = 0
+        for earned, is_correct in results:
+            player.total_answers += 1
+            if is_correct:
+                player.correct_answers += 1
+                points += earned
+
+        if player.key is None or points:
+            if player.key is not None:
+                self._ranking.remove(player.key)
+            player.score += points
+            self._sequence += 1
+            player.key = (-player.score, self._sequence, player_id)
+            self._ranking.insert(player.key)
+            self._evict_overflow()
+        return player
+
+    def _evict_overflow(self):
+        # Si hay demasiados jugadores se descarta el último del ranking
+        while len(self._players) > self.max_players:
+            key = self._ranking[len(self._ranking) - 1]
+            self._ranking.remove(key)
+            del self._players[key[2]]
+            self.evictions += 1
+
+    def player(self, player_id):
+        """Posición actual (desde 1) y puntaje del jugador, o None si no tiene respuestas"""
+        player = self._players.get(player_id)
+        if player is None:
+            return None
+        return player.to_dict(self._ranking.rank(player.key) + 1)
+
+    def top(self, limit=10):
+        """Los primeros limit jugadores según la última copia del ranking"""
+        now = self._clock()
+        if self._snapshot is None or now - self._snapshot_at >= self.snapshot_interval:
+            players = self._players
+            self._snapshot = [
+                players[key[2]].to_dict(rank)
+                for rank, key in enumerate(islice(self._ranking.iter_from(0), self.top_size), start=1)
+            ]
+            self._snapshot_at = now
+        return self._snapshot[:min(limit, self.top_size)]
+
+    def snapshot_age(self):
+        if self._snapshot is None:
+            return 0.0
+        return self._clock() - self._snapshot_at
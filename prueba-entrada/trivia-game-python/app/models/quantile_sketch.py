@@ -0,0 +1,164 @@
+import math
+import os
+import secrets
+import struct
+from array import array
+
+QUANTILE_SKETCH_K = int(os.getenv("QUANTILE_SKETCH_K", "200"))
+
+_DECAY = 2 / 3
+_MAX_LEVELS = 64
+_HEADER = struct.Struct("<IIqdd")
+_LEVEL_LENGTH = struct.Struct("<I")
+_random = secrets.SystemRandom()
+
+class KLLSketch:
+    """Sketch KLL de cuantiles: memoria acotada y combinable entre procesos.
+
+    Los valores entran al nivel 0. Cuando un nivel se llena se ordena y se
+    promueve al siguiente uno de cada dos elementos (empezando al azar por el
+    primero o el segundo), y cada elemento del nivel h pasa a representar
+    2^h valores. Los niveles altos tienen más capacidad que los bajos, así el
+    sketch guarda unos 3k valores sin importar cuántos se agreguen y el error
+    de rango es de alrededor de 1.7/k (≈1% con k=200).
+    """
+
+    def __init__(self, k=QUANTILE_SKETCH_K, rng=None):
+        self.k = k
+        self._random = rng or _random
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        # Cada nivel es un array('d'): se serializa sin convertir elemento a elemento
+        self._levels = [array('d')]
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def __len__(self):
+        return self.count
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * _DECAY ** depth)))
+
+    def _grow(self):
+        self._levels.append(array('d'))
+        self._max_size = sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._levels[0].append(value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        while self._size >= self._max_size:
+            for level, items in enumerate(self._levels):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self._levels):
+                        self._grow()
+                    self._compact(level)
+                    break
+            else:
+                return
+
+    def _compact(self, level):
+        items = sorted(self._levels[level])
+        kept = items.pop() if len(items) % 2 else None
+        promoted = items[self._random.getrandbits(1)::2]
+        self._levels[level + 1].extend(promoted)
+        self._levels[level] = array('d', [] if kept is None else [kept])
+        self._size -= len(promoted)
+
+    def merge(self, other):
+        """Agrega en este sketch los valores resumidos en other"""
+        if not other.count:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+            self._size += len(items)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, fractions):
+        """Valores aproximados en cada fracción de fractions (entre 0 y 1), o None si está vacío"""
+        if not self.count:
+            return [None for _ in fractions]
+
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self._levels) for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.min)
+                continue
+            if fraction >= 1:
+                results.append(self.max)
+                continue
+            target = fraction * total
+            cumulative = 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    results.append(value)
+                    break
+        return results
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+    def summary(self, fractions=(0.5, 0.9, 0.99)):
+        values = self.quantiles(fractions)
+        result = {"count": self.count}
+        for fraction, value in zip(fractions, values):
+            result[f"p{fraction * 100:g}"] = value
+        return result
+
+    def to_bytes(self):
+        parts = [_HEADER.pack(self.k, len(self._levels), self.count,
+                              self.min if self.count else 0.0, self.max if self.count else 0.0)]
+        for items in self._levels:
+            parts.append(_LEVEL_LENGTH.pack(len(items)))
+            parts.append(items.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, rng=None):
+        k, levels, count, minimum, maximum = _HEADER.unpack_from(data, 0)
+        if levels > _MAX_LEVELS:
+            raise ValueError("Sketch inválido")
+        sketch = cls(k, rng)
+        offset = _HEADER.size
+        for level in range(levels):
+            if level:
+                sketch._grow()
+            (length,) = _LEVEL_LENGTH.unpack_from(data, offset)
+            offset += _LEVEL_LENGTH.size
+            items = array('d')
+            items.frombytes(data[offset:offset + 8 * length])
+            if len(items) != length:
+                raise ValueError("Sketch truncado")
+            offset += 8 * length
+            sketch._levels[level] = items
+            sketch._size += length
+        if count:
+            sketch.count, sketch.min, sketch.max = count, minimum, maximum
+        return sketch
+
+def serialized_size_bound(k=QUANTILE_SKETCH_K, levels=_MAX_LEVELS):
+    """Bytes que puede ocupar to_bytes de un sketch de parámetro k"""
+    items = int(math.ceil(k / (1 - _DECAY))) + 2 * levels
+    return _HEADER.size + levels * _LEVEL_LENGTH.size + 8 * items
@@ -1,14 +1,25 @@
+import sys
+
 from app.models.difficulty import DifficultyLevel
 
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
 class Question:
-    def __init__(self, description, options, correct_answer, difficulty=DifficultyLevel.EASY):
+    # Sin __dict__ por instancia. Las opciones, la respuesta y la categoría se
+    # internan: "París" o "4" se guardan una sola vez para todo el banco
+    __slots__ = ("description", "options", "correct_answer", "difficulty", "category", "id")
+
+    def __init__(self, description, options, correct_answer, difficulty=DifficultyLevel.EASY, category=None, question_id=None):
         self.description = description
-        self.options = options
-        self.correct_answer = correct_answer
+        self.options = tuple(_intern(option) for option in options)
+        self.correct_answer = _intern(correct_answer)
         self.difficulty = difficulty
+        self.category = _intern(category)
+        self.id = question_id
 
     def is_correct(self, answer):
         return self.correct_answer == answer
         
     def get_points(self):
-        return self.difficulty.get_score_multiplier() 
\ No newline at end of file
+        return self.difficulty.get_score_multiplier()
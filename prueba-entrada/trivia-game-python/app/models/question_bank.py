@@ -0,0 +1,235 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.models.question_index import QuestionIndex
+from app.models.question_snapshot import open_snapshot_bank
+from app.models.search_index import SEARCH_INDEX, SearchIndex
+from app.serialization import question_fragment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTIONS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'questions.json'
+)
+
+FALLBACK_QUESTION = Question(
+    "¿Cuál es la capital de Francia?",
+    ["Madrid", "Londres", "París", "Berlín"],
+    "París",
+    DifficultyLevel.EASY,
+    category="geografía",
+    question_id=1
+)
+
+def parse_questions(raw_questions):
+    """Normaliza los registros del JSON en objetos Question"""
+    questions = []
+    for position, q_data in enumerate(raw_questions, start=1):
+        try:
+            questions.append(Question(
+                description=q_data['description'],
+                options=q_data['options'],
+                correct_answer=q_data['correct_answer'],
+                difficulty=DifficultyLevel.from_string(q_data.get('difficulty', 'easy')),
+                category=q_data.get('category'),
+                question_id=q_data.get('id', position)
+            ))
+        except (KeyError, TypeError, AttributeError):
+            logger.warning(f"Pregunta inválida en la posición {position}, se omite")
+    return questions
+
+def estimate_question_bytes(question):
+    """Tamaño aproximado en memoria de una pregunta y sus textos.
+
+    Es una cota superior: las opciones internadas se comparten entre preguntas.
+    """
+    return (
+        sys.getsizeof(question)
+        + sys.getsizeof(question.description)
+        + sys.getsizeof(question.correct_answer)
+        + sys.getsizeof(question.options)
+        + sum(sys.getsizeof(option) for option in question.options)
+    )
+
+class QuestionBank:
+    """Instantánea inmutable del banco de preguntas.
+
+    Nunca se modifica después de construida: una recarga crea una instancia
+    nueva, así las peticiones en curso conservan la instantánea que tomaron.
+    """
+
+    def __init__(self, questions, mtime=None, source=None, is_fallback=False):
+        self.questions = tuple(questions)
+        self.mtime = mtime
+        self.source = source
+        self.is_fallback = is_fallback
+        self.index = QuestionIndex(self.questions)
+        self._by_id = {question.id: question for question in self.questions}
+        # Las preguntas del banco casi nunca cambian: su JSON se calcula una vez
+        self._fragments = {id(question): question_fragment(question) for question in self.questions}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getitem__(self, index):
+        return self.questions[index]
+
+    def get(self, question_id):
+        return self._by_id.get(question_id)
+
+    def fragment(self, question):
+        fragment = self._fragments.get(id(question))
+        return fragment if fragment is not None else question_fragment(question)
+
+    def sample(self, count, difficulty=None, category=None):
+        return self.index.sample(count, difficulty, category)
+
+    def bucket(self, difficulty=None, category=None):
+        return self.index.bucket(difficulty, category)
+
+    def categories(self):
+        return self.index.categories()
+
+    def extended(self, questions):
+        """Banco nuevo con questions agregadas al final.
+
+        Lo ya calculado para este banco (buckets, ids y fragmentos JSON) se
+        reutiliza y solo se procesan las preguntas nuevas; este banco no cambia.
+        """
+        questions = tuple(questions)
+        bank = copy.copy(self)
+        bank.questions = self.questions + questions
+        bank.index = self.index.extended(questions)
+        bank._by_id = dict(self._by_id)
+        bank._by_id.update((question.id, question) for question in questions)
+        bank._fragments = dict(self._fragments)
+        bank._fragments.update((id(question), question_fragment(question)) for question in questions)
+        return bank
+
+class QuestionBankStore:
+    """Mantiene la instantánea vigente del banco y la recarga si cambia el archivo"""
+
+    def __init__(self, json_file=None, snapshot_file=None, search=SEARCH_INDEX):
+        self.json_file = json_file or os.getenv("QUESTIONS_FILE", DEFAULT_QUESTIONS_FILE)
+        # Snapshot binario compilado con scripts/load_questions.py --snapshot
+        self.snapshot_file = snapshot_file or os.getenv("QUESTIONS_SNAPSHOT") or None
+        self._bank = None
+        self._signature = None
+        self._load_lock = threading.Lock()
+        self.search_enabled = search
+        # (banco, índice de búsqueda) publicados juntos en una sola asignación
+        self._search = None
+        self._search_lock = threading.Lock()
+
+    def current(self):
+        bank = self._bank
+        if bank is None:
+            bank = self.load()
+        return bank
+
+    def load(self):
+        with self._load_lock:
+            self._signature = self._file_signature()
+            bank = self._read_bank()
+            if bank is None:
+                if self._bank is not None:
+                    # Un archivo inválido o a medio escribir no reemplaza al
+                    # banco vigente: se sigue sirviendo hasta la próxima edición
+                    logger.error("Se conserva el banco de preguntas anterior")
+                    return self._bank
+                bank = QuestionBank([FALLBACK_QUESTION], source=self.json_file, is_fallback=True)
+            self._bank = bank
+            return bank
+
+    def search_snapshot(self):
+        """(banco, índice) del último índice de búsqueda construido, o None si todavía no hay"""
+        return self._search
+
+    def build_search_index(self):
+        """Indexa el banco vigente y publica el índice junto con ese banco.
+
+        El índice nuevo se arma sobre una copia del anterior, reindexando solo
+        las preguntas que cambiaron; las búsquedas en curso siguen con el par
+        anterior, que nunca se modifica.
+        """
+        if not self.search_enabled:
+            return None
+        with self._search_lock:
+            bank = self.current()
+            published = self._search
+            if published is not None and published[0] is bank:
+                return published[1]
+            previous = published[1] if published is not None else SearchIndex()
+            index, added, removed = previous.updated(bank)
+            self._search = (bank, index)
+        logger.info(f"Índice de búsqueda actualizado: {added} preguntas indexadas, {removed} retiradas")
+        return index
+
+    def reload_if_changed(self):
+        signature = self._file_signature()
+        if not any(signature):
+            return False
+
+        if self._bank is not None and signature == self._signature:
+            return False
+
+        previous = self._bank
+        return self.load() is not previous
+
+    def _file_signature(self):
+        mtimes = []
+        for path in (self.json_file, self.snapshot_file):
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns if path else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    async def watch(self, interval):
+        # El índice de búsqueda se construye después del arranque, no lo demora
+        await self._refresh_search_index()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.reload_if_changed):
+                    logger.info(f"Banco de preguntas recargado: {len(self._bank)} preguntas")
+                    await self._refresh_search_index()
+            except Exception as e:
+                logger.error(f"Error al recargar el banco de preguntas: {e}")
+
+    async def _refresh_search_index(self):
+        if not self.search_enabled:
+            return
+        try:
+            await asyncio.to_thread(self.build_search_index)
+        except Exception as e:
+            logger.error(f"Error al construir el índice de búsqueda: {e}")
+
+    def _read_bank(self):
+        """Banco leído del snapshot o del JSON, o None si ninguno es válido"""
+        if self.snapshot_file:
+            bank = open_snapshot_bank(self.snapshot_file, self.json_file)
+            if bank is not None:
+                return bank
+
+        try:
+            mtime = os.stat(self.json_file).st_mtime_ns
+            with open(self.json_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            questions = parse_questions(data.get('questions', []))
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            logger.error(f"Error al cargar preguntas desde {self.json_file}: {e}")
+            return None
+
+        if not questions:
+            logger.error("El archivo JSON no contiene preguntas o tiene un formato incorrecto")
+            return None
+
+        return QuestionBank(questions, mtime, self.json_file)
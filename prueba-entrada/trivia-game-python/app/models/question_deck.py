@@ -0,0 +1,134 @@
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+from app.models.question_index import normalize_category
+
+DECK_IDLE_TIMEOUT = float(os.getenv("DECK_IDLE_TIMEOUT", "1800"))
+DECK_MAX_SESSIONS = int(os.getenv("DECK_MAX_SESSIONS", "100000"))
+
+_random = secrets.SystemRandom()
+
+class QuestionDeck:
+    """Permutación aleatoria de los índices 0..size-1 que se revela de a uno.
+
+    Es un Fisher–Yates perezoso: solo se guardan las posiciones que ya se
+    intercambiaron, así un mazo recién creado no ocupa memoria y cada carta
+    cuesta O(1). Al agotarse se vuelve a barajar.
+    """
+
+    __slots__ = ("size", "cursor", "_swaps")
+
+    def __init__(self, size):
+        self.size = size
+        self.cursor = 0
+        self._swaps = {}
+
+    def __len__(self):
+        return self.size - self.cursor
+
+    def draw(self):
+        if self.cursor >= self.size:
+            self.cursor = 0
+            self._swaps.clear()
+
+        cursor = self.cursor
+        pick = _random.randrange(cursor, self.size)
+        swaps = self._swaps
+        value = swaps.get(pick, pick)
+        # La posición del cursor no se vuelve a leer: su valor pasa a pick
+        if pick != cursor:
+            swaps[pick] = swaps.pop(cursor, cursor)
+        else:
+            swaps.pop(cursor, None)
+        self.cursor = cursor + 1
+        return value
+
+class _SessionDecks:
+    __slots__ = ("decks", "last_used")
+
+    def __init__(self, now):
+        self.decks = {}
+        self.last_used = now
+
+class DeckStore:
+    """Mazos sin repetición por sesión, uno por combinación de filtros.
+
+    Las sesiones se mantienen en orden de último uso; las que superan
+    idle_timeout sin pedir preguntas, o las más antiguas si se supera
+    max_sessions, se descartan en cada acceso.
+    """
+
+    def __init__(self, idle_timeout=DECK_IDLE_TIMEOUT, max_sessions=DECK_MAX_SESSIONS, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def draw(self, session_id, bucket, count, key=None):
+        """Entrega hasta count preguntas distintas de bucket que la sesión no haya visto en esta vuelta.
+
+        Al agotarse el mazo se baraja otra vez y se completa el pedido con la
+        vuelta siguiente. bucket es la secuencia de preguntas que corresponde
+        a los filtros; si cambia (por ejemplo al recargar el banco) el mazo
+        empieza de nuevo.
+        """
+        now = self._clock()
+        self._evict_idle(now)
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _SessionDecks(now)
+            self._evict_overflow()
+        else:
+            session.last_used = now
+            self._sessions.move_to_end(session_id)
+
+        entry = session.decks.get(key)
+        if entry is None or entry[0] is not bucket:
+            entry = session.decks[key] = (bucket, QuestionDeck(len(bucket)))
+        deck = entry[1]
+
+        wanted = max(0, min(count, len(bucket)))
+        drawn = []
+        seen = set()
+        while len(drawn) < wanted:
+            index = deck.draw()
+            # Solo puede repetirse si el mazo se volvió a barajar en medio del pedido
+            if index not in seen:
+                seen.add(index)
+                drawn.append(index)
+        return [bucket[index] for index in drawn]
+
+    def discard(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now):
+        sessions = self._sessions
+        while sessions:
+            session_id, session = next(iter(sessions.items()))
+            if now - session.last_used <= self.idle_timeout:
+                break
+            sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_overflow(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout": self.idle_timeout,
+            "evictions": self.evictions
+        }
+
+def deck_key(difficulty, category):
+    return (difficulty, normalize_category(category))
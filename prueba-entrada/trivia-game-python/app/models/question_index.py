@@ -0,0 +1,106 @@
+import secrets
+
+from app.models.difficulty import DifficultyLevel
+
+_random = secrets.SystemRandom()
+
+def normalize_category(category):
+    return category.strip().lower() if category else None
+
+def _bucket_keys(question):
+    difficulty = question.difficulty
+    category = normalize_category(question.category)
+    if category is None:
+        # Sin categoría las claves parciales coinciden con las completas:
+        # repetirlas metería la pregunta dos veces en el mismo bucket
+        return ((None, None), (difficulty, None))
+    return ((None, None), (difficulty, None), (None, category), (difficulty, category))
+
+class QuestionIndex:
+    """Índice de muestreo por (dificultad, categoría).
+
+    Cada combinación, incluidas las parciales con None como comodín, apunta a
+    una tupla precalculada de preguntas, de modo que muestrear k preguntas
+    cuesta O(k) y siempre se extrae del grupo correcto.
+    """
+
+    def __init__(self, questions):
+        buckets = {}
+        for question in questions:
+            for key in _bucket_keys(question):
+                buckets.setdefault(key, []).append(question)
+
+        self._buckets = {key: tuple(bucket) for key, bucket in buckets.items()}
+
+    def extended(self, questions):
+        """Índice nuevo con questions agregadas; solo se recalculan sus buckets"""
+        added = QuestionIndex(questions)
+        index = QuestionIndex(())
+        index._buckets = dict(self._buckets)
+        for key, bucket in added._buckets.items():
+            index._buckets[key] = index._buckets.get(key, ()) + bucket
+        return index
+
+    def bucket(self, difficulty=None, category=None):
+        if difficulty is not None and not isinstance(difficulty, DifficultyLevel):
+            difficulty = DifficultyLevel(difficulty)
+        return self._buckets.get((difficulty, normalize_category(category)), ())
+
+    def count(self, difficulty=None, category=None):
+        return len(self.bucket(difficulty, category))
+
+    def categories(self):
+        return sorted(category for difficulty, category in self._buckets
+                      if difficulty is None and category is not None)
+
+    def sample(self, count, difficulty=None, category=None):
+        bucket = self.bucket(difficulty, category)
+        return _random.sample(bucket, max(0, min(count, len(bucket))))
+
+def _question_key(question):
+    # Los bancos que decodifican bajo demanda devuelven objetos nuevos cada vez
+    return question.id if question.id is not None else id(question)
+
+def compose_quiz(bank, composition, category=None, distinct_categories=False, sampler=None):
+    """Arma un quiz con composition = {dificultad: cantidad} en una sola pasada.
+
+    Con distinct_categories las preguntas de cada dificultad se reparten por
+    turnos entre categorías distintas, empezando por las que todavía no
+    aparecieron en el quiz; si no alcanzan, se completa con cualquier
+    categoría. sampler(count, difficulty, category) permite cambiar cómo se
+    extrae de cada bucket (por ejemplo, desde el mazo de una sesión).
+    """
+    sampler = sampler or bank.sample
+    selected = []
+    used_categories = set()
+
+    for difficulty, count in composition.items():
+        if count <= 0:
+            continue
+        if not distinct_categories or category is not None:
+            selected.extend(sampler(count, difficulty, category))
+            continue
+
+        categories = [name for name in bank.categories() if len(bank.bucket(difficulty, name)) > 0]
+        if not categories:
+            continue
+        _random.shuffle(categories)
+        categories.sort(key=lambda name: name in used_categories)
+
+        rounds = -(-count // len(categories))
+        picks = {name: sampler(rounds, difficulty, name) for name in categories[:count]}
+        chosen = []
+        for round_number in range(rounds):
+            for name, questions in picks.items():
+                if round_number < len(questions) and len(chosen) < count:
+                    chosen.append(questions[round_number])
+                    used_categories.add(name)
+
+        if len(chosen) < count:
+            chosen_keys = {_question_key(question) for question in chosen}
+            extra = sampler(count, difficulty, None)
+            chosen.extend(q for q in extra if _question_key(q) not in chosen_keys)
+            chosen = chosen[:count]
+        selected.extend(chosen)
+
+    return selected
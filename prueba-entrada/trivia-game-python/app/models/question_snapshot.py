@@ -0,0 +1,314 @@
+import logging
+import mmap
+import os
+import secrets
+import struct
+import tempfile
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.models.question_index import normalize_category
+from app.serialization import question_fragment
+
+logger = logging.getLogger(__name__)
+
+_random = secrets.SystemRandom()
+
+SNAPSHOT_MAGIC = b"TRIVSNAP"
+SNAPSHOT_VERSION = 1
+
+# magic, versión, preguntas, cadenas, buckets, mtime del JSON de origen y el
+# desplazamiento de cada sección
+_HEADER = struct.Struct("<8sIIIIq7Q")
+# id, dificultad, descripción, respuesta, categoría (-1 = sin categoría),
+# cantidad de opciones y primera opción (índices a la tabla de cadenas)
+_RECORD = struct.Struct("<qBIIiHI")
+_ID_ENTRY = struct.Struct("<qI")
+# dificultad (ANY = comodín), categoría normalizada (-1 = comodín), inicio y largo
+_BUCKET = struct.Struct("<BiII")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+_ANY = 0xFF
+_DIFFICULTY_CODES = {DifficultyLevel.EASY: 0, DifficultyLevel.MEDIUM: 1, DifficultyLevel.HARD: 2}
+_DIFFICULTIES = {code: difficulty for difficulty, code in _DIFFICULTY_CODES.items()}
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def add(self, value):
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+def write_snapshot(path, questions, source_mtime=0):
+    """Compila las preguntas en un único archivo binario que se puede mapear en memoria.
+
+    El archivo se escribe aparte y se renombra al final: los procesos que ya
+    tienen mapeada la versión anterior la siguen leyendo sin cambios.
+    """
+    questions = list(questions)
+    strings = _StringTable()
+    records = []
+    option_refs = []
+    fragments = []
+    buckets = {}
+
+    for position, question in enumerate(questions):
+        if not isinstance(question.id, int):
+            raise ValueError(f"La pregunta en la posición {position} no tiene un id entero: {question.id!r}")
+        category = question.category
+        records.append(_RECORD.pack(
+            question.id,
+            _DIFFICULTY_CODES[question.difficulty],
+            strings.add(question.description),
+            strings.add(question.correct_answer),
+            strings.add(category) if category is not None else -1,
+            len(question.options),
+            len(option_refs)
+        ))
+        option_refs.extend(strings.add(option) for option in question.options)
+        fragments.append(question_fragment(question))
+
+        difficulty = _DIFFICULTY_CODES[question.difficulty]
+        normalized = normalize_category(category)
+        category_ref = strings.add(normalized) if normalized is not None else None
+        for key in ((_ANY, -1), (difficulty, -1), (_ANY, category_ref), (difficulty, category_ref)):
+            if key[1] is not None:
+                buckets.setdefault(key, []).append(position)
+
+    ids = sorted((question.id, position) for position, question in enumerate(questions))
+    encoded = [value.encode("utf-8") for value in strings.values]
+
+    sections = []
+    sections.append(b"".join(records))
+    sections.append(b"".join(_U32.pack(ref) for ref in option_refs))
+    sections.append(b"".join(_ID_ENTRY.pack(question_id, position) for question_id, position in ids))
+    sections.append(_offsets_table(encoded) + b"".join(encoded))
+    sections.append(_offsets_table(fragments) + b"".join(fragments))
+    bucket_directory = []
+    positions = []
+    for (difficulty, category_ref), members in sorted(buckets.items()):
+        bucket_directory.append(_BUCKET.pack(difficulty, category_ref, len(positions), len(members)))
+        positions.extend(members)
+    sections.append(b"".join(bucket_directory))
+    sections.append(b"".join(_U32.pack(position) for position in positions))
+
+    offsets = []
+    offset = _HEADER.size
+    for section in sections:
+        offsets.append(offset)
+        offset += len(section)
+
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(records), len(encoded), len(bucket_directory),
+        source_mtime, *offsets
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(header)
+            for section in sections:
+                file.write(section)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return offset
+
+def _offsets_table(blobs):
+    table = [0]
+    for blob in blobs:
+        table.append(table[-1] + len(blob))
+    return b"".join(_U64.pack(offset) for offset in table)
+
+class QuestionSnapshot:
+    """Vista de solo lectura sobre un snapshot mapeado en memoria.
+
+    Las páginas del archivo las comparte el sistema operativo entre todos los
+    procesos que lo abren; cada pregunta se decodifica solo cuando se pide.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (magic, version, self.count, self.string_count, self.bucket_count, self.source_mtime,
+             self._records, self._options, self._ids, self._strings, self._fragments,
+             self._buckets, self._positions) = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise ValueError(f"{path} no es un snapshot de preguntas válido")
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"{path} no es un snapshot de preguntas válido (versión {SNAPSHOT_VERSION})")
+
+        self._string_data = self._strings + _U64.size * (self.string_count + 1)
+        self._fragment_data = self._fragments + _U64.size * (self.count + 1)
+
+        # Solo el directorio de buckets vive en el heap del proceso: unas pocas entradas
+        self._bucket_ranges = {}
+        self._category_refs = {}
+        for i in range(self.bucket_count):
+            difficulty, category_ref, start, length = _BUCKET.unpack_from(self._map, self._buckets + i * _BUCKET.size)
+            self._bucket_ranges[(difficulty, category_ref)] = (start, length)
+            if difficulty == _ANY and category_ref >= 0:
+                self._category_refs[self.string(category_ref)] = category_ref
+
+    def __len__(self):
+        return self.count
+
+    def string(self, ref):
+        start, end = struct.unpack_from("<2Q", self._map, self._strings + ref * _U64.size)
+        return self._map[self._string_data + start:self._string_data + end].decode("utf-8")
+
+    def question(self, position):
+        question_id, difficulty, description, correct_answer, category, option_count, first_option = \
+            _RECORD.unpack_from(self._map, self._records + position * _RECORD.size)
+        option_refs = struct.unpack_from(f"<{option_count}I", self._map, self._options + first_option * _U32.size)
+        return Question(
+            self.string(description),
+            [self.string(ref) for ref in option_refs],
+            self.string(correct_answer),
+            _DIFFICULTIES[difficulty],
+            category=self.string(category) if category >= 0 else None,
+            question_id=question_id
+        )
+
+    def fragment(self, position):
+        start, end = struct.unpack_from("<2Q", self._map, self._fragments + position * _U64.size)
+        return self._map[self._fragment_data + start:self._fragment_data + end]
+
+    def position(self, question_id):
+        """Busca el id por bisección sobre la tabla ordenada del archivo"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if _ID_ENTRY.unpack_from(self._map, self._ids + middle * _ID_ENTRY.size)[0] < question_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            found_id, position = _ID_ENTRY.unpack_from(self._map, self._ids + low * _ID_ENTRY.size)
+            if found_id == question_id:
+                return position
+        return None
+
+    def bucket_range(self, difficulty=None, category=None):
+        difficulty_code = _ANY if difficulty is None else _DIFFICULTY_CODES[DifficultyLevel(difficulty)]
+        category_ref = -1
+        normalized = normalize_category(category)
+        if normalized is not None:
+            category_ref = self._category_refs.get(normalized)
+            if category_ref is None:
+                return 0, 0
+        return self._bucket_ranges.get((difficulty_code, category_ref), (0, 0))
+
+    def categories(self):
+        return list(self._category_refs)
+
+    def position_at(self, index):
+        return _U32.unpack_from(self._map, self._positions + index * _U32.size)[0]
+
+    def sample_positions(self, count, difficulty=None, category=None):
+        start, length = self.bucket_range(difficulty, category)
+        picks = _random.sample(range(length), max(0, min(count, length)))
+        return [self.position_at(start + pick) for pick in picks]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+class _SnapshotBucket:
+    """Secuencia de las preguntas de un bucket, decodificadas al indexar"""
+
+    def __init__(self, snapshot, start, length):
+        self.snapshot = snapshot
+        self.start = start
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self.snapshot.question(self.snapshot.position_at(self.start + index))
+
+class SnapshotQuestionBank:
+    """Banco de preguntas respaldado por un snapshot, con la interfaz de QuestionBank"""
+
+    is_fallback = False
+
+    def __init__(self, snapshot, mtime=None, source=None):
+        self.snapshot = snapshot
+        self.mtime = mtime
+        self.source = source or snapshot.path
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.snapshot)
+        if not 0 <= index < len(self.snapshot):
+            raise IndexError(index)
+        return self.snapshot.question(index)
+
+    def get(self, question_id):
+        if not isinstance(question_id, int):
+            return None
+        position = self.snapshot.position(question_id)
+        return self.snapshot.question(position) if position is not None else None
+
+    def fragment(self, question):
+        position = self.snapshot.position(question.id) if isinstance(question.id, int) else None
+        if position is None:
+            return question_fragment(question)
+        return self.snapshot.fragment(position)
+
+    def sample(self, count, difficulty=None, category=None):
+        return [self.snapshot.question(position)
+                for position in self.snapshot.sample_positions(count, difficulty, category)]
+
+    def categories(self):
+        return sorted(self.snapshot.categories())
+
+    def bucket(self, difficulty=None, category=None):
+        # Siempre el mismo objeto por rango, así los mazos por sesión lo reconocen
+        bucket_range = self.snapshot.bucket_range(difficulty, category)
+        bucket = self._buckets.get(bucket_range)
+        if bucket is None:
+            bucket = self._buckets[bucket_range] = _SnapshotBucket(self.snapshot, *bucket_range)
+        return bucket
+
+def open_snapshot_bank(path, json_file=None):
+    """Abre el snapshot si existe y está al día con json_file; si no, devuelve None"""
+    try:
+        snapshot = QuestionSnapshot(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No se pudo abrir el snapshot de preguntas {path}: {e}")
+        return None
+
+    json_mtime = None
+    if json_file is not None:
+        try:
+            json_mtime = os.stat(json_file).st_mtime_ns
+        except OSError:
+            pass
+    if json_mtime is not None and json_mtime != snapshot.source_mtime:
+        logger.warning(f"El snapshot {path} no corresponde a la versión actual de {json_file}; se ignora")
+        snapshot.close()
+        return None
+
+    return SnapshotQuestionBank(snapshot, json_mtime, path)
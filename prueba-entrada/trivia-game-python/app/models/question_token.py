@@ -0,0 +1,108 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+GRADED_TOKENS_CAPACITY = int(os.getenv("GRADED_TOKENS_CAPACITY", "100000"))
+
+TOKEN_SOURCES = {"local": "l", "db": "d"}
+_SOURCE_NAMES = {code: name for name, code in TOKEN_SOURCES.items()}
+_TEXT_ID_PREFIX = "~"
+
+def _encode_id(question_id):
+    # Los ids enteros van tal cual; los de texto en base64 url, que no usa "."
+    if isinstance(question_id, int):
+        return str(question_id)
+    encoded = base64.urlsafe_b64encode(str(question_id).encode("utf-8")).rstrip(b"=")
+    return _TEXT_ID_PREFIX + encoded.decode("ascii")
+
+def _decode_id(field):
+    if not field.startswith(_TEXT_ID_PREFIX):
+        return int(field)
+    encoded = field[len(_TEXT_ID_PREFIX):]
+    return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+
+class QuestionTokenSigner:
+    """Emite y verifica ids de pregunta firmados con HMAC-SHA256.
+
+    El token lleva el origen de la pregunta (banco local o base de datos), su
+    id en ese origen (entero o texto) y la hora de emisión, de modo que cualquier worker con el
+    mismo SECRET_KEY puede calificar la respuesta sin memoria compartida.
+    """
+
+    SIGNATURE_BYTES = 16
+
+    def __init__(self, secret_key, max_age=None, clock=time.time):
+        self._key = secret_key.encode("utf-8")
+        self.max_age = max_age
+        self._clock = clock
+
+    def issue(self, question_id, source="local"):
+        payload = f"{TOKEN_SOURCES[source]}.{_encode_id(question_id)}.{int(self._clock())}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token):
+        """Devuelve (origen, id, emitido) o None si el token no es válido"""
+        try:
+            payload, signature = token.rsplit(".", 1)
+            source_code, question_id, issued_at = payload.split(".")
+            source = _SOURCE_NAMES[source_code]
+            question_id = _decode_id(question_id)
+            issued_at = int(issued_at)
+        except (AttributeError, ValueError, KeyError):
+            return None
+
+        # compare_digest solo acepta str ASCII: se comparan los bytes
+        if not hmac.compare_digest(signature.encode("utf-8"), self._sign(payload).encode("ascii")):
+            return None
+
+        if self.max_age is not None and self._clock() - issued_at > self.max_age:
+            return None
+
+        return source, question_id, issued_at
+
+    def _sign(self, payload):
+        digest = hmac.new(self._key, payload.encode("utf-8"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:self.SIGNATURE_BYTES]).rstrip(b"=").decode("ascii")
+
+class GradedTokens:
+    """Tokens ya calificados, para que cada entrega cuente una sola vez.
+
+    Emitir un token no ocupa memoria; solo se recuerdan los que se
+    respondieron y hasta que vencen (max_age), porque después verify ya los
+    rechaza. Si se llega a capacity se olvidan los más antiguos.
+    """
+
+    def __init__(self, max_age=None, capacity=GRADED_TOKENS_CAPACITY, clock=time.time):
+        self.max_age = max_age
+        self.capacity = capacity
+        self._clock = clock
+        # token -> hora hasta la que se recuerda, en orden de calificación
+        self._expires = {}
+
+    def __len__(self):
+        return len(self._expires)
+
+    def mark(self, token):
+        """True la primera vez que se califica token; False si se repite"""
+        now = self._clock()
+        self._purge(now)
+        if token in self._expires:
+            return False
+        if len(self._expires) >= self.capacity:
+            del self._expires[next(iter(self._expires))]
+        self._expires[token] = now + self.max_age if self.max_age is not None else float("inf")
+        return True
+
+    def _purge(self, now):
+        # Todos se guardan con la misma vigencia: los vencidos están al principio
+        expires = self._expires
+        while expires:
+            token = next(iter(expires))
+            if expires[token] > now:
+                break
+            del expires[token]
+
+    def clear(self):
+        self._expires.clear()
@@ -0,0 +1,276 @@
+import os
+import re
+import unicodedata
+from array import array
+
+# Tabla para bytes.translate: 1 en los bytes no nulos, que después se ubican con find
+_NONZERO_FLAGS = bytes([0]) + bytes([1]) * 255
+_MASK_CHUNK = 4096
+_ZERO_CHUNK = bytes(_MASK_CHUNK)
+_WINDOW_MASK = (1 << (_MASK_CHUNK * 8)) - 1
+_FILTER_BATCH = 256
+
+# Con QUESTIONS_SNAPSHOT queda desactivado salvo que se pida: cada worker
+# tendría en su heap un índice de todo el banco que el snapshot comparte
+SEARCH_INDEX = os.getenv(
+    "SEARCH_INDEX", "false" if os.getenv("QUESTIONS_SNAPSHOT") else "true"
+).lower() in ("1", "true", "yes")
+
+_TOKEN = re.compile(r"\w+")
+
+# Palabras que aparecen en casi todas las preguntas: no ayudan a filtrar y
+# sus listas serían tan largas como el banco
+STOPWORDS = frozenset("""
+    a al como con cual cuales cuando de del donde el en es esta este fue ha la las lo los mas
+    por que quien se su sus un una y o the of is in what which who
+""".split())
+
+def fold(text):
+    """Minúsculas y sin acentos: 'Canción' y 'cancion' se indexan igual"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(fold(text)) if token not in STOPWORDS]
+
+def _content_key(question):
+    return hash((question.description, tuple(question.options)))
+
+class SearchIndex:
+    """Índice invertido sobre la descripción y las opciones de cada pregunta.
+
+    Cada término apunta a un array ordenado de números de documento. Los
+    documentos nuevos o modificados reciben un número nuevo al final, así
+    las listas se mantienen ordenadas solo con append; los eliminados quedan
+    marcados y se limpian al reconstruir cuando superan compact_ratio.
+
+    Los términos presentes en más de 1/bitmap_ratio de los documentos
+    tienen además un mapa de bits, guardado también como entero: intersectarlos
+    es un AND de enteros en C en lugar de recorrer listas largas que casi no
+    se solapan. Los términos se prueban del más raro al más frecuente.
+
+    Una vez publicado, un índice no se modifica: las recargas usan updated,
+    que devuelve una copia actualizada.
+    """
+
+    def __init__(self, compact_ratio=0.25, bitmap_ratio=256):
+        self.compact_ratio = compact_ratio
+        self.bitmap_ratio = bitmap_ratio
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}
+        self._bitmaps = {}
+        # Los mapas de bits convertidos a int para el AND; convertir uno de
+        # 1M de documentos al consultar cuesta veinte veces más que el AND
+        self._bitmap_ints = {}
+        self._doc_ids = array('q')
+        self._doc_keys = array('q')
+        self._deleted = bytearray()
+        self._by_question_id = {}
+        self.deleted_count = 0
+
+    def __len__(self):
+        return len(self._by_question_id)
+
+    def update(self, questions):
+        """Sincroniza el índice con questions; solo reindexa lo que cambió.
+
+        Devuelve (agregadas, eliminadas). Una pregunta modificada cuenta
+        en ambas.
+        """
+        current = {}
+        for question in questions:
+            if question.id is not None:
+                current[question.id] = question
+
+        added = removed = 0
+        for question_id, doc in list(self._by_question_id.items()):
+            question = current.get(question_id)
+            if question is None or _content_key(question) != self._doc_keys[doc]:
+                self._delete(question_id, doc)
+                removed += 1
+
+        for question_id, question in current.items():
+            if question_id not in self._by_question_id:
+                self._add(question)
+                added += 1
+
+        if self.deleted_count > self.compact_ratio * max(1, len(self._doc_ids)):
+            self._rebuild(current.values())
+        self._promote_frequent_terms()
+        self._bitmap_ints = {term: int.from_bytes(bitmap, "little") for term, bitmap in self._bitmaps.items()}
+        return added, removed
+
+    def updated(self, questions):
+        """Como update, pero sobre una copia: este índice no se modifica.
+
+        Devuelve (índice, agregadas, eliminadas). Las búsquedas que están
+        usando este índice en otro hilo no ven el cambio a medias.
+        """
+        index = self.copy()
+        added, removed = index.update(questions)
+        return (index if added or removed else self), added, removed
+
+    def copy(self):
+        # Copiar arrays y bytearrays es un memcpy: mucho más barato que volver a tokenizar
+        clone = SearchIndex(self.compact_ratio, self.bitmap_ratio)
+        clone._postings = {term: posting[:] for term, posting in self._postings.items()}
+        clone._bitmaps = {term: bitmap[:] for term, bitmap in self._bitmaps.items()}
+        # Los enteros no cambian nunca: se comparten
+        clone._bitmap_ints = dict(self._bitmap_ints)
+        clone._doc_ids = self._doc_ids[:]
+        clone._doc_keys = self._doc_keys[:]
+        clone._deleted = self._deleted[:]
+        clone._by_question_id = dict(self._by_question_id)
+        clone.deleted_count = self.deleted_count
+        return clone
+
+    def _promote_frequent_terms(self):
+        threshold = max(1, len(self._doc_ids) // self.bitmap_ratio)
+        size = (len(self._doc_ids) >> 3) + 1
+        for term, posting in self._postings.items():
+            bitmap = self._bitmaps.get(term)
+            if bitmap is None and len(posting) >= threshold:
+                bitmap = self._bitmaps[term] = bytearray(size)
+                for doc in posting:
+                    bitmap[doc >> 3] |= 1 << (doc & 7)
+            elif bitmap is not None and len(bitmap) < size:
+                bitmap.extend(bytes(size - len(bitmap)))
+
+    def _add(self, question):
+        doc = len(self._doc_ids)
+        self._doc_ids.append(question.id)
+        self._doc_keys.append(_content_key(question))
+        self._deleted.append(0)
+        self._by_question_id[question.id] = doc
+
+        terms = set(tokenize(question.description))
+        for option in question.options:
+            terms.update(tokenize(str(option)))
+        postings = self._postings
+        bitmaps = self._bitmaps
+        for term in terms:
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = array('I')
+            posting.append(doc)
+            bitmap = bitmaps.get(term)
+            if bitmap is not None:
+                if doc >> 3 >= len(bitmap):
+                    bitmap.extend(bytes((doc >> 3) + 1 - len(bitmap)))
+                bitmap[doc >> 3] |= 1 << (doc & 7)
+
+    def _delete(self, question_id, doc):
+        del self._by_question_id[question_id]
+        self._deleted[doc] = 1
+        self.deleted_count += 1
+
+    def _rebuild(self, questions):
+        self._reset()
+        for question in questions:
+            self._add(question)
+
+    def search(self, query, limit=20):
+        """Ids de las preguntas que contienen todos los términos de query"""
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+
+        postings = []
+        bitmap_terms = []
+        for term in terms:
+            posting = self._postings.get(term)
+            if not posting:
+                return []
+            if term in self._bitmaps:
+                bitmap_terms.append(term)
+            else:
+                postings.append(posting)
+        # Los términos más raros primero: cada prueba descarta más candidatos
+        bitmap_terms.sort(key=lambda term: len(self._postings[term]))
+
+        if postings:
+            # Las listas cortas se intersectan primero y los candidatos se
+            # comprueban en cada mapa de bits por byte, sin convertirlos
+            if len(postings) == 1:
+                candidates = postings[0]
+            else:
+                # Las listas sin mapa de bits tienen como mucho 1/bitmap_ratio
+                # de los documentos: intersectarlas con conjuntos en C es más
+                # rápido que recorrerlas en Python
+                shortest, *rest = sorted(postings, key=len)
+                candidates = sorted(set(shortest).intersection(*rest))
+            return self._filter(candidates, [self._bitmaps[term] for term in bitmap_terms], limit)
+
+        if len(bitmap_terms) == 1:
+            return self._scan_mask(self._bitmaps[bitmap_terms[0]], limit)
+        combined = self._bitmap_ints[bitmap_terms[0]]
+        for term in bitmap_terms[1:]:
+            combined &= self._bitmap_ints[term]
+            if not combined:
+                return []
+        return self._scan_int(combined, limit)
+
+    def _filter(self, candidates, bitmaps, limit):
+        deleted = self._deleted
+        doc_ids = self._doc_ids
+        results = []
+        # Por tandas con comprensiones, más rápidas que un bucle con append,
+        # sin dejar de cortar en cuanto se llega a limit. Todos los mapas de
+        # bits cubren todos los documentos (_promote_frequent_terms)
+        for start in range(0, len(candidates), _FILTER_BATCH):
+            batch = candidates[start:start + _FILTER_BATCH]
+            for bitmap in bitmaps:
+                batch = [doc for doc in batch if bitmap[doc >> 3] >> (doc & 7) & 1]
+            results.extend(doc_ids[doc] for doc in batch if not deleted[doc])
+            if len(results) >= limit:
+                return results[:limit]
+        return results
+
+    def _scan_int(self, combined, limit):
+        # Pasar el entero completo a bytes cuesta tanto como diez AND: con
+        # resultados densos alcanza con la primera ventana, que sale barata
+        results = self._scan_mask((combined & _WINDOW_MASK).to_bytes(_MASK_CHUNK, "little"), limit)
+        if len(results) >= limit:
+            return results
+        rest = combined >> (_MASK_CHUNK * 8)
+        if rest:
+            mask = rest.to_bytes((rest.bit_length() + 7) >> 3, "little")
+            results += self._scan_mask(mask, limit - len(results), _MASK_CHUNK)
+        return results
+
+    def _scan_mask(self, mask, limit, base=0):
+        """Documentos con bit en mask; el byte 0 de mask corresponde al byte base del índice"""
+        deleted = self._deleted
+        doc_ids = self._doc_ids
+        results = []
+        for offset in range(0, len(mask), _MASK_CHUNK):
+            chunk = mask[offset:offset + _MASK_CHUNK]
+            # Comparar con un bloque de ceros es un memcmp: las zonas vacías
+            # se saltan sin recorrerlas byte a byte
+            if chunk == _ZERO_CHUNK[:len(chunk)]:
+                continue
+            flags = chunk.translate(_NONZERO_FLAGS)
+            byte_index = flags.find(1)
+            while byte_index != -1:
+                bits = chunk[byte_index]
+                first_doc = (base + offset + byte_index) << 3
+                for bit in range(8):
+                    if bits >> bit & 1:
+                        doc = first_doc | bit
+                        if not deleted[doc]:
+                            results.append(doc_ids[doc])
+                            if len(results) >= limit:
+                                return results
+                byte_index = flags.find(1, byte_index + 1)
+        return results
+
+    def stats(self):
+        return {
+            "documents": len(self),
+            "terms": len(self._postings),
+            "postings": sum(len(posting) for posting in self._postings.values()),
+            "deleted": self.deleted_count,
+            "bitmaps": len(self._bitmaps)
+        }
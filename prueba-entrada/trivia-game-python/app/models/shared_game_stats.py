@@ -0,0 +1,208 @@
+import mmap
+import os
+import struct
+
+from app.models.difficulty import DifficultyLevel
+from app.models.game_stats import DISTRIBUTIONS
+from app.models.quantile_sketch import KLLSketch, serialized_size_bound
+
+_HEADER = struct.Struct("<8sqq")
+_MAGIC = b"TRIVSTAT"
+_SLOT = struct.Struct("<11q")
+# Cada worker escribe en su propia línea de caché para no invalidar la de otros
+SLOT_SIZE = 128
+# Después de las ranuras, cada worker publica sus sketches en su propia región:
+# secuencia, época y largo de cada sketch serializado
+_SKETCH_HEADER = struct.Struct("<qq" + "I" * len(DISTRIBUTIONS))
+SKETCH_REGION_SIZE = _SKETCH_HEADER.size + len(DISTRIBUTIONS) * serialized_size_bound()
+SKETCH_REGION_SIZE += -SKETCH_REGION_SIZE % mmap.PAGESIZE
+
+_DIFFICULTY_OFFSETS = {
+    DifficultyLevel.EASY: 5,
+    DifficultyLevel.MEDIUM: 7,
+    DifficultyLevel.HARD: 9
+}
+
+class SharedGameStats:
+    """GameStats compartido entre procesos mediante un archivo mapeado en memoria.
+
+    El archivo tiene una ranura por worker. Cada proceso reclama una ranura
+    con un bloqueo fcntl que se libera solo si el proceso muere, y es el único
+    que escribe en ella, así update_stats no toma ningún lock. get_summary
+    suma todas las ranuras. Reiniciar incrementa una época global; cada
+    worker pone a cero su ranura la próxima vez que la ve desactualizada.
+
+    Distribución de la ranura: época, total_rounds, correct_answers,
+    incorrect_answers, total_score y (correct, total) por dificultad.
+
+    Los sketches de cuantiles no caben en una ranura: cada worker guarda los
+    suyos en memoria y, tras cada actualización, publica una copia
+    serializada en su región. Las escrituras van entre dos incrementos de un
+    contador de secuencia; el lector reintenta si lo ve impar o cambiado, y
+    get_summary combina los sketches de todos los workers.
+    """
+
+    def __init__(self, path, slots=64):
+        import fcntl
+
+        self.path = path
+        self.slots = slots
+        size = _HEADER.size + SLOT_SIZE * slots
+        size += -size % mmap.PAGESIZE
+        self._sketch_base = size
+        size += SKETCH_REGION_SIZE * slots
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        if self._map[:len(_MAGIC)] != _MAGIC:
+            _HEADER.pack_into(self._map, 0, _MAGIC, 0, slots)
+
+        self.slot = None
+        for slot in range(slots):
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, SLOT_SIZE, self._slot_offset(slot))
+            except OSError:
+                continue
+            self.slot = slot
+            break
+
+        if self.slot is None:
+            self.close()
+            raise RuntimeError(f"No hay ranuras libres en {path} ({slots} workers como máximo)")
+
+        self._offset = self._slot_offset(self.slot)
+        self._sketch_epoch = None
+        self.distributions = {name: KLLSketch() for name in DISTRIBUTIONS}
+
+    def _slot_offset(self, slot):
+        return _HEADER.size + SLOT_SIZE * slot
+
+    def _epoch(self):
+        return _HEADER.unpack_from(self._map, 0)[1]
+
+    def _sketch_offset(self, slot):
+        return self._sketch_base + SKETCH_REGION_SIZE * slot
+
+    def _local_distributions(self):
+        epoch = self._epoch()
+        if self._sketch_epoch != epoch:
+            # Como los contadores, se continúa lo que dejó en la ranura un
+            # worker anterior de la misma época
+            published = self._read_distributions(self.slot, epoch)
+            if published is None:
+                published = [KLLSketch() for _ in DISTRIBUTIONS]
+            self.distributions = dict(zip(DISTRIBUTIONS, published))
+            self._sketch_epoch = epoch
+        return self.distributions
+
+    def _publish_distributions(self):
+        offset = self._sketch_offset(self.slot)
+        data = [self.distributions[name].to_bytes() for name in DISTRIBUTIONS]
+        sequence = struct.unpack_from("<q", self._map, offset)[0]
+        # Secuencia impar: escritura en curso
+        _SKETCH_HEADER.pack_into(self._map, offset, sequence + 1, self._sketch_epoch, *(len(part) for part in data))
+        position = offset + _SKETCH_HEADER.size
+        for part in data:
+            self._map[position:position + len(part)] = part
+            position += len(part)
+        struct.pack_into("<q", self._map, offset, sequence + 2)
+
+    def _read_distributions(self, slot, epoch):
+        offset = self._sketch_offset(slot)
+        for _ in range(3):
+            header = _SKETCH_HEADER.unpack_from(self._map, offset)
+            sequence, slot_epoch, lengths = header[0], header[1], header[2:]
+            if sequence % 2:
+                continue
+            if sequence == 0 or slot_epoch != epoch:
+                return None
+            position = offset + _SKETCH_HEADER.size
+            parts = []
+            for length in lengths:
+                parts.append(self._map[position:position + length])
+                position += length
+            if struct.unpack_from("<q", self._map, offset)[0] != sequence:
+                continue
+            try:
+                return [KLLSketch.from_bytes(part) for part in parts]
+            except (ValueError, struct.error):
+                return None
+        return None
+
+    def record_game(self, score, accuracy):
+        distributions = self._local_distributions()
+        distributions['game_score'].update(score)
+        distributions['game_accuracy'].update(accuracy)
+        self._publish_distributions()
+
+    def record_answer_times(self, seconds):
+        sketch = self._local_distributions()['answer_seconds']
+        for value in seconds:
+            sketch.update(value)
+        self._publish_distributions()
+
+    def update_stats(self, question, is_correct):
+        self.update_many([(question, is_correct)])
+
+    def update_many(self, graded):
+        epoch = self._epoch()
+        counters = list(_SLOT.unpack_from(self._map, self._offset))
+        if counters[0] != epoch:
+            counters = [epoch] + [0] * (_SLOT.size // 8 - 1)
+
+        for question, is_correct in graded:
+            difficulty_offset = _DIFFICULTY_OFFSETS[question.difficulty]
+            counters[1] += 1
+            if is_correct:
+                counters[2] += 1
+                counters[4] += question.get_points()
+                counters[difficulty_offset] += 1
+            else:
+                counters[3] += 1
+            counters[difficulty_offset + 1] += 1
+
+        _SLOT.pack_into(self._map, self._offset, *counters)
+
+    def reset(self):
+        _HEADER.pack_into(self._map, 0, _MAGIC, self._epoch() + 1, self.slots)
+
+    def get_summary(self):
+        epoch = self._epoch()
+        totals = [0] * (_SLOT.size // 8)
+        for slot in range(self.slots):
+            counters = _SLOT.unpack_from(self._map, self._slot_offset(slot))
+            if counters[0] != epoch:
+                continue
+            for i in range(1, len(counters)):
+                totals[i] += counters[i]
+
+        merged = {name: KLLSketch() for name in DISTRIBUTIONS}
+        for slot in range(self.slots):
+            sketches = self._read_distributions(slot, epoch)
+            if sketches is not None:
+                for name, sketch in zip(DISTRIBUTIONS, sketches):
+                    merged[name].merge(sketch)
+
+        total_rounds, correct_answers = totals[1], totals[2]
+        return {
+            'total_rounds': total_rounds,
+            'correct_answers': correct_answers,
+            'incorrect_answers': totals[3],
+            'total_score': totals[4],
+            'accuracy': (correct_answers / total_rounds * 100) if total_rounds > 0 else 0,
+            'difficulty_stats': {
+                difficulty: {'correct': totals[offset], 'total': totals[offset + 1]}
+                for difficulty, offset in _DIFFICULTY_OFFSETS.items()
+            },
+            'distributions': {name: sketch.summary() for name, sketch in merged.items()}
+        }
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,28 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json de la biblioteca estándar
+    orjson = None
+
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def question_fragment(question):
+    """Serializa todo el QuestionResponse salvo el id, que cambia en cada entrega.
+
+    Devuelve el fragmento que sigue a '{"id":<id>', incluida la llave de cierre.
+    """
+    body = dumps({
+        "description": question.description,
+        "options": list(question.options),
+        "difficulty": question.difficulty.value,
+        "points": question.get_points()
+    })
+    return b"," + body[1:]
+
+def questions_payload(issued):
+    """Arma la lista JSON a partir de pares (id, fragmento) sin pasar por Pydantic"""
+    return b"[" + b",".join(b'{"id":' + dumps(question_id) + fragment for question_id, fragment in issued) + b"]"
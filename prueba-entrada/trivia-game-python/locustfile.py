@@ -6,6 +6,7 @@ class TriviaApiUser(HttpUser):
     wait_time = between(1, 5)
     
     def on_start(self):
+        self.session_id = secrets.token_hex(8)
         self.client.post("/quiz/reset")
         
     @task(3)
@@ -14,30 +15,30 @@ class TriviaApiUser(HttpUser):
         
     @task(1)
     def get_filtered_questions(self):
-        difficulties = ["easy", "medium", "hard"]
-        for difficulty in difficulties:
-            self.client.get(f"/questions/random?count=3&difficulty={difficulty}")
+        # El quiz mixto sale en una sola petición en lugar de una por dificultad
+        self.client.get("/quiz/composite?easy=3&medium=3&hard=3")
     
     @task(2)
-    def answer_question(self):
-        response = self.client.get("/questions/random?count=1")
+    def play_quiz_session(self):
+        # Un juego completo son dos peticiones: obtener el quiz y calificarlo
+        response = self.client.get(f"/quiz/session?count=10&session_id={self.session_id}", name="/quiz/session")
         if response.status_code == 200:
-            questions = response.json()
-            if questions and len(questions) > 0:
-                question = questions[0]
-                
+            questions = response.json().get("questions", [])
+            answers = []
+            for question in questions:
                 if question["options"] and len(question["options"]) > 0:
-                    option_count = len(question["options"])
-                    option_index = secrets.randbelow(option_count)
-                    selected_option = question["options"][option_index]
-                    
-                    self.client.post(
-                        "/questions/answer",
-                        json={
-                            "question_id": question["id"],
-                            "answer": selected_option
-                        }
-                    )
+                    option_index = secrets.randbelow(len(question["options"]))
+                    answers.append({
+                        "question_id": question["id"],
+                        "answer": question["options"][option_index]
+                    })
+            
+            if answers:
+                self.client.post("/questions/answer/batch", json={"answers": answers, "player_id": self.session_id})
+
+    @task(1)
+    def get_leaderboard(self):
+        self.client.get("/leaderboard?limit=10")
 
     @task(1)
     def get_quiz_summary(self):
@@ -0,0 +1,91 @@
+"""Mide la detección de casi duplicados con MinHash/LSH sobre un banco sintético.
+
+Las preguntas salen de plantillas con entidades y respuestas al azar; una
+fracción se vuelve a insertar reescrita (sin acentos, con una palabra de más
+o de menos), como los duplicados reales. Reporta el tiempo, cuántas de las
+copias se encontraron y cuántas marcas no corresponden a una copia, junto
+con lo que costaría comparar todos los pares.
+
+Uso: python -m scripts.benchmark_near_duplicates [--questions 1000000] [--duplicates 0.01]
+"""
+import argparse
+import random
+import time
+
+from scripts.near_duplicates import NearDuplicateDetector
+
+TEMPLATES = [
+    "¿Cuál es la capital de {0}?",
+    "¿En qué año se fundó {0}?",
+    "¿Quién escribió la obra {0}?",
+    "¿Qué idioma se habla principalmente en {0}?",
+    "¿Cuántos habitantes tiene {0} aproximadamente?",
+    "¿Qué río atraviesa la ciudad de {0}?",
+]
+REWORDINGS = [
+    lambda text: text.replace("¿Cuál", "¿Sabes cuál").replace("¿Qué", "¿Sabes qué"),
+    lambda text: text.replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").rstrip("?"),
+    lambda text: text.replace(" aproximadamente", "").replace(" principalmente", "").replace("la ciudad de ", ""),
+    lambda text: text.upper(),
+]
+SYLLABLES = ["ca", "pi", "tal", "ro", "mon", "ta", "ña", "sol", "lu", "na", "mar", "es", "pa", "ber", "lín", "vi", "der"]
+
+def synthetic_questions(count, duplicate_ratio, rng):
+    """Devuelve (preguntas, posiciones de las copias reescritas)"""
+    questions = []
+    copies = set()
+    while len(questions) < count:
+        if questions and rng.random() < duplicate_ratio:
+            original = rng.choice(questions)
+            copies.add(len(questions))
+            questions.append({
+                "description": rng.choice(REWORDINGS)(original["description"]),
+                "correct_answer": original["correct_answer"]
+            })
+            continue
+        entity = " ".join(
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+            for _ in range(rng.randint(1, 2))
+        )
+        questions.append({
+            "description": rng.choice(TEMPLATES).format(entity),
+            "correct_answer": str(rng.getrandbits(40))
+        })
+    return questions, copies
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de casi duplicados con MinHash/LSH.')
+    parser.add_argument('--questions', type=int, default=1000000, help='Preguntas del banco sintético')
+    parser.add_argument('--duplicates', type=float, default=0.01, help='Fracción de copias reescritas')
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    questions, copies = synthetic_questions(args.questions, args.duplicates, rng)
+
+    detector = NearDuplicateDetector()
+    started = time.perf_counter()
+    for question in questions:
+        detector.add(question)
+    signature_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    duplicates = detector.find()
+    find_seconds = time.perf_counter() - started
+
+    flagged = {position for position, _, _ in duplicates}
+    found = len(flagged & copies)
+    started = time.perf_counter()
+    for position in range(1000):
+        detector.similarity(position, position + 1)
+    pair_seconds = (time.perf_counter() - started) / 1000
+    pairs = args.questions * (args.questions - 1) / 2
+
+    print(f"Banco: {args.questions:,} preguntas, {len(copies):,} copias reescritas")
+    print(f"  Firmas: {signature_seconds:.1f}s ({signature_seconds / args.questions * 1e6:.0f} µs/pregunta)")
+    print(f"  Bandas LSH y verificación: {find_seconds:.1f}s")
+    print(f"  Copias encontradas: {found:,} de {len(copies):,} ({found / max(1, len(copies)) * 100:.1f}%)")
+    print(f"  Marcadas que no eran copias: {len(flagged - copies):,}")
+    print(f"  Comparar todos los pares tomaría ~{pairs * pair_seconds / 3600:,.0f} h")
+
+if __name__ == "__main__":
+    main()
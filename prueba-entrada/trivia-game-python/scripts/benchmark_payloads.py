@@ -0,0 +1,53 @@
+"""Compara el armado de /questions/random con response_model frente a bytes precalculados.
+
+Uso: python -m scripts.benchmark_payloads [--count 10] [--rounds 20000]
+"""
+import argparse
+import json
+import timeit
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api import QuestionResponse
+from app.models.question_bank import QuestionBankStore
+from app.serialization import questions_payload
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de serialización de preguntas.')
+    parser.add_argument('--count', type=int, default=10, help='Preguntas por respuesta')
+    parser.add_argument('--rounds', type=int, default=20000, help='Repeticiones por método')
+    args = parser.parse_args()
+
+    bank = QuestionBankStore().current()
+    selected = bank.sample(args.count)
+    adapter = TypeAdapter(List[QuestionResponse])
+
+    def response_model_path():
+        # Lo que hacía el endpoint: dicts -> validación Pydantic -> jsonable_encoder -> json
+        questions = [{
+            "id": i,
+            "description": q.description,
+            "options": q.options,
+            "difficulty": q.difficulty.value,
+            "points": q.get_points()
+        } for i, q in enumerate(selected)]
+        validated = adapter.validate_python(questions)
+        return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def preserialized_path():
+        return questions_payload((i, bank.fragment(q)) for i, q in enumerate(selected))
+
+    assert json.loads(response_model_path()) == json.loads(preserialized_path())
+
+    baseline = min(timeit.repeat(response_model_path, number=args.rounds, repeat=3)) / args.rounds
+    fast = min(timeit.repeat(preserialized_path, number=args.rounds, repeat=3)) / args.rounds
+
+    print(f"Preguntas por respuesta: {args.count}")
+    print(f"  response_model:     {baseline * 1e6:8.1f} µs/respuesta")
+    print(f"  bytes precalculados: {fast * 1e6:8.1f} µs/respuesta")
+    print(f"  Aceleración: {baseline / fast:.1f}x")
+
+if __name__ == "__main__":
+    main()
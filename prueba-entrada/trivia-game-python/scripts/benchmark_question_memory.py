@@ -0,0 +1,80 @@
+"""Mide los bytes por pregunta de un banco sintético: Question con __dict__ frente a __slots__.
+
+Las opciones salen de un vocabulario acotado (países, números, años), como en
+el banco real, y cada cadena se crea de nuevo por pregunta, igual que al
+decodificar JSON o filas de la base de datos.
+
+Uso: python -m scripts.benchmark_question_memory [--questions 1000000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+
+VOCABULARY = (
+    ["Perú", "Chile", "Argentina", "Brasil", "Francia", "España", "Italia", "Japón", "Canadá", "Egipto"]
+    + [str(n) for n in range(100)]
+    + [str(year) for year in range(1800, 2025)]
+)
+CATEGORIES = ["geografía", "historia", "ciencia", "arte", "deportes"]
+DIFFICULTIES = list(DifficultyLevel)
+
+class LegacyQuestion:
+    """Question tal como era antes: __dict__ por instancia y lista de opciones"""
+
+    def __init__(self, description, options, correct_answer, difficulty=DifficultyLevel.EASY, category=None, question_id=None):
+        self.description = description
+        self.options = options
+        self.correct_answer = correct_answer
+        self.difficulty = difficulty
+        self.category = category
+        self.id = question_id
+
+def fresh(value):
+    # Una copia nueva de la cadena, como la que produce json.loads
+    return "".join(list(value))
+
+def build_bank(question_class, count):
+    size = len(VOCABULARY)
+    bank = []
+    for i in range(count):
+        options = [fresh(VOCABULARY[(i * 7 + n * 13) % size]) for n in range(4)]
+        bank.append(question_class(
+            f"¿Pregunta de prueba número {i}?",
+            options,
+            fresh(options[0]),
+            DIFFICULTIES[i % len(DIFFICULTIES)],
+            category=fresh(CATEGORIES[i % len(CATEGORIES)]),
+            question_id=i
+        ))
+    return bank
+
+def measure(question_class, count):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    bank = build_bank(question_class, count)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del bank
+    return current / count, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes por pregunta: __dict__ vs __slots__ + interning.')
+    parser.add_argument('--questions', type=int, default=1000000, help='Preguntas del banco sintético')
+    args = parser.parse_args()
+
+    before, before_seconds = measure(LegacyQuestion, args.questions)
+    after, after_seconds = measure(Question, args.questions)
+
+    print(f"Banco sintético: {args.questions:,} preguntas")
+    print(f"  {'antes (__dict__, lista):':36s} {before:7.1f} bytes/pregunta ({before_seconds:.1f}s)")
+    print(f"  {'después (__slots__, tupla, intern):':36s} {after:7.1f} bytes/pregunta ({after_seconds:.1f}s)")
+    print(f"  Ahorro: {(1 - after / before) * 100:.0f}% ({(before - after) * args.questions / 2**20:,.0f} MiB en total)")
+
+if __name__ == "__main__":
+    main()
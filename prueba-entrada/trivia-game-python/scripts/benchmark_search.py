@@ -0,0 +1,88 @@
+"""Mide la construcción y las consultas del índice de búsqueda sobre un banco sintético.
+
+Las descripciones se arman con un vocabulario con distribución de Zipf, como
+el texto real: unas pocas palabras muy frecuentes y muchas raras.
+
+Uso: python -m scripts.benchmark_search [--questions 1000000] [--queries 2000]
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+from bisect import bisect_right
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.models.search_index import SearchIndex
+
+SYLLABLES = ["ca", "pi", "tal", "rí", "o", "mon", "ta", "ña", "sol", "lu", "na", "mar", "es", "pa", "ción", "ber", "lín"]
+
+def build_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def synthetic_bank(count, rng, vocabulary):
+    # Se acumulan los pesos una sola vez; random.choices los recalcularía en cada llamada
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    total = cumulative[-1]
+    difficulties = list(DifficultyLevel)
+    for i in range(count):
+        words = [vocabulary[bisect_right(cumulative, rng.random() * total)] for _ in range(10)]
+        yield Question(
+            "¿" + " ".join(words[:6]) + "?",
+            words[6:],
+            words[6],
+            difficulties[i % 3],
+            question_id=i
+        )
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del índice invertido de búsqueda.')
+    parser.add_argument('--questions', type=int, default=1000000, help='Preguntas del banco sintético')
+    parser.add_argument('--queries', type=int, default=2000, help='Consultas por tipo')
+    parser.add_argument('--vocabulary', type=int, default=50000, help='Palabras distintas')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = build_vocabulary(args.vocabulary, rng)
+    questions = list(synthetic_bank(args.questions, rng, vocabulary))
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.update(questions)
+    build_seconds = time.perf_counter() - started
+    stats = index.stats()
+    print(f"Banco: {args.questions:,} preguntas, {stats['terms']:,} términos, {stats['postings']:,} entradas")
+    print(f"  Construcción: {build_seconds:.1f}s")
+
+    changed = [Question(q.description + " editada", q.options, q.correct_answer, q.difficulty, question_id=q.id)
+               for q in questions[:1000]]
+    # Como en una recarga del banco: el índice nuevo se arma sobre una copia
+    started = time.perf_counter()
+    index, _, _ = index.updated(changed + questions[1000:])
+    print(f"  Recarga con 1.000 preguntas modificadas: {time.perf_counter() - started:.2f}s")
+
+    samples = rng.sample(questions, args.queries)
+    query_sets = {
+        "2 términos de una misma pregunta": [" ".join(q.description.strip("¿?").split()[:2]) for q in samples],
+        "3 términos de una misma pregunta": [" ".join(q.description.strip("¿?").split()[:3]) for q in samples],
+        "2 términos al azar": [" ".join(rng.choices(vocabulary, k=2)) for _ in range(args.queries)],
+    }
+    for name, queries in query_sets.items():
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            timings.append(time.perf_counter() - started)
+        print(f"  {name}: p50 {statistics.median(timings) * 1e6:.0f} µs, "
+              f"p99 {percentile(timings, 0.99) * 1e6:.0f} µs")
+
+if __name__ == "__main__":
+    main()
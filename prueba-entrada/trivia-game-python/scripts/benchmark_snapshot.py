@@ -0,0 +1,114 @@
+"""Compara el arranque de un worker cargando el banco desde JSON y desde el snapshot mapeado.
+
+Genera un banco sintético, lo compila con write_snapshot y lanza procesos
+nuevos que cargan el banco de cada forma, como lo haría cada worker de uvicorn.
+Reporta el tiempo de carga, el RSS y el RSS anónimo de cada worker: las
+páginas del snapshot cuentan en el RSS pero viven en la caché de páginas y
+las comparten todos los procesos; el RSS anónimo es lo que cada worker paga
+por separado.
+
+Uso: python -m scripts.benchmark_snapshot [--questions 200000] [--workers 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.models.question_bank import QuestionBankStore, parse_questions
+from app.models.question_snapshot import write_snapshot
+
+CATEGORIES = ["geografía", "historia", "ciencia", "arte", "deportes", "música", "literatura", "tecnología"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+def synthetic_questions(count):
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "description": f"¿Pregunta de prueba número {i} sobre {CATEGORIES[i % len(CATEGORIES)]}?",
+            "options": [f"Opción {i}-{n}" for n in range(4)],
+            "correct_answer": f"Opción {i}-0",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "difficulty": DIFFICULTIES[i % len(DIFFICULTIES)]
+        }
+
+def memory_kib():
+    """RSS total y RSS anónimo (heap propio, no compartible) del proceso, en KiB (Linux)"""
+    values = {}
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                name, _, rest = line.partition(":")
+                if name in ("VmRSS", "RssAnon"):
+                    values[name] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values.get("VmRSS", 0), values.get("RssAnon")
+
+def run_worker(mode, json_file, snapshot_file):
+    rss_before, anon_before = memory_kib()
+    started = time.perf_counter()
+    if mode == "json":
+        bank = QuestionBankStore(json_file).current()
+    else:
+        bank = QuestionBankStore(json_file, snapshot_file).current()
+    # Una petición típica, para tocar las páginas que se usan al servir
+    bank.sample(10)
+    elapsed = time.perf_counter() - started
+    rss_after, anon_after = memory_kib()
+    print(json.dumps({
+        "bank": type(bank).__name__,
+        "seconds": elapsed,
+        "rss_kib": rss_after - rss_before,
+        "anon_kib": anon_after - anon_before if anon_after is not None else None
+    }))
+
+def measure(mode, json_file, snapshot_file, workers):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "scripts.benchmark_snapshot", "--worker", mode, json_file, snapshot_file],
+            stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    return [json.loads(process.communicate()[0]) for process in processes]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque: JSON vs snapshot mapeado.')
+    parser.add_argument('--questions', type=int, default=200000, help='Preguntas del banco sintético')
+    parser.add_argument('--workers', type=int, default=3, help='Workers simultáneos por modo')
+    parser.add_argument('--worker', nargs=3, metavar=('MODO', 'JSON', 'SNAPSHOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_file = os.path.join(directory, "questions.json")
+        snapshot_file = os.path.join(directory, "questions.snapshot")
+
+        with open(json_file, "w", encoding="utf-8") as file:
+            json.dump({"questions": list(synthetic_questions(args.questions))}, file, ensure_ascii=False)
+
+        started = time.perf_counter()
+        with open(json_file, encoding="utf-8") as file:
+            questions = parse_questions(json.load(file)["questions"])
+        size = write_snapshot(snapshot_file, questions, os.stat(json_file).st_mtime_ns)
+        del questions
+        print(f"Banco: {args.questions} preguntas, JSON {os.path.getsize(json_file) / 2**20:.1f} MiB, "
+              f"snapshot {size / 2**20:.1f} MiB (compilado en {time.perf_counter() - started:.2f}s)")
+
+        for mode in ("json", "snapshot"):
+            results = measure(mode, json_file, snapshot_file, args.workers)
+            seconds = sum(r["seconds"] for r in results) / len(results)
+            rss = sum(r["rss_kib"] for r in results) / len(results)
+            anon = [r["anon_kib"] for r in results if r["anon_kib"] is not None]
+            anon_text = f"{sum(anon) / len(anon) / 1024:8.1f} MiB" if anon else "   n/d"
+            print(f"  {mode:8s} ({results[0]['bank']}): arranque {seconds * 1000:8.1f} ms, "
+                  f"RSS +{rss / 1024:8.1f} MiB, anónimo +{anon_text} por worker")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import hashlib
 import json
 import os
 import sys
+import time
 import random
 import asyncio
 import argparse
@@ -8,53 +10,117 @@ from databases import Database
 from dotenv import load_dotenv
 
 from app.models.difficulty import DifficultyLevel
+from app.models.question_bank import parse_questions
+from app.models.question_snapshot import write_snapshot
+from scripts.near_duplicates import DEFAULT_THRESHOLD, NearDuplicateDetector, find_near_duplicates
+from scripts.question_stream import iter_question_records
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+BATCH_SIZE = 5000
+DEFAULT_JSON_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions.json')
 
 async def create_tables(database):
     try:
         await database.execute("DROP TABLE IF EXISTS questions CASCADE")
         await database.execute("DROP TABLE IF EXISTS categories CASCADE")
         
-        await database.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(50) UNIQUE NOT NULL
-            )
-        """)
-        
-        await database.execute("""
-            CREATE TABLE IF NOT EXISTS questions (
-                id SERIAL PRIMARY KEY,
-                description TEXT NOT NULL,
-                options TEXT NOT NULL,
-                correct_answer VARCHAR(255) NOT NULL,
-                category_id INTEGER REFERENCES categories(id),
-                difficulty VARCHAR(20) NOT NULL
-            )
-        """)
+        await ensure_schema(database)
         
         print("Tablas creadas correctamente.")
     except Exception as e:
         print(f"Error al crear tablas: {e}")
         sys.exit(1)
 
-async def load_questions_from_json(json_file):
-    try:
-        with open(json_file, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            return data['questions']
-    except FileNotFoundError:
-        print(f"Archivo no encontrado: {json_file}")
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print(f"Error al decodificar el archivo JSON: {json_file}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error al cargar preguntas desde JSON: {e}")
-        sys.exit(1)
+async def ensure_schema(database):
+    """Crea las tablas si no existen y agrega las columnas que falten, sin borrar datos"""
+    await database.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(50) UNIQUE NOT NULL
+        )
+    """)
+    
+    await database.execute("""
+        CREATE TABLE IF NOT EXISTS questions (
+            id SERIAL PRIMARY KEY,
+            description TEXT NOT NULL,
+            options TEXT NOT NULL,
+            correct_answer VARCHAR(255) NOT NULL,
+            category_id INTEGER REFERENCES categories(id),
+            difficulty VARCHAR(20) NOT NULL,
+            random_key DOUBLE PRECISION NOT NULL DEFAULT random(),
+            external_id TEXT,
+            content_hash TEXT,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    
+    # Tablas creadas por versiones anteriores del script. now() da el mismo
+    # valor a todas las filas y Postgres no reescribe la tabla para agregarla
+    for column in [
+        "external_id TEXT",
+        "content_hash TEXT",
+        "updated_at TIMESTAMPTZ NOT NULL DEFAULT now()",
+    ]:
+        await database.execute(f"ALTER TABLE questions ADD COLUMN IF NOT EXISTS {column}")
+    await add_random_key(database)
+
+RANDOM_KEY_NULLABLE_QUERY = """
+    SELECT is_nullable FROM information_schema.columns
+    WHERE table_name = 'questions' AND column_name = 'random_key'
+"""
+
+BACKFILL_RANDOM_KEY_QUERY = """
+    UPDATE questions SET random_key = random()
+    WHERE id > :after AND id <= :until AND random_key IS NULL
+"""
+
+async def add_random_key(database, batch_size=BATCH_SIZE):
+    """Agrega random_key a una tabla existente sin reescribirla.
+
+    Con DEFAULT random() en el ADD COLUMN Postgres calcula un valor por fila
+    y reescribe toda la tabla con un bloqueo exclusivo, dejando a la API sin
+    acceso mientras dura. Aquí la columna se agrega vacía, las filas
+    existentes se completan en lotes por rango de id (cada uno en su propia
+    transacción) y el NOT NULL se valida con un CHECK sin bloquear lecturas.
+    """
+    column = await database.fetch_one(RANDOM_KEY_NULLABLE_QUERY)
+    if column is not None and column["is_nullable"] == "NO":
+        return
+
+    await database.execute("ALTER TABLE questions ADD COLUMN IF NOT EXISTS random_key DOUBLE PRECISION")
+    # Cambiar el default no toca las filas existentes; las nuevas ya llegan con clave
+    await database.execute("ALTER TABLE questions ALTER COLUMN random_key SET DEFAULT random()")
+
+    bounds = await database.fetch_one("SELECT COALESCE(MAX(id), 0) AS max_id FROM questions")
+    for after in range(0, bounds["max_id"], batch_size):
+        await database.execute(BACKFILL_RANDOM_KEY_QUERY, {"after": after, "until": after + batch_size})
+
+    await database.execute("ALTER TABLE questions DROP CONSTRAINT IF EXISTS questions_random_key_not_null")
+    await database.execute(
+        "ALTER TABLE questions ADD CONSTRAINT questions_random_key_not_null "
+        "CHECK (random_key IS NOT NULL) NOT VALID"
+    )
+    await database.execute("ALTER TABLE questions VALIDATE CONSTRAINT questions_random_key_not_null")
+    # Con el CHECK ya validado SET NOT NULL no vuelve a recorrer la tabla
+    await database.execute("ALTER TABLE questions ALTER COLUMN random_key SET NOT NULL")
+    await database.execute("ALTER TABLE questions DROP CONSTRAINT questions_random_key_not_null")
+    print(f"Columna random_key agregada a las preguntas existentes en lotes de {batch_size}.")
+
+
+async def create_indexes(database):
+    """Índices que permiten muestrear preguntas sin ORDER BY RANDOM() y buscar por external_id"""
+    for statement in [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_external_id ON questions (external_id)",
+        "CREATE INDEX IF NOT EXISTS idx_questions_random_key ON questions (random_key)",
+        "CREATE INDEX IF NOT EXISTS idx_questions_difficulty_random_key ON questions (difficulty, random_key)",
+        "CREATE INDEX IF NOT EXISTS idx_questions_category_random_key ON questions (category_id, random_key)",
+        "CREATE INDEX IF NOT EXISTS idx_questions_category_difficulty_random_key "
+        "ON questions (category_id, difficulty, random_key)",
+    ]:
+        await database.execute(statement)
 
 def validate_difficulty(difficulty_str):
     """Valida y normaliza el valor de dificultad"""
@@ -81,69 +147,261 @@ def validate_difficulty(difficulty_str):
     print(f"Advertencia: Dificultad '{difficulty_str}' no reconocida, usando 'easy' por defecto")
     return DifficultyLevel.EASY.value
 
-async def insert_categories(database, questions):
-    try:
-        categories = set()
-        for question in questions:
-            categories.add(question['category'])
-   
-        category_map = {}
-        for category in categories:
-            result = await database.fetch_one(
-                "SELECT id FROM categories WHERE name = :name",
-                {"name": category}
-            )
-            
-            if result:
-                category_id = result['id']
-            else:
-                category_id = await database.execute(
-                    "INSERT INTO categories (name) VALUES (:name) RETURNING id",
-                    {"name": category}
-                )
-            
-            category_map[category] = category_id
-        
-        print(f"Categorías insertadas: {len(category_map)}")
-        return category_map
-    except Exception as e:
-        print(f"Error al insertar categorías: {e}")
+QUESTION_COLUMNS = (
+    "description", "options", "correct_answer", "category_id", "difficulty", "external_id", "content_hash"
+)
+
+INSERT_QUESTION_QUERY = """
+    INSERT INTO questions
+    (description, options, correct_answer, category_id, difficulty, external_id, content_hash)
+    VALUES (:description, :options, :correct_answer, :category_id, :difficulty, :external_id, :content_hash)
+"""
+
+UPDATE_QUESTIONS_QUERY = """
+    UPDATE questions AS q SET
+        description = u.description,
+        options = u.options,
+        correct_answer = u.correct_answer,
+        category_id = u.category_id,
+        difficulty = u.difficulty,
+        content_hash = u.content_hash,
+        updated_at = now()
+    FROM unnest(
+        CAST(:ids AS INTEGER[]), CAST(:descriptions AS TEXT[]), CAST(:options AS TEXT[]),
+        CAST(:correct_answers AS VARCHAR(255)[]), CAST(:category_ids AS INTEGER[]),
+        CAST(:difficulties AS VARCHAR(20)[]), CAST(:content_hashes AS TEXT[])
+    ) AS u(id, description, options, correct_answer, category_id, difficulty, content_hash)
+    WHERE q.id = u.id
+"""
+
+# Deja la primera aparición de cada external_id. Se ejecuta una vez al final
+# de la carga completa, cuando todavía no existe el índice único
+DELETE_DUPLICATE_QUESTIONS_QUERY = """
+    WITH removed AS (
+        DELETE FROM questions AS q
+        USING questions AS first
+        WHERE q.external_id = first.external_id AND q.id > first.id
+        RETURNING q.id
+    )
+    SELECT COUNT(*) AS count FROM removed
+"""
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def content_hash(question):
+    """Huella del contenido de la pregunta; cambia si cambia cualquier campo cargado"""
+    content = json.dumps([
+        question['description'],
+        question['options'],
+        question['correct_answer'],
+        question.get('category'),
+        validate_difficulty(question.get('difficulty', 'easy'))
+    ], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+def question_key(question, digest=None):
+    """Clave estable de la pregunta: su id del JSON o, si no tiene, su contenido"""
+    if question.get('id') is not None:
+        return str(question['id'])
+    return "hash:" + (digest or content_hash(question))
+
+def question_record(question, category_map, digest=None):
+    digest = digest or content_hash(question)
+    return (
+        question['description'],
+        json.dumps(question['options']),
+        question['correct_answer'],
+        category_map.get(question['category']),
+        validate_difficulty(question.get('difficulty', 'easy')),
+        question_key(question, digest),
+        digest
+    )
+
+async def upsert_categories(database, names):
+    """Inserta las categorías que falten y devuelve el id de todas en una sola sentencia"""
+    if not names:
         return {}
+    rows = await database.fetch_all("""
+        INSERT INTO categories (name)
+        SELECT unnest(CAST(:names AS VARCHAR(50)[]))
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id, name
+    """, {"names": sorted(names)})
+    return {row['name']: row['id'] for row in rows}
+
+class IngestStats:
+    """Estadísticas de --analyze calculadas en una sola pasada sobre el flujo"""
+
+    def __init__(self):
+        self.total = 0
+        self.invalid = 0
+        self.difficulty_counts = {"easy": 0, "medium": 0, "hard": 0, "unknown": 0}
 
-async def insert_questions(database, questions, category_map):
+    def record(self, raw_difficulty):
+        difficulty = (raw_difficulty or "").lower()
+        if difficulty in ["easy", "fácil", "facil"]:
+            self.difficulty_counts["easy"] += 1
+        elif difficulty in ["medium", "medio"]:
+            self.difficulty_counts["medium"] += 1
+        elif difficulty in ["hard", "difícil", "dificil"]:
+            self.difficulty_counts["hard"] += 1
+        else:
+            self.difficulty_counts["unknown"] += 1
+
+    def print_report(self):
+        print("\nAnálisis de dificultad:")
+        print(f"  - EASY: {self.difficulty_counts['easy']} preguntas")
+        print(f"  - MEDIUM: {self.difficulty_counts['medium']} preguntas")
+        print(f"  - HARD: {self.difficulty_counts['hard']} preguntas")
+        if self.difficulty_counts["unknown"] > 0:
+            print(f"  - Sin dificultad especificada: {self.difficulty_counts['unknown']} preguntas")
+        if self.invalid > 0:
+            print(f"  - Registros inválidos omitidos: {self.invalid}")
+
+def normalize_question(record):
+    """Valida un registro y devuelve una copia con la dificultad normalizada, o None"""
+    try:
+        options = record['options']
+        if not isinstance(options, list) or len(options) < 2:
+            return None
+        if not record['description'] or not record['correct_answer']:
+            return None
+        return {
+            "id": record.get('id'),
+            "description": record['description'],
+            "options": options,
+            "correct_answer": record['correct_answer'],
+            "category": record.get('category') or "general",
+            "difficulty": validate_difficulty(record.get('difficulty', 'easy'))
+        }
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+def stream_questions(json_file, stats=None, skip=None):
+    """Recorre el archivo registro a registro, validando y normalizando cada uno.
+
+    skip son posiciones (contando solo los registros válidos) que se omiten.
+    """
+    position = -1
+    for record in iter_question_records(json_file):
+        if stats is not None:
+            stats.total += 1
+        question = normalize_question(record)
+        if question is None:
+            if stats is not None:
+                stats.invalid += 1
+            continue
+        position += 1
+        if skip and position in skip:
+            continue
+        if stats is not None:
+            stats.record(record.get('difficulty'))
+        yield question
+
+def print_near_duplicates(json_file, duplicates, dropped=False, limit=10):
+    """Resume los casi duplicados; las descripciones de los ejemplos se leen con otra pasada"""
+    if not duplicates:
+        print("Preguntas casi duplicadas: ninguna")
+        return
+    print(f"Preguntas casi duplicadas {'omitidas' if dropped else 'detectadas'}: {len(duplicates)}")
+
+    examples = duplicates[:limit]
+    wanted = {position for example in examples for position in example[:2]}
+    labels = {}
+    for position, question in enumerate(stream_questions(json_file)):
+        if position in wanted:
+            label = f"id {question['id']}" if question['id'] is not None else f"registro {position + 1}"
+            labels[position] = (label, question['description'])
+            if len(labels) == len(wanted):
+                break
+
+    for position, original, similarity in examples:
+        label, description = labels[position]
+        original_label, original_description = labels[original]
+        print(f"  - {label} ≈ {original_label} ({similarity:.0%}): {description!r} ~ {original_description!r}")
+    if len(duplicates) > limit:
+        print(f"  ... y {len(duplicates) - limit} más")
+
+def prepare_questions(json_file, near_duplicates="ignore", threshold=DEFAULT_THRESHOLD):
+    """Devuelve el flujo de preguntas a cargar y el detector a reportar al final, si lo hay.
+
+    Con "report" las firmas se calculan en la misma pasada de la carga; con
+    "drop" hace falta una pasada previa para saber qué omitir antes de
+    insertar la primera fila.
+    """
+    if near_duplicates == "drop":
+        duplicates = find_near_duplicates(stream_questions(json_file), threshold)
+        print_near_duplicates(json_file, duplicates, dropped=True)
+        return stream_questions(json_file, skip={position for position, _, _ in duplicates}), None
+    if near_duplicates == "report":
+        detector = NearDuplicateDetector(threshold)
+        return detector.observe(stream_questions(json_file)), detector
+    return stream_questions(json_file), None
+
+async def copy_question_batch(connection, records):
+    raw_connection = connection.raw_connection
+    if hasattr(raw_connection, "copy_records_to_table"):
+        # PostgreSQL: COPY binario, la forma más rápida de cargar filas
+        await raw_connection.copy_records_to_table("questions", records=records, columns=QUESTION_COLUMNS)
+    else:
+        await connection.execute_many(
+            INSERT_QUESTION_QUERY, [dict(zip(QUESTION_COLUMNS, record)) for record in records]
+        )
+
+async def print_difficulty_report(database):
+    print("Análisis de niveles de dificultad:")
+    rows = await database.fetch_all(
+        "SELECT difficulty, COUNT(*) AS count FROM questions GROUP BY difficulty"
+    )
+    counts = {row['difficulty']: row['count'] for row in rows}
+    for difficulty in [d.value for d in DifficultyLevel]:
+        print(f"  - {difficulty.upper()}: {counts.get(difficulty, 0)} preguntas")
+
+async def insert_questions(database, questions, category_map, batch_size=BATCH_SIZE):
+    """Carga las preguntas por lotes dentro de una única transacción.
+
+    Las categorías que no estén en category_map se agregan al vuelo, lote a
+    lote, para poder recibir las preguntas desde un iterador. Las preguntas
+    repetidas se copian igual y se eliminan con una sola sentencia al final,
+    así la memoria no crece con el archivo.
+    """
     try:
         count = 0
-        for question in questions:
-            category_id = category_map.get(question['category'])
-            
-            # Normalizar dificultad
-            difficulty = validate_difficulty(question.get('difficulty', 'easy'))
-            
-            await database.execute("""
-                INSERT INTO questions 
-                (description, options, correct_answer, category_id, difficulty)
-                VALUES (:description, :options, :correct_answer, :category_id, :difficulty)
-            """, {
-                "description": question['description'],
-                "options": json.dumps(question['options']),
-                "correct_answer": question['correct_answer'],
-                "category_id": category_id,
-                "difficulty": difficulty
-            })
-            count += 1
-        
-        print(f"Preguntas insertadas: {count}")
-        # Mostrar estadísticas de dificultad
-        print("Análisis de niveles de dificultad:")
-        for difficulty in [d.value for d in DifficultyLevel]:
-            count_query = "SELECT COUNT(*) FROM questions WHERE difficulty = :difficulty"
-            result = await database.fetch_one(count_query, {"difficulty": difficulty})
-            count = result[0] if result else 0
-            print(f"  - {difficulty.upper()}: {count} preguntas")
+        started = time.perf_counter()
+        async with database.connection() as connection:
+            async with connection.transaction():
+                for batch in batched(questions, batch_size):
+                    missing = {question['category'] for question in batch} - category_map.keys()
+                    if missing:
+                        category_map.update(await upsert_categories(connection, missing))
+
+                    records = [question_record(question, category_map) for question in batch]
+                    await copy_question_batch(connection, records)
+                    count += len(records)
+
+                removed = await connection.fetch_one(DELETE_DUPLICATE_QUESTIONS_QUERY)
+                duplicates = removed["count"] if removed else 0
+                count -= duplicates
+
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed > 0 else 0
+        print(f"Preguntas insertadas: {count} en {elapsed:.2f}s ({rate:,.0f} filas/s)")
+        if duplicates:
+            print(f"Preguntas duplicadas omitidas: {duplicates}")
+        await print_difficulty_report(database)
     except Exception as e:
         print(f"Error al insertar preguntas: {e}")
 
-async def load_questions_to_database():
+async def load_questions_to_database(json_file=DEFAULT_JSON_FILE, batch_size=BATCH_SIZE,
+                                     near_duplicates="ignore", threshold=DEFAULT_THRESHOLD):
     if not DATABASE_URL:
         print("La URL de la base de datos no está configurada. Verifique el archivo .env")
         sys.exit(1)
@@ -156,12 +414,15 @@ async def load_questions_to_database():
         
         await create_tables(database)
         
-        json_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions.json')
-        questions = await load_questions_from_json(json_file)
-        
-        category_map = await insert_categories(database, questions)
+        # Las preguntas se leen en streaming y las categorías se crean lote a lote
+        questions, detector = prepare_questions(json_file, near_duplicates, threshold)
+        await insert_questions(database, questions, {}, batch_size)
+        if detector is not None:
+            print_near_duplicates(json_file, detector.find())
         
-        await insert_questions(database, questions, category_map)
+        # Los índices se crean después de la carga: es más rápido que
+        # mantenerlos actualizados fila por fila durante el COPY
+        await create_indexes(database)
         
         print("Datos cargados correctamente en la base de datos")
     except Exception as e:
@@ -170,37 +431,188 @@ async def load_questions_to_database():
         await database.disconnect()
         print("Conexión a la base de datos cerrada")
 
+class SyncResult:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.duplicates = 0
+
+    def print_report(self):
+        print("Sincronización completada:")
+        print(f"  - Insertadas: {self.inserted}")
+        print(f"  - Actualizadas: {self.updated}")
+        print(f"  - Eliminadas: {self.deleted}")
+        print(f"  - Sin cambios: {self.unchanged}")
+        if self.duplicates:
+            print(f"  - Duplicadas omitidas: {self.duplicates}")
+
+async def fetch_existing_hashes(database):
+    """Devuelve {external_id: (id, content_hash)} de las preguntas ya cargadas"""
+    rows = await database.fetch_all("SELECT id, external_id, content_hash FROM questions")
+    existing = {}
+    legacy_ids = []
+    for row in rows:
+        if row['external_id'] is None:
+            # Filas cargadas antes de existir external_id: se reemplazan
+            legacy_ids.append(row['id'])
+        else:
+            existing[row['external_id']] = (row['id'], row['content_hash'])
+    return existing, legacy_ids
+
+def classify_batch(batch, existing, seen, category_map, result):
+    """Separa un lote en filas nuevas y filas modificadas respecto a existing"""
+    inserts = []
+    updates = []
+    for question in batch:
+        record = question_record(question, category_map)
+        key, digest = record[5], record[6]
+        if key in seen:
+            result.duplicates += 1
+            continue
+        seen.add(key)
+
+        current = existing.get(key)
+        if current is None:
+            inserts.append(record)
+        elif current[1] != digest:
+            updates.append((current[0],) + record)
+        else:
+            result.unchanged += 1
+    return inserts, updates
+
+async def update_question_batch(connection, updates):
+    await connection.execute(UPDATE_QUESTIONS_QUERY, {
+        "ids": [update[0] for update in updates],
+        "descriptions": [update[1] for update in updates],
+        "options": [update[2] for update in updates],
+        "correct_answers": [update[3] for update in updates],
+        "category_ids": [update[4] for update in updates],
+        "difficulties": [update[5] for update in updates],
+        "content_hashes": [update[7] for update in updates]
+    })
+
+async def sync_questions(database, questions, batch_size=BATCH_SIZE):
+    """Aplica solo la diferencia entre el archivo y la tabla, sin DROP.
+
+    Cada lote se confirma en su propia transacción corta, así la tabla sigue
+    disponible para lectura durante toda la sincronización y cada fila se ve
+    siempre en su versión anterior o en la nueva. Las filas modificadas
+    conservan su id, por lo que las preguntas ya entregadas se pueden seguir
+    respondiendo.
+    """
+    result = SyncResult()
+    existing, legacy_ids = await fetch_existing_hashes(database)
+    category_map = {}
+    seen = set()
+
+    for batch in batched(questions, batch_size):
+        async with database.connection() as connection:
+            async with connection.transaction():
+                missing = {question['category'] for question in batch} - category_map.keys()
+                if missing:
+                    category_map.update(await upsert_categories(connection, missing))
+
+                inserts, updates = classify_batch(batch, existing, seen, category_map, result)
+                if inserts:
+                    await copy_question_batch(connection, inserts)
+                if updates:
+                    await update_question_batch(connection, updates)
+        result.inserted += len(inserts)
+        result.updated += len(updates)
+
+    stale_ids = legacy_ids + [row_id for key, (row_id, _) in existing.items() if key not in seen]
+    for ids in batched(stale_ids, batch_size):
+        await database.execute("DELETE FROM questions WHERE id = ANY(CAST(:ids AS INTEGER[]))", {"ids": ids})
+        result.deleted += len(ids)
+
+    return result
+
+async def sync_questions_to_database(json_file=DEFAULT_JSON_FILE, batch_size=BATCH_SIZE,
+                                     near_duplicates="ignore", threshold=DEFAULT_THRESHOLD):
+    if not DATABASE_URL:
+        print("La URL de la base de datos no está configurada. Verifique el archivo .env")
+        sys.exit(1)
+
+    database = Database(DATABASE_URL)
+    
+    try:
+        await database.connect()
+        print("Conexión a la base de datos establecida")
+        
+        await ensure_schema(database)
+        started = time.perf_counter()
+        questions, detector = prepare_questions(json_file, near_duplicates, threshold)
+        result = await sync_questions(database, questions, batch_size)
+        await create_indexes(database)
+        
+        result.print_report()
+        if detector is not None:
+            print_near_duplicates(json_file, detector.find())
+        print(f"Tiempo total: {time.perf_counter() - started:.2f}s")
+        await print_difficulty_report(database)
+    except Exception as e:
+        print(f"Error al sincronizar datos: {e}")
+    finally:
+        await database.disconnect()
+        print("Conexión a la base de datos cerrada")
+
+def compile_snapshot(json_file, snapshot_file):
+    """Compila el archivo de preguntas al snapshot binario que mapean los workers"""
+    started = time.perf_counter()
+    questions = parse_questions(iter_question_records(json_file))
+    size = write_snapshot(snapshot_file, questions, os.stat(json_file).st_mtime_ns)
+    elapsed = time.perf_counter() - started
+    print(f"Snapshot generado: {snapshot_file} ({len(questions)} preguntas, {size / 1024:,.0f} KiB, {elapsed:.2f}s)")
+
 def main():
     parser = argparse.ArgumentParser(description='Carga preguntas en la base de datos.')
     parser.add_argument('--local', action='store_true', help='Solo verificar el archivo JSON local')
     parser.add_argument('--analyze', action='store_true', help='Analizar dificultad de preguntas sin cargar a DB')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Filas por lote al insertar')
+    parser.add_argument('--file', default=DEFAULT_JSON_FILE, help='Archivo de preguntas (.json o .jsonl)')
+    parser.add_argument('--sync', action='store_true',
+                        help='Aplicar solo los cambios sobre la tabla existente, sin borrarla')
+    parser.add_argument('--snapshot', metavar='ARCHIVO',
+                        help='Compilar las preguntas a un snapshot binario (ver QUESTIONS_SNAPSHOT)')
+    parser.add_argument('--near-duplicates', choices=['report', 'drop', 'ignore'],
+                        help='Qué hacer con las preguntas casi duplicadas (MinHash/LSH); '
+                             'por defecto report con --local --analyze e ignore al cargar')
+    parser.add_argument('--similarity', type=float, default=DEFAULT_THRESHOLD,
+                        help='Similitud de Jaccard estimada a partir de la cual dos preguntas son casi duplicadas')
     args = parser.parse_args()
+    # Las firmas cuestan CPU y memoria por fila: en la carga solo se calculan si se piden
+    near_duplicates = args.near_duplicates or ('report' if args.local and args.analyze else 'ignore')
     
     if args.local:
-        json_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions.json')
-        questions = asyncio.run(load_questions_from_json(json_file))
-        print(f"Archivo JSON verificado correctamente: {json_file}")
+        stats = IngestStats()
+        detector = None
+        questions = stream_questions(args.file, stats)
+        if args.analyze and near_duplicates != 'ignore':
+            detector = NearDuplicateDetector(args.similarity)
+            questions = detector.observe(questions)
+        try:
+            for _ in questions:
+                pass
+        except FileNotFoundError:
+            print(f"Archivo no encontrado: {args.file}")
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error al decodificar el archivo JSON: {args.file} ({e})")
+            sys.exit(1)
+        print(f"Archivo JSON verificado correctamente: {args.file} ({stats.total} registros)")
         if args.analyze:
-            print("\nAnálisis de dificultad:")
-            difficulty_counts = {"easy": 0, "medium": 0, "hard": 0, "unknown": 0}
-            for q in questions:
-                difficulty = q.get('difficulty', 'unknown')
-                if difficulty.lower() in ["easy", "fácil", "facil"]:
-                    difficulty_counts["easy"] += 1
-                elif difficulty.lower() in ["medium", "medio"]:
-                    difficulty_counts["medium"] += 1
-                elif difficulty.lower() in ["hard", "difícil", "dificil"]:
-                    difficulty_counts["hard"] += 1
-                else:
-                    difficulty_counts["unknown"] += 1
-            
-            print(f"  - EASY: {difficulty_counts['easy']} preguntas")
-            print(f"  - MEDIUM: {difficulty_counts['medium']} preguntas")
-            print(f"  - HARD: {difficulty_counts['hard']} preguntas")
-            if difficulty_counts["unknown"] > 0:
-                print(f"  - Sin dificultad especificada: {difficulty_counts['unknown']} preguntas")
+            stats.print_report()
+        if detector is not None:
+            print()
+            print_near_duplicates(args.file, detector.find())
+    elif args.snapshot:
+        compile_snapshot(args.file, args.snapshot)
+    elif args.sync:
+        asyncio.run(sync_questions_to_database(args.file, args.batch_size, near_duplicates, args.similarity))
     else:
-        asyncio.run(load_questions_to_database())
+        asyncio.run(load_questions_to_database(args.file, args.batch_size, near_duplicates, args.similarity))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,166 @@
+"""Detección de preguntas casi duplicadas con MinHash y LSH.
+
+Cada descripción se reduce a su conjunto de 4-gramas de caracteres (sin
+acentos, mayúsculas ni palabras vacías) y se resume en una firma MinHash de
+NUM_PERM valores: la fracción de posiciones iguales entre dos firmas estima
+la similitud de Jaccard entre sus conjuntos. La firma se parte en BANDS
+bandas; dos preguntas son candidatas si coinciden en alguna banda completa,
+así que solo se comparan las que comparten una banda y no todos los pares.
+"""
+import hashlib
+import zlib
+from itertools import groupby
+from array import array
+
+from app.models.search_index import fold, tokenize
+
+SHINGLE_SIZE = 4
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.5
+EMPTY = 1 << 16
+
+def shingles(text):
+    """4-gramas de caracteres del texto normalizado"""
+    normalized = " ".join(tokenize(text)) or fold(text).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+_hash_cache = {}
+_HASH_CACHE_LIMIT = 1 << 18
+
+def _shingle_hash(shingle):
+    # El vocabulario de 4-gramas es acotado: la mayoría ya se hasheó antes
+    value = _hash_cache.get(shingle)
+    if value is None:
+        if len(_hash_cache) >= _HASH_CACHE_LIMIT:
+            _hash_cache.clear()
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        value = _hash_cache[shingle] = int.from_bytes(digest, "little")
+    return value
+
+def minhash_signature(text):
+    """Firma MinHash de NUM_PERM valores de 16 bits, con un solo hash por 4-grama.
+
+    Es "one permutation hashing": los bits bajos del hash eligen la posición
+    y el resto es el valor, del que se guarda el mínimo por posición. Las
+    posiciones que quedan vacías (textos cortos) toman el valor de la
+    siguiente ocupada desplazado según la distancia, para que dos textos solo
+    coincidan ahí si coinciden en la posición de origen.
+    """
+    signature = [EMPTY] * NUM_PERM
+    for shingle in shingles(text):
+        value = _shingle_hash(shingle)
+        position = value % NUM_PERM
+        value = (value // NUM_PERM) & 0xFFFF
+        if value < signature[position]:
+            signature[position] = value
+
+    occupied = [position for position in range(NUM_PERM) if signature[position] != EMPTY]
+    for position in range(NUM_PERM):
+        if signature[position] == EMPTY:
+            source = next((p for p in occupied if p > position), occupied[0])
+            distance = (source - position) % NUM_PERM
+            signature[position] = (signature[source] + distance * 0x9E37) & 0xFFFF
+    return array('H', signature)
+
+def band_keys(signature):
+    """Cada banda de ROWS valores de 16 bits empaquetada en un solo entero"""
+    keys = []
+    for band in range(BANDS):
+        key = 0
+        for value in signature[band * ROWS:(band + 1) * ROWS]:
+            key = (key << 16) | value
+        keys.append(key)
+    return keys
+
+def _answer_key(answer):
+    return zlib.crc32(fold(str(answer)).strip().encode("utf-8"))
+
+class NearDuplicateDetector:
+    """Acumula las firmas de un flujo de preguntas y encuentra las casi duplicadas.
+
+    Por pregunta solo se guardan la firma, las claves de banda y un hash de
+    la respuesta correcta (unos 200 bytes), así que sirve para millones de
+    preguntas. Dos preguntas son duplicadas si su similitud estimada es al
+    menos threshold y tienen la misma respuesta correcta: '¿En qué año
+    comenzó…?' y '¿En qué año terminó…?' se parecen pero no son la misma.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._signatures = array('H')
+        self._bands = [array('Q') for _ in range(BANDS)]
+        self._answers = array('L')
+
+    def __len__(self):
+        return len(self._answers)
+
+    def add(self, question):
+        signature = minhash_signature(question['description'])
+        self._signatures.extend(signature)
+        for band, key in zip(self._bands, band_keys(signature)):
+            band.append(key)
+        self._answers.append(_answer_key(question['correct_answer']))
+
+    def observe(self, questions):
+        """Agrega cada pregunta al pasar, sin interrumpir el flujo"""
+        for question in questions:
+            self.add(question)
+            yield question
+
+    def similarity(self, first, second):
+        signatures = self._signatures
+        a = signatures[first * NUM_PERM:(first + 1) * NUM_PERM]
+        b = signatures[second * NUM_PERM:(second + 1) * NUM_PERM]
+        return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+    def find(self):
+        """Devuelve [(posición, posición de la original, similitud)] ordenada por posición.
+
+        Por cada banda se ordenan las posiciones por su clave y se recorren
+        los grupos de claves iguales: O(n log n) con el ordenamiento en C en
+        lugar de los n² pares. La original es siempre la primera aparición.
+        """
+        duplicates = {}
+        for band in self._bands:
+            order = sorted(range(len(band)), key=band.__getitem__)
+            for _, group in groupby(order, key=band.__getitem__):
+                group = list(group)
+                if len(group) > 1:
+                    self._match_group(group, duplicates)
+
+        # Una original de una banda puede resultar duplicada en otra: se
+        # apunta siempre a la primera aparición de la cadena
+        for position, (original, similarity) in duplicates.items():
+            while original in duplicates:
+                original = duplicates[original][0]
+            duplicates[position] = (original, similarity)
+        return sorted((position, original, similarity) for position, (original, similarity) in duplicates.items())
+
+    def _match_group(self, group, duplicates):
+        # sorted es estable: el grupo queda en orden de aparición. Cada
+        # miembro se compara solo con las originales del grupo que tienen su
+        # misma respuesta, no con todos, para que un grupo grande de
+        # preguntas con una palabra frecuente en común no sea cuadrático
+        answers = self._answers
+        originals = {}
+        for position in group:
+            if position in duplicates:
+                continue
+            candidates = originals.setdefault(answers[position], [])
+            for original in candidates:
+                similarity = self.similarity(original, position)
+                if similarity >= self.threshold:
+                    duplicates[position] = (original, similarity)
+                    break
+            else:
+                candidates.append(position)
+
+def find_near_duplicates(questions, threshold=DEFAULT_THRESHOLD):
+    detector = NearDuplicateDetector(threshold)
+    for question in questions:
+        detector.add(question)
+    return detector.find()
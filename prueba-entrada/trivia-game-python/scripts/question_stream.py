@@ -0,0 +1,111 @@
+"""Lectura en streaming de archivos de preguntas grandes.
+
+Soporta tres formatos sin cargar el archivo completo en memoria:
+  - JSON con la forma {"questions": [...]} (el formato de data/questions.json)
+  - Un arreglo JSON de preguntas: [...]
+  - JSONL / NDJSON: una pregunta por línea
+"""
+import json
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+class _BufferedText:
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Se descarta lo ya consumido para que el buffer no crezca
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Devuelve el siguiente carácter que no sea espacio, sin consumirlo"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Se esperaba '{char}' cerca de la posición {self.pos}")
+        self.pos += 1
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise
+                continue
+            # Un número al final del buffer podría continuar en el siguiente bloque
+            if end == len(self.buffer) and not self.eof and self.read_more():
+                continue
+            self.pos = end
+            return value
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.decode_value()
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Se esperaba ',' o ']' cerca de la posición {reader.pos}")
+
+def _iter_questions_key(reader):
+    reader.expect("{")
+    while reader.peek() != "}":
+        key = reader.decode_value()
+        reader.expect(":")
+        if key == "questions":
+            yield from _iter_array(reader)
+            return
+        reader.decode_value()
+        if reader.peek() == ",":
+            reader.pos += 1
+
+def iter_question_records(path, chunk_size=CHUNK_SIZE):
+    """Genera los registros de pregunta uno a uno con memoria acotada"""
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line_number, line in enumerate(file, start=1):
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Línea {line_number} inválida: {e}") from e
+            return
+
+        reader = _BufferedText(file, chunk_size)
+        first = reader.peek()
+        if first == "[":
+            yield from _iter_array(reader)
+        elif first == "{":
+            yield from _iter_questions_key(reader)
+        else:
+            raise ValueError("El archivo no es un arreglo JSON ni un objeto con la clave 'questions'")
@@ -35,4 +35,17 @@ def test_data():
             "correct_answer": "París",
             "difficulty": "easy"
         }
-    } 
\ No newline at end of file
+    }
+
+class FakeClock:
+    """Reloj manual para las clases que reciben clock: las pruebas mueven now"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -3,6 +3,8 @@ from fastapi.testclient import TestClient
 from app.api import app
 from app.models.difficulty import DifficultyLevel
 from app.models.game_stats import GameStats
+from app.models.question import Question
+from app.models.question_bank import QuestionBank
 import app.api as api_module  
 
 api_module.quiz_stats = GameStats()
@@ -33,6 +35,13 @@ def test_get_random_questions_with_difficulty():
     if len(data) > 0:  
         assert data[0]["difficulty"] == "easy"
 
+def test_get_random_questions_returns_requested_count_for_difficulty():
+    response = client.get("/questions/random?count=5&difficulty=medium")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 5
+    assert all(q["difficulty"] == "medium" for q in data)
+
 def test_answer_question():
     response = client.get("/questions/random?count=1")
     assert response.status_code == 200
@@ -71,4 +80,203 @@ def test_reset_quiz():
     response = client.post("/quiz/reset")
     assert response.status_code == 200
     data = response.json()
-    assert "message" in data 
\ No newline at end of file
+    assert "message" in data 
+def test_answer_cache_stats():
+    response = client.get("/quiz/answer-cache")
+    assert response.status_code == 200
+    data = response.json()
+    for key in ("size", "capacity", "hits", "misses", "evictions", "hit_rate"):
+        assert key in data
+
+def test_answer_question_with_signed_token(monkeypatch):
+    monkeypatch.setattr(api_module, "QUESTION_TOKENS", True)
+    response = client.get("/questions/random?count=1")
+    question = response.json()[0]
+    assert isinstance(question["id"], str)
+
+    api_module.answer_store.clear()
+    response = client.post(
+        "/questions/answer",
+        json={"question_id": question["id"], "answer": question["options"][0]}
+    )
+
+    assert response.status_code == 200
+    assert "correct" in response.json()
+
+def test_signed_token_for_a_text_question_id(monkeypatch):
+    monkeypatch.setattr(api_module, "QUESTION_TOKENS", True)
+    bank = QuestionBank([Question("¿Capital de Perú?", ["Lima", "Quito"], "Lima", question_id="geo-7")])
+    monkeypatch.setattr(api_module.question_bank, "_bank", bank)
+
+    response = client.get("/questions/random?count=1")
+    assert response.status_code == 200
+    question = response.json()[0]
+
+    response = client.post("/questions/answer", json={"question_id": question["id"], "answer": "Lima"})
+    assert response.status_code == 200
+    assert response.json()["correct"] is True
+
+def test_answer_question_with_invalid_token():
+    response = client.post(
+        "/questions/answer",
+        json={"question_id": "l.1.0.firmafalsa", "answer": "París"}
+    )
+    assert response.status_code == 404
+
+def test_answer_question_with_non_ascii_id():
+    response = client.post("/questions/answer", json={"question_id": "l.1.1.é", "answer": "París"})
+    assert response.status_code == 404
+
+def test_answer_question_with_numeric_string_id():
+    question = client.get("/questions/random?count=1").json()[0]
+    response = client.post(
+        "/questions/answer",
+        json={"question_id": str(question["id"]), "answer": question["options"][0]}
+    )
+    assert response.status_code == 200
+
+def test_metrics_endpoint():
+    client.get("/questions/random?count=2")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'route="/questions/random"' in body
+    assert "trivia_questions_served_total" in body
+    assert "trivia_answer_cache_hit_ratio" in body
+
+def test_quiz_session_and_batch_answers():
+    client.post("/quiz/reset")
+    response = client.get("/quiz/session?count=4")
+    assert response.status_code == 200
+    questions = response.json()["questions"]
+    assert len(questions) == 4
+
+    answers = [{"question_id": q["id"], "answer": q["options"][0]} for q in questions]
+    answers.append({"question_id": -1, "answer": "París"})
+    response = client.post("/questions/answer/batch", json={"answers": answers})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 5
+    assert data["results"][-1]["found"] is False
+    assert data["correct_answers"] == sum(1 for r in data["results"] if r["correct"])
+    summary = client.get("/quiz/summary").json()
+    assert summary["total_questions"] == 4
+    assert summary["distributions"]["game_score"]["count"] == 1
+    assert summary["distributions"]["game_score"]["p50"] == data["total_score"]
+    assert summary["distributions"]["answer_seconds"]["count"] == 4
+
+def test_session_decks_do_not_repeat_questions():
+    seen = []
+    for _ in range(3):
+        response = client.get("/questions/random?count=10&session_id=jugador-1")
+        assert response.status_code == 200
+        seen.extend(question["description"] for question in response.json())
+
+    assert len(seen) == 30
+    assert len(set(seen)) == 30
+
+def test_composite_quiz_mixes_difficulties_in_one_request():
+    response = client.get("/quiz/composite?easy=5&medium=3&hard=2&distinct_categories=true")
+    assert response.status_code == 200
+
+    difficulties = [question["difficulty"] for question in response.json()["questions"]]
+    assert difficulties == ["easy"] * 5 + ["medium"] * 3 + ["hard"] * 2
+
+def test_composite_quiz_requires_questions():
+    response = client.get("/quiz/composite")
+    assert response.status_code == 400
+
+def test_search_returns_503_until_the_index_is_built(monkeypatch):
+    monkeypatch.setattr(api_module.question_bank, "_search", None)
+
+    response = client.get("/questions/search?q=oceano")
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+def test_search_questions_ignores_accents():
+    api_module.question_bank.build_search_index()
+    response = client.get("/questions/search?q=oceano grande")
+    assert response.status_code == 200
+
+    results = response.json()
+    assert len(results) == 1
+    assert "océano" in results[0]["description"].lower()
+    assert "correct_answer" not in results[0]
+
+def test_leaderboard_ranks_players_by_score():
+    client.post("/quiz/reset")
+    questions = client.get("/quiz/session?count=5").json()["questions"]
+    answers = [{"question_id": q["id"], "answer": q["options"][0]} for q in questions]
+    batch = client.post("/questions/answer/batch", json={"answers": answers, "player_id": "ana"}).json()
+
+    question = client.get("/questions/random?count=1").json()[0]
+    wrong = client.post("/questions/answer", json={
+        "question_id": question["id"], "answer": "respuesta inventada", "player_id": "beto"
+    }).json()
+    client.post("/questions/answer", json={
+        "question_id": question["id"], "answer": wrong["correct_answer"], "player_id": "beto"
+    })
+
+    beto = client.get("/leaderboard/beto").json()
+    assert beto["score"] == 0
+    assert beto["total_answers"] == 1
+    assert client.get("/leaderboard/ana").json()["score"] == batch["total_score"]
+    assert client.get("/leaderboard/nadie").status_code == 404
+
+    board = client.get("/leaderboard?limit=5").json()
+    assert board["total_players"] == 2
+    assert [player["rank"] for player in board["players"]] == [1, 2]
+    scores = [player["score"] for player in board["players"]]
+    assert scores == sorted(scores, reverse=True)
+
+def test_each_issued_question_counts_once_in_the_leaderboard():
+    client.post("/quiz/reset")
+    question = client.get("/questions/random?count=1").json()[0]
+    answer = {"question_id": question["id"], "answer": question["options"][0]}
+    response = client.post("/questions/answer", json=answer).json()
+    correct = {"question_id": question["id"], "answer": response["correct_answer"] or answer["answer"]}
+
+    client.post("/questions/answer", json=dict(correct, player_id="carla"))
+    other = client.get("/questions/random?count=1").json()[0]
+    other_answer = {"question_id": other["id"], "answer": other["options"][0]}
+    client.post("/questions/answer/batch", json={"answers": [other_answer] * 3, "player_id": "carla"})
+    client.post("/questions/answer/batch", json={"answers": [other_answer], "player_id": "carla"})
+
+    assert client.get("/leaderboard/carla").json()["total_answers"] == 1
+
+def test_replayed_token_counts_once_in_the_leaderboard(monkeypatch):
+    monkeypatch.setattr(api_module, "QUESTION_TOKENS", True)
+    client.post("/quiz/reset")
+    question = client.get("/questions/random?count=1").json()[0]
+    answer = {"question_id": question["id"], "answer": question["options"][0], "player_id": "dario"}
+
+    first = client.post("/questions/answer", json=answer).json()
+    client.post("/questions/answer", json=answer)
+
+    dario = client.get("/leaderboard/dario").json()
+    assert dario["total_answers"] == 1
+    assert dario["score"] == first["points_earned"]
+
+def test_answers_are_queued_and_a_full_log_returns_503(monkeypatch):
+    from app.models.answer_log import AnswerEventLog
+
+    log = AnswerEventLog(writer=None, queue_size=3, overflow="reject")
+    monkeypatch.setattr(api_module, "answer_log", log)
+    questions = client.get("/quiz/session?count=3").json()["questions"]
+
+    answers = [{"question_id": q["id"], "answer": q["options"][0]} for q in questions]
+    assert client.post("/questions/answer/batch", json={"answers": answers[:2], "player_id": "ana"}).status_code == 200
+    assert len(log) == 2
+    assert log._queue[0][2] == "ana"
+
+    total_before = client.get("/quiz/summary").json()["total_questions"]
+    response = client.post("/questions/answer/batch", json={"answers": answers[1:]})
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert client.get("/quiz/summary").json()["total_questions"] == total_before
+    assert client.get("/quiz/answer-log").json()["rejected"] == 2
+    # Las entregas rechazadas no quedan calificadas: el reintento cuenta
+    assert api_module.answer_store.mark_graded(answers[2]["question_id"])
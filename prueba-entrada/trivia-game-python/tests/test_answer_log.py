@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.models.answer_log import AnswerEventLog, AnswerLogFull, SQLiteAnswerWriter, answer_event
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+
+QUESTION = Question("¿Capital de Francia?", ["París", "Roma"], "París", DifficultyLevel.MEDIUM, question_id=7)
+
+def event(n=0):
+    return answer_event(QUESTION, f"respuesta {n}", n % 2 == 0, 2, 1.5, "ana")
+
+class RecordingWriter:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.closed = False
+
+    async def write(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disco lleno")
+        self.batches.append(list(events))
+
+    async def close(self):
+        self.closed = True
+
+async def wait_until(condition, timeout=2):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+def test_answer_event_columns():
+    answered_at, question_id, player_id, answer, correct, points, difficulty, seconds = event()
+    assert (question_id, player_id, answer, correct, points, difficulty, seconds) == (
+        7, "ana", "respuesta 0", True, 2, "medium", 1.5
+    )
+    assert answered_at > 0
+
+@pytest.mark.asyncio
+async def test_flushes_when_a_batch_fills_up():
+    writer = RecordingWriter()
+    log = AnswerEventLog(writer, queue_size=100, batch_size=3, flush_interval=60)
+    log.start()
+
+    log.record([event(0), event(1)])
+    await asyncio.sleep(0.05)
+    assert writer.batches == []
+
+    log.record([event(2), event(3)])
+    await wait_until(lambda: writer.batches)
+    assert len(writer.batches[0]) == 3
+
+    await log.stop()
+    assert [len(batch) for batch in writer.batches] == [3, 1]
+    assert log.written == 4
+    assert writer.closed
+
+@pytest.mark.asyncio
+async def test_flushes_after_the_interval():
+    writer = RecordingWriter()
+    log = AnswerEventLog(writer, queue_size=100, batch_size=50, flush_interval=0.05)
+    log.start()
+
+    log.record([event()])
+    await wait_until(lambda: log.written == 1)
+
+    await log.stop()
+    assert log.stats()["batches"] == 1
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_or_rejects_whole_requests():
+    dropping = AnswerEventLog(RecordingWriter(), queue_size=2, overflow="drop")
+    assert dropping.record([event(), event()])
+    assert not dropping.record([event()])
+    assert dropping.dropped == 1
+    assert len(dropping) == 2
+
+    rejecting = AnswerEventLog(RecordingWriter(), queue_size=2, overflow="reject")
+    rejecting.record([event()])
+    with pytest.raises(AnswerLogFull):
+        rejecting.record([event(), event()])
+    assert rejecting.rejected == 2
+    assert len(rejecting) == 1
+
+@pytest.mark.asyncio
+async def test_retries_failed_batches_before_giving_up():
+    writer = RecordingWriter(failures=2)
+    log = AnswerEventLog(writer, batch_size=10, flush_interval=0)
+    log.record([event()])
+    assert await log.flush()
+    assert log.written == 1
+
+    writer.failures = 5
+    log.record([event(), event()])
+    assert not await log.flush()
+    assert log.failed == 2
+    assert len(log) == 0
+
+@pytest.mark.asyncio
+async def test_sqlite_writer_appends_in_wal_mode(tmp_path):
+    path = str(tmp_path / "eventos" / "answers.db")
+    log = AnswerEventLog(SQLiteAnswerWriter(path), batch_size=2, flush_interval=60)
+    log.start()
+    log.record([event(n) for n in range(5)])
+    await log.stop()
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    rows = connection.execute("SELECT answer, correct, player_id FROM answer_events ORDER BY id").fetchall()
+    connection.close()
+    assert rows == [(f"respuesta {n}", int(n % 2 == 0), "ana") for n in range(5)]
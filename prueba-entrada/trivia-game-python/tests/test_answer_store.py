@@ -0,0 +1,61 @@
+from app.models.answer_store import AnswerKeyStore
+from app.models.question import Question
+
+def make_question(n):
+    return Question(f"¿Pregunta {n}?", ["1", "2"], "1")
+
+def test_put_and_get_returns_same_instance():
+    store = AnswerKeyStore(capacity=4)
+    question = make_question(1)
+
+    question_id = store.put(question)
+
+    assert store.get(question_id) is question
+    assert store.stats()["hits"] == 1
+
+def test_unknown_id_is_a_miss():
+    store = AnswerKeyStore(capacity=4)
+
+    assert store.get(99) is None
+    assert store.stats()["misses"] == 1
+
+def test_oldest_entries_are_evicted_when_full():
+    store = AnswerKeyStore(capacity=3)
+    ids = [store.put(make_question(n)) for n in range(5)]
+
+    assert store.get(ids[0]) is None
+    assert store.get(ids[1]) is None
+    assert store.get(ids[4]) is not None
+    assert len(store) == 3
+    assert store.stats()["evictions"] == 2
+
+def test_entries_expire_after_ttl(clock):
+    store = AnswerKeyStore(capacity=4, ttl=10, clock=clock)
+    question_id = store.put(make_question(1))
+
+    clock.now = 11
+
+    assert store.get(question_id) is None
+    assert len(store) == 0
+    assert store.stats()["expirations"] == 1
+
+def test_clear_keeps_ids_increasing():
+    store = AnswerKeyStore(capacity=4)
+    first_id = store.put(make_question(1))
+
+    store.clear()
+
+    assert store.get(first_id) is None
+    assert store.put(make_question(2)) > first_id
+
+def test_each_entry_is_graded_once():
+    store = AnswerKeyStore(capacity=2)
+    question_id = store.put(make_question(1))
+
+    assert store.mark_graded(question_id)
+    assert not store.mark_graded(question_id)
+    assert store.get(question_id) is not None
+
+    reused = [store.put(make_question(n)) for n in range(2)]
+    assert not store.mark_graded(question_id)
+    assert store.mark_graded(reused[1])
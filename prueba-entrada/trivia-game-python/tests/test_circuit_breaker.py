@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.models.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+async def failing():
+    raise ConnectionError("sin conexión")
+
+async def succeeding():
+    return "ok"
+
+async def hanging():
+    await asyncio.sleep(10)
+
+@pytest.mark.asyncio
+async def test_opens_after_threshold_and_fails_fast(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breaker.call(failing)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeeding)
+
+@pytest.mark.asyncio
+async def test_half_open_allows_single_trial_that_closes_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    with pytest.raises(ConnectionError):
+        await breaker.call(failing)
+
+    clock.now = 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert await breaker.call(succeeding) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_failed_trial_reopens_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await breaker.call(failing)
+
+    clock.now = 31
+    with pytest.raises(ConnectionError):
+        await breaker.call(failing)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+@pytest.mark.asyncio
+async def test_slow_calls_time_out_and_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=1, call_timeout=0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(hanging)
+
+    assert breaker.state == CircuitBreaker.OPEN
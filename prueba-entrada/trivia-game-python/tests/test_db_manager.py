@@ -8,6 +8,7 @@ from databases import Database
 from app.models.db_manager import DBManager
 from app.models.question import Question
 from app.models.difficulty import DifficultyLevel
+from app.models.circuit_breaker import CircuitBreaker
 
 class TestDBManager(unittest.TestCase):
     def setUp(self):
@@ -17,6 +18,7 @@ class TestDBManager(unittest.TestCase):
         self.mock_database.disconnect = AsyncMock()
         self.mock_database.fetch_all = AsyncMock()
         self.mock_database.fetch_one = AsyncMock()
+        self.mock_database.connection.return_value.__aenter__.return_value = self.mock_database
         
         self.db_url_patcher = patch('app.models.db_manager.DATABASE_URL', 'mock_url')
         self.db_url_patcher.start()
@@ -82,8 +84,9 @@ class TestDBManager(unittest.TestCase):
         questions = await self.db_manager.get_random_questions(limit=2)
         
         self.mock_database.fetch_all.assert_called_once()
-        call_args = self.mock_database.fetch_all.call_args[0][1]
-        self.assertEqual(call_args, {"limit": 2})
+        query, call_args = self.mock_database.fetch_all.call_args[0]
+        self.assertEqual(call_args["limit"], 2)
+        self.assertNotIn("RANDOM()", query)
         
         self.assertEqual(len(questions), 2)
         self.assertIsInstance(questions[0], Question)
@@ -175,4 +178,259 @@ class TestDBManager(unittest.TestCase):
         
         self.mock_database.fetch_one.assert_not_called()
         
-        self.assertFalse(ready)
\ No newline at end of file
+        self.assertFalse(ready)
+
+def make_connected_manager(mock_database):
+    mock_database.connection.return_value.__aenter__.return_value = mock_database
+    with patch('app.models.db_manager.DATABASE_URL', 'mock_url'), \
+         patch('app.models.db_manager.Database', return_value=mock_database):
+        manager = DBManager()
+    manager.connected = True
+    return manager
+
+@pytest.mark.asyncio
+async def test_get_random_questions_pushes_filters_into_sql():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(return_value=[{
+        "id": 7,
+        "description": "¿Cuál es el símbolo químico del oro?",
+        "options": json.dumps(["Go", "Gd", "Au", "Ag"]),
+        "correct_answer": "Au",
+        "difficulty": "hard",
+        "category": "ciencia"
+    }])
+    manager = make_connected_manager(mock_database)
+
+    questions = await manager.get_random_questions(5, DifficultyLevel.HARD, "Ciencia")
+
+    query, values = mock_database.fetch_all.call_args[0]
+    assert "q.difficulty = :difficulty" in query
+    assert "ORDER BY q.random_key" in query
+    assert values["difficulty"] == "hard"
+    assert values["category"] == "ciencia"
+    assert 0 <= values["pivot"] < 1
+    assert questions[0].category == "ciencia"
+    assert questions[0].id == 7
+
+@pytest.mark.asyncio
+async def test_is_database_ready_is_cached_within_ttl():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_one = AsyncMock(side_effect=[
+        {"questions_exists": True, "categories_exists": True},
+        {"count": 10}
+    ])
+    manager = make_connected_manager(mock_database)
+
+    assert await manager.is_database_ready()
+    assert await manager.is_database_ready()
+
+    assert mock_database.fetch_one.call_count == 2
+
+@pytest.mark.asyncio
+async def test_failed_query_invalidates_readiness():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_one = AsyncMock(side_effect=[
+        {"questions_exists": True, "categories_exists": True},
+        {"count": 10},
+        Exception("Connection lost")
+    ])
+    mock_database.fetch_all = AsyncMock(side_effect=Exception("Connection lost"))
+    manager = make_connected_manager(mock_database)
+
+    assert await manager.is_database_ready()
+    assert await manager.get_random_questions() == []
+
+    assert not await manager.is_database_ready()
+    assert mock_database.fetch_one.call_count == 3
+
+def question_row(question_id, difficulty="easy"):
+    return {
+        "id": question_id,
+        "description": f"¿Pregunta {question_id}?",
+        "options": json.dumps(["1", "2", "3", "4"]),
+        "correct_answer": "1",
+        "difficulty": difficulty,
+        "category": "ciencia"
+    }
+
+@pytest.mark.asyncio
+async def test_mirror_serves_questions_without_queries():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(return_value=[question_row(1), question_row(2, "hard")])
+    manager = make_connected_manager(mock_database)
+
+    assert await manager.load_mirror()
+    mock_database.fetch_all.reset_mock()
+
+    questions = await manager.get_random_questions(5, DifficultyLevel.HARD)
+    question = await manager.get_question_by_id(1)
+
+    mock_database.fetch_all.assert_not_called()
+    assert [q.id for q in questions] == [2]
+    assert question.description == "¿Pregunta 1?"
+    assert manager.mirror_stats()["rows"] == 2
+    assert manager.mirror_stats()["estimated_bytes"] > 0
+
+@pytest.mark.asyncio
+async def test_refresh_mirror_fetches_only_new_rows():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(side_effect=[[question_row(1), question_row(2)], [question_row(3)]])
+    mock_database.fetch_one = AsyncMock(return_value={"count": 3, "max_id": 3, "updated_at": None})
+    manager = make_connected_manager(mock_database)
+    await manager.load_mirror()
+    loaded = manager.mirror
+    loaded_bytes = manager.mirror_stats()["estimated_bytes"]
+
+    assert await manager.refresh_mirror()
+
+    query, values = mock_database.fetch_all.call_args[0]
+    assert "q.id > :max_id" in query
+    assert values["max_id"] == 2
+    assert len(manager.mirror) == 3
+    assert len(loaded) == 2
+    assert manager.mirror.fragment(loaded[0]) is loaded.fragment(loaded[0])
+    assert manager.mirror.get(3).id == 3
+    assert manager.mirror_stats()["estimated_bytes"] > loaded_bytes
+
+@pytest.mark.asyncio
+async def test_refresh_mirror_reloads_after_deletes():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(side_effect=[[question_row(1), question_row(2)], [], [question_row(2)]])
+    mock_database.fetch_one = AsyncMock(return_value={"count": 1, "max_id": 2, "updated_at": None})
+    manager = make_connected_manager(mock_database)
+    await manager.load_mirror()
+
+    assert await manager.refresh_mirror()
+
+    assert [q.id for q in manager.mirror.questions] == [2]
+
+@pytest.mark.asyncio
+async def test_refresh_mirror_reloads_after_in_place_updates():
+    mock_database = MagicMock(spec=Database)
+    updated = question_row(2)
+    updated["description"] = "¿Pregunta 2 corregida?"
+    mock_database.fetch_all = AsyncMock(side_effect=[[question_row(1), question_row(2)], [question_row(1), updated]])
+    mock_database.fetch_one = AsyncMock(side_effect=[
+        {"updated_at": 100},
+        {"count": 2, "max_id": 2, "updated_at": 200},
+        {"updated_at": 200}
+    ])
+    manager = make_connected_manager(mock_database)
+    await manager.load_mirror()
+
+    assert await manager.refresh_mirror()
+
+    assert "FILTER (WHERE id <= :max_id)" in mock_database.fetch_one.call_args_list[1][0][0]
+    assert manager.mirror.get(2).description == "¿Pregunta 2 corregida?"
+
+@pytest.mark.asyncio
+async def test_slow_mirror_load_ignores_query_timeout_and_breaker():
+    mock_database = MagicMock(spec=Database)
+
+    async def slow_fetch_all(query, values):
+        await asyncio.sleep(0.05)
+        return [question_row(1)]
+
+    mock_database.fetch_all = slow_fetch_all
+    mock_database.fetch_one = AsyncMock(return_value={"updated_at": None})
+    manager = make_connected_manager(mock_database)
+    manager.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, call_timeout=0.01)
+
+    assert await manager.load_mirror()
+    assert len(manager.mirror) == 1
+
+    manager.mirror_timeout = 0.01
+    assert not await manager.load_mirror()
+    assert manager.breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_composite_questions_use_a_single_query():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(return_value=[question_row(1), question_row(2, "hard")])
+    manager = make_connected_manager(mock_database)
+
+    questions = await manager.get_composite_questions({DifficultyLevel.EASY: 1, DifficultyLevel.HARD: 1})
+
+    mock_database.fetch_all.assert_called_once()
+    query, values = mock_database.fetch_all.call_args[0]
+    assert "easy_questions" in query and "hard_questions" in query and "medium_questions" not in query
+    assert values["limit_easy"] == 1 and values["difficulty_hard"] == "hard"
+    assert [q.id for q in questions] == [1, 2]
+
+@pytest.mark.asyncio
+async def test_composite_questions_oversample_to_spread_categories():
+    mock_database = MagicMock(spec=Database)
+    rows = []
+    for i, category in enumerate(["arte", "arte", "ciencia", "historia"], start=1):
+        row = question_row(i)
+        row["category"] = category
+        rows.append(row)
+    mock_database.fetch_all = AsyncMock(return_value=rows)
+    manager = make_connected_manager(mock_database)
+
+    questions = await manager.get_composite_questions({DifficultyLevel.EASY: 3}, distinct_categories=True)
+
+    assert mock_database.fetch_all.call_args[0][1]["limit_easy"] == 12
+    assert sorted(q.category for q in questions) == ["arte", "ciencia", "historia"]
+
+@pytest.mark.asyncio
+async def test_queries_record_pool_wait_metrics():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_one = AsyncMock(return_value={"count": 3})
+    manager = make_connected_manager(mock_database)
+
+    await manager.question_count()
+    stats = manager.pool_stats()
+
+    assert stats["acquisitions"] == 1
+    assert stats["in_use"] == 0
+    assert stats["wait_seconds_max"] >= 0
+
+@pytest.mark.asyncio
+async def test_warm_up_prepares_hot_query_on_each_connection():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(return_value=[])
+    manager = make_connected_manager(mock_database)
+
+    warmed = await manager.warm_up(connections=3)
+
+    assert warmed == 3
+    assert mock_database.fetch_all.call_count == 3
+    assert "random_key" in mock_database.fetch_all.call_args[0][0]
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_database():
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(side_effect=Exception("Connection refused"))
+    mock_database.fetch_one = AsyncMock()
+    manager = make_connected_manager(mock_database)
+
+    for _ in range(manager.breaker.failure_threshold):
+        assert await manager.get_random_questions() == []
+    mock_database.fetch_all.reset_mock()
+
+    assert not await manager.is_database_ready()
+    assert await manager.get_random_questions() == []
+    mock_database.fetch_all.assert_not_called()
+    mock_database.fetch_one.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_half_open_circuit_leaves_the_trial_to_the_background_probe(clock):
+    mock_database = MagicMock(spec=Database)
+    mock_database.fetch_all = AsyncMock(side_effect=Exception("Connection refused"))
+    mock_database.fetch_one = AsyncMock(side_effect=[
+        {"questions_exists": True, "categories_exists": True},
+        {"count": 10}
+    ])
+    manager = make_connected_manager(mock_database)
+    manager.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    assert await manager.get_random_questions() == []
+
+    clock.now = 31
+    assert manager.breaker.state == CircuitBreaker.HALF_OPEN
+    assert not await manager.is_database_ready()
+    mock_database.fetch_one.assert_not_called()
+
+    assert await manager.refresh_readiness()
+    assert manager.breaker.state == CircuitBreaker.CLOSED
+    assert await manager.is_database_ready()
@@ -0,0 +1,74 @@
+import bisect
+import random
+
+import pytest
+
+from app.models.leaderboard import Leaderboard, SkipList
+
+def test_skip_list_matches_a_sorted_list():
+    rng = random.Random(3)
+    skip_list = SkipList(rng)
+    expected = []
+    for _ in range(3000):
+        key = rng.randrange(500)
+        if key in expected:
+            skip_list.remove(key)
+            expected.remove(key)
+        else:
+            skip_list.insert(key)
+            bisect.insort(expected, key)
+
+    assert len(skip_list) == len(expected)
+    assert list(skip_list.iter_from(0)) == expected
+    for rank, key in enumerate(expected):
+        assert skip_list.rank(key) == rank
+        assert skip_list[rank] == key
+    assert list(skip_list.iter_from(len(expected) - 3)) == expected[-3:]
+    assert skip_list.rank(-1) is None
+    with pytest.raises(KeyError):
+        skip_list.remove(-1)
+
+def test_ranks_by_score_and_then_by_who_got_there_first():
+    board = Leaderboard()
+    board.record("ana", [(2, True), (0, False)])
+    board.record("beto", [(3, True)])
+    board.record("carla", [(2, True)])
+    board.record("dani", [(0, False)])
+
+    assert [player["player_id"] for player in board.top(10)] == ["beto", "ana", "carla", "dani"]
+    assert board.player("carla") == {
+        "rank": 3, "player_id": "carla", "score": 2, "correct_answers": 1, "total_answers": 1
+    }
+    assert board.player("ana")["total_answers"] == 2
+
+    board.record("carla", [(2, True)])
+    assert board.player("carla")["rank"] == 1
+    assert board.player("nadie") is None
+
+def test_top_is_served_from_a_snapshot_refreshed_at_a_bounded_rate(clock):
+    board = Leaderboard(top_size=2, snapshot_interval=1, clock=clock)
+    board.record("ana", [(1, True)])
+
+    assert [player["player_id"] for player in board.top(10)] == ["ana"]
+    board.record("beto", [(5, True)])
+    assert [player["player_id"] for player in board.top(10)] == ["ana"]
+    assert board.player("beto")["rank"] == 1
+
+    clock.now = 1.5
+    board.record("carla", [(3, True)])
+    assert [player["player_id"] for player in board.top(10)] == ["beto", "carla"]
+    assert board.snapshot_age() == 0
+
+def test_drops_the_last_player_when_full():
+    board = Leaderboard(max_players=2)
+    board.record("ana", [(3, True)])
+    board.record("beto", [(1, True)])
+    board.record("carla", [(2, True)])
+
+    assert len(board) == 2
+    assert board.player("beto") is None
+    assert board.evictions == 1
+
+    board.reset()
+    assert len(board) == 0
+    assert board.top() == []
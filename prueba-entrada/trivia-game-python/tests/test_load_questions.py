@@ -0,0 +1,184 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from scripts.load_questions import (
+    SyncResult, add_random_key, batched, classify_batch, content_hash, insert_questions, question_key,
+    question_record, sync_questions, upsert_categories
+)
+
+def make_question(n, category="ciencia", difficulty="medio"):
+    return {
+        "description": f"¿Pregunta {n}?",
+        "options": ["1", "2"],
+        "correct_answer": "1",
+        "category": category,
+        "difficulty": difficulty
+    }
+
+def make_database(raw_connection):
+    connection = MagicMock()
+    connection.raw_connection = raw_connection
+    connection.fetch_all = AsyncMock(return_value=[{"id": 7, "name": "historia"}])
+    connection.fetch_one = AsyncMock(return_value={"count": 0})
+    connection.transaction.return_value.__aenter__ = AsyncMock()
+    connection.transaction.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    database = MagicMock()
+    database.connection.return_value.__aenter__ = AsyncMock(return_value=connection)
+    database.connection.return_value.__aexit__ = AsyncMock(return_value=False)
+    database.fetch_all = AsyncMock(return_value=[{"difficulty": "medium", "count": 5}])
+    return database, connection
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+def test_question_record_normalizes_difficulty():
+    question = make_question(1)
+    record = question_record(question, {"ciencia": 3})
+
+    digest = content_hash(question)
+    assert record == ("¿Pregunta 1?", json.dumps(["1", "2"]), "1", 3, "medium", "hash:" + digest, digest)
+
+def test_content_hash_and_key():
+    question = make_question(1)
+    assert content_hash(question) == content_hash(dict(question, difficulty="medium"))
+    assert content_hash(question) != content_hash(dict(question, correct_answer="2"))
+    assert question_key(dict(question, id=15)) == "15"
+    assert question_key(question).startswith("hash:")
+
+def test_classify_batch_splits_inserts_updates_and_unchanged():
+    unchanged = dict(make_question(1), id=1)
+    changed = dict(make_question(2), id=2)
+    new = dict(make_question(3), id=3)
+    existing = {
+        "1": (10, content_hash(unchanged)),
+        "2": (20, content_hash(dict(changed, description="antes"))),
+        "4": (40, "x")
+    }
+    seen = set()
+    result = SyncResult()
+
+    inserts, updates = classify_batch([unchanged, changed, new, new], existing, seen, {"ciencia": 3}, result)
+
+    assert [record[5] for record in inserts] == ["3"]
+    assert [update[0] for update in updates] == [20]
+    assert result.unchanged == 1
+    assert result.duplicates == 1
+    assert seen == {"1", "2", "3"}
+
+@pytest.mark.asyncio
+async def test_upsert_categories_is_a_single_statement():
+    database = MagicMock()
+    database.fetch_all = AsyncMock(return_value=[{"id": 1, "name": "arte"}, {"id": 2, "name": "ciencia"}])
+
+    category_map = await upsert_categories(database, {"ciencia", "arte"})
+
+    database.fetch_all.assert_called_once()
+    query, values = database.fetch_all.call_args[0]
+    assert "ON CONFLICT (name)" in query
+    assert values == {"names": ["arte", "ciencia"]}
+    assert category_map == {"arte": 1, "ciencia": 2}
+
+@pytest.mark.asyncio
+async def test_insert_questions_copies_in_batches():
+    raw_connection = MagicMock()
+    raw_connection.copy_records_to_table = AsyncMock()
+    database, connection = make_database(raw_connection)
+    questions = [make_question(n) for n in range(4)] + [make_question(4, category="historia")]
+
+    await insert_questions(database, questions, {"ciencia": 3}, batch_size=2)
+
+    assert raw_connection.copy_records_to_table.call_count == 3
+    last_records = raw_connection.copy_records_to_table.call_args.kwargs["records"]
+    assert last_records[0][3] == 7
+    connection.fetch_all.assert_called_once()
+    database.fetch_all.assert_called_once()
+    assert "GROUP BY difficulty" in database.fetch_all.call_args[0][0]
+
+@pytest.mark.asyncio
+async def test_insert_questions_removes_duplicates_in_the_database(capsys):
+    raw_connection = MagicMock()
+    raw_connection.copy_records_to_table = AsyncMock()
+    database, connection = make_database(raw_connection)
+    connection.fetch_one = AsyncMock(return_value={"count": 1})
+    question = dict(make_question(1), id=1)
+
+    await insert_questions(database, [question, question], {"ciencia": 3})
+
+    records = raw_connection.copy_records_to_table.call_args.kwargs["records"]
+    assert [record[5] for record in records] == ["1", "1"]
+    assert "DELETE FROM questions" in connection.fetch_one.call_args[0][0]
+    output = capsys.readouterr().out
+    assert "Preguntas insertadas: 1 " in output
+    assert "Preguntas duplicadas omitidas: 1" in output
+
+@pytest.mark.asyncio
+async def test_insert_questions_falls_back_to_execute_many():
+    database, connection = make_database(object())
+    connection.execute_many = AsyncMock()
+
+    await insert_questions(database, [make_question(1)], {"ciencia": 3})
+
+    connection.execute_many.assert_called_once()
+    assert connection.execute_many.call_args[0][1][0]["difficulty"] == "medium"
+
+@pytest.mark.asyncio
+async def test_sync_questions_applies_only_the_diff():
+    raw_connection = MagicMock()
+    raw_connection.copy_records_to_table = AsyncMock()
+    database, connection = make_database(raw_connection)
+    connection.execute = AsyncMock()
+    database.execute = AsyncMock()
+    unchanged = dict(make_question(1), id=1)
+    changed = dict(make_question(2), id=2)
+    database.fetch_all = AsyncMock(return_value=[
+        {"id": 10, "external_id": "1", "content_hash": content_hash(unchanged)},
+        {"id": 20, "external_id": "2", "content_hash": "antiguo"},
+        {"id": 30, "external_id": "3", "content_hash": "borrada"},
+        {"id": 40, "external_id": None, "content_hash": None}
+    ])
+    connection.fetch_all = AsyncMock(return_value=[{"id": 3, "name": "ciencia"}])
+
+    result = await sync_questions(database, [unchanged, changed, dict(make_question(5), id=5)], batch_size=2)
+
+    assert (result.inserted, result.updated, result.deleted, result.unchanged) == (1, 1, 2, 1)
+    database.execute.assert_called_once()
+    query, values = database.execute.call_args[0]
+    assert query.startswith("DELETE FROM questions")
+    assert values == {"ids": [40, 30]}
+    update_values = connection.execute.call_args[0][1]
+    assert update_values["ids"] == [20]
+    assert update_values["content_hashes"] == [content_hash(changed)]
+    inserted = raw_connection.copy_records_to_table.call_args.kwargs["records"]
+    assert [record[5] for record in inserted] == ["5"]
+    # Un lote por transacción: la tabla nunca queda bloqueada durante toda la carga
+    assert connection.transaction.call_count == 2
+
+@pytest.mark.asyncio
+async def test_random_key_is_backfilled_in_batches_without_a_volatile_default():
+    database = MagicMock()
+    database.fetch_one = AsyncMock(side_effect=[None, {"max_id": 12}])
+    database.execute = AsyncMock()
+
+    await add_random_key(database, batch_size=5)
+
+    statements = [call.args[0] for call in database.execute.call_args_list]
+    assert statements[0] == "ALTER TABLE questions ADD COLUMN IF NOT EXISTS random_key DOUBLE PRECISION"
+    assert "SET DEFAULT random()" in statements[1]
+    backfills = [call.args[1] for call in database.execute.call_args_list if "random_key IS NULL" in call.args[0]]
+    assert backfills == [{"after": 0, "until": 5}, {"after": 5, "until": 10}, {"after": 10, "until": 15}]
+    assert statements[-2] == "ALTER TABLE questions ALTER COLUMN random_key SET NOT NULL"
+
+@pytest.mark.asyncio
+async def test_random_key_migration_is_skipped_once_done():
+    database = MagicMock()
+    database.fetch_one = AsyncMock(return_value={"is_nullable": "NO"})
+    database.execute = AsyncMock()
+
+    await add_random_key(database)
+
+    database.execute.assert_not_called()
+
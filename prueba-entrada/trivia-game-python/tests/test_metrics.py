@@ -0,0 +1,30 @@
+from app.metrics import Histogram, MetricsRegistry
+
+def test_histogram_buckets_are_cumulative_in_output():
+    registry = MetricsRegistry()
+    registry.observe_request("GET", "/questions/random", 200, 0.002)
+    registry.observe_request("GET", "/questions/random", 200, 0.2)
+
+    output = registry.render()
+
+    assert 'trivia_request_duration_seconds_bucket{method="GET",route="/questions/random",le="0.0025"} 1' in output
+    assert 'trivia_request_duration_seconds_bucket{method="GET",route="/questions/random",le="0.25"} 2' in output
+    assert 'trivia_request_duration_seconds_count{method="GET",route="/questions/random"} 2' in output
+    assert 'trivia_requests_total{method="GET",route="/questions/random",status="200"} 2' in output
+
+def test_histogram_overflow_bucket():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    histogram.observe(5.0)
+
+    assert histogram.counts == [0, 0, 1]
+    assert histogram.count == 1
+
+def test_render_includes_mode_counts_and_extra_metrics():
+    registry = MetricsRegistry()
+    registry.record_questions("local", 3)
+
+    output = registry.render([("trivia_answer_cache_size", "gauge", "Tamaño", 7)])
+
+    assert 'trivia_questions_served_total{mode="local"} 3' in output
+    assert "# TYPE trivia_answer_cache_size gauge" in output
+    assert "trivia_answer_cache_size 7" in output
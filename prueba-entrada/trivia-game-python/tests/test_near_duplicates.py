@@ -0,0 +1,80 @@
+import json
+
+from scripts.load_questions import prepare_questions, stream_questions
+from scripts.near_duplicates import NUM_PERM, NearDuplicateDetector, find_near_duplicates, minhash_signature, shingles
+
+def question(description, answer="París"):
+    return {"description": description, "options": [answer, "Otra"], "correct_answer": answer, "category": "geografía"}
+
+BANK = [
+    question("¿Cuál es la capital de Francia?"),
+    question("¿Quién pintó la Mona Lisa?", "Leonardo da Vinci"),
+    question("¿Cuál es la capital de Alemania?", "Berlín"),
+    question("¿Cual es la capital de FRANCIA"),
+    question("¿Sabes cuál es la capital de Francia?"),
+    question("¿En qué año comenzó la Segunda Guerra Mundial?", "1939"),
+    question("¿En qué año terminó la Segunda Guerra Mundial?", "1945"),
+]
+
+def test_shingles_ignore_accents_case_and_stopwords():
+    assert shingles("¿Cuál es la capital de Francia?") == shingles("cual es la CAPITAL de francia")
+    assert shingles("¿Sí?") == {"si"}
+
+def test_signature_similarity_tracks_jaccard():
+    same = minhash_signature("¿Cuál es la capital de Francia?")
+    assert len(same) == NUM_PERM
+    assert same == minhash_signature("Cual es la capital de Francia")
+    other = minhash_signature("¿Quién escribió Don Quijote?")
+    assert sum(a == b for a, b in zip(same, other)) <= NUM_PERM // 8
+
+def test_finds_rewordings_of_the_first_occurrence():
+    duplicates = find_near_duplicates(BANK)
+
+    assert [(position, original) for position, original, _ in duplicates] == [(3, 0), (4, 0)]
+    assert duplicates[0][2] == 1.0
+
+def test_similar_questions_with_different_answers_are_not_duplicates():
+    detector = NearDuplicateDetector()
+    for item in BANK:
+        detector.add(item)
+
+    assert detector.similarity(5, 6) >= detector.threshold
+    assert all(position != 6 for position, _, _ in detector.find())
+
+def test_exact_copies_point_to_the_first_occurrence():
+    duplicates = find_near_duplicates([question("¿Cuál es el río más largo?", "Nilo")] * 50)
+
+    assert len(duplicates) == 49
+    assert {original for _, original, _ in duplicates} == {0}
+
+def test_drop_skips_near_duplicates_before_loading(tmp_path, capsys):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({"questions": BANK}), encoding="utf-8")
+
+    questions, detector = prepare_questions(str(path), "drop")
+
+    assert detector is None
+    assert len(list(questions)) == len(BANK) - 2
+    output = capsys.readouterr().out
+    assert "casi duplicadas omitidas: 2" in output
+    assert "registro 4 ≈ registro 1" in output
+
+def test_report_observes_in_the_same_pass(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({"questions": BANK}), encoding="utf-8")
+
+    questions, detector = prepare_questions(str(path), "report")
+
+    assert len(list(questions)) == len(BANK)
+    assert len(detector) == len(BANK)
+    assert len(detector.find()) == 2
+    assert len(list(stream_questions(str(path), skip={0, 1}))) == len(BANK) - 2
+
+def test_loading_skips_signatures_unless_asked(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({"questions": BANK}), encoding="utf-8")
+
+    questions, detector = prepare_questions(str(path))
+
+    assert detector is None
+    assert len(list(questions)) == len(BANK)
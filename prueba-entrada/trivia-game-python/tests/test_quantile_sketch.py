@@ -0,0 +1,65 @@
+import bisect
+import random
+
+from app.models.game_stats import GameStats
+from app.models.quantile_sketch import KLLSketch, serialized_size_bound
+
+def rank_of(ordered, value):
+    return bisect.bisect_right(ordered, value) / len(ordered)
+
+def test_quantiles_are_within_the_rank_error():
+    rng = random.Random(1)
+    values = [rng.expovariate(1) for _ in range(100000)]
+    sketch = KLLSketch(rng=random.Random(2))
+    for value in values:
+        sketch.update(value)
+
+    ordered = sorted(values)
+    for fraction in (0.5, 0.9, 0.99):
+        assert abs(rank_of(ordered, sketch.quantile(fraction)) - fraction) < 0.02
+    assert sketch.quantile(0) == ordered[0]
+    assert sketch.quantile(1) == ordered[-1]
+    assert sketch.count == len(values)
+    assert sketch._size < 3 * sketch.k
+    assert len(sketch.to_bytes()) <= serialized_size_bound(sketch.k)
+
+def test_merging_serialized_sketches_matches_the_whole_stream():
+    rng = random.Random(3)
+    values = [rng.gauss(50, 10) for _ in range(60000)]
+    parts = [KLLSketch(rng=random.Random(seed)) for seed in range(4)]
+    for i, value in enumerate(values):
+        parts[i % 4].update(value)
+
+    merged = KLLSketch(rng=random.Random(9))
+    for part in parts:
+        merged.merge(KLLSketch.from_bytes(part.to_bytes()))
+
+    ordered = sorted(values)
+    assert merged.count == len(values)
+    assert merged.min == ordered[0]
+    assert merged.max == ordered[-1]
+    for fraction in (0.5, 0.9, 0.99):
+        assert abs(rank_of(ordered, merged.quantile(fraction)) - fraction) < 0.02
+
+def test_small_and_empty_sketches_are_exact():
+    sketch = KLLSketch()
+    assert sketch.summary() == {"count": 0, "p50": None, "p90": None, "p99": None}
+
+    for value in range(1, 11):
+        sketch.update(value)
+    assert sketch.summary() == {"count": 10, "p50": 5.0, "p90": 9.0, "p99": 10.0}
+    assert KLLSketch.from_bytes(sketch.to_bytes()).summary() == sketch.summary()
+
+def test_game_stats_reports_distributions():
+    stats = GameStats()
+    for score in (2, 4, 6, 8):
+        stats.record_game(score, score * 10)
+    stats.record_answer_times([1.5, 3.0])
+
+    distributions = stats.get_summary()['distributions']
+    assert distributions['game_score']['p50'] == 4
+    assert distributions['game_accuracy']['count'] == 4
+    assert distributions['answer_seconds']['p99'] == 3.0
+
+    stats.reset()
+    assert stats.get_summary()['distributions']['game_score']['count'] == 0
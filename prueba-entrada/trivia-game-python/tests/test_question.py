@@ -0,0 +1,32 @@
+import pytest
+
+from app.models.question import Question
+
+def runtime_string(text):
+    # Cadenas armadas en tiempo de ejecución, como las que salen de json.load
+    return "".join(list(text))
+
+def test_question_has_no_instance_dict():
+    question = Question("¿Prueba?", ["1", "2"], "1")
+
+    assert not hasattr(question, "__dict__")
+    with pytest.raises(AttributeError):
+        question.extra = True
+
+def test_options_are_a_tuple():
+    question = Question("¿Prueba?", ["1", "2"], "1")
+
+    assert question.options == ("1", "2")
+    assert isinstance(question.options, tuple)
+
+def test_equal_options_and_answers_are_shared_between_questions():
+    first = Question("¿Capital de Francia?", [runtime_string("París"), runtime_string("Roma")],
+                     runtime_string("París"), category=runtime_string("geografía"))
+    second = Question("¿Ciudad luz?", [runtime_string("Roma"), runtime_string("París")],
+                      runtime_string("París"), category=runtime_string("geografía"))
+
+    assert first.options[0] is second.options[1]
+    assert first.options[1] is second.options[0]
+    assert first.correct_answer is second.correct_answer
+    assert first.correct_answer is first.options[0]
+    assert first.category is second.category
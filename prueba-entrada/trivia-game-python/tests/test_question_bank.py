@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question_bank import QuestionBank, QuestionBankStore, parse_questions, FALLBACK_QUESTION
+
+def write_questions(path, questions, mtime_ns=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"questions": questions}, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def sample_question(question_id, difficulty="easy", category="geografía"):
+    return {
+        "id": question_id,
+        "description": f"¿Pregunta {question_id}?",
+        "options": ["1", "2", "3", "4"],
+        "correct_answer": "1",
+        "category": category,
+        "difficulty": difficulty
+    }
+
+def test_parse_questions_normalizes_difficulty():
+    questions = parse_questions([
+        sample_question(1, "fácil"),
+        sample_question(2, "medio"),
+        sample_question(3, "dificil"),
+        {"description": "incompleta"}
+    ])
+
+    assert [q.difficulty for q in questions] == [DifficultyLevel.EASY, DifficultyLevel.MEDIUM, DifficultyLevel.HARD]
+    assert questions[0].id == 1
+    assert questions[0].category == "geografía"
+
+def test_extended_bank_appends_without_touching_the_original():
+    bank = QuestionBank(parse_questions([sample_question(1), sample_question(2, "hard")]))
+
+    extended = bank.extended(parse_questions([sample_question(3, "hard", "arte")]))
+
+    assert [q.id for q in extended.questions] == [1, 2, 3]
+    assert [q.id for q in bank.questions] == [1, 2]
+    assert extended.get(3).category == "arte" and bank.get(3) is None
+    assert len(extended.bucket(DifficultyLevel.HARD)) == 2 and len(bank.bucket(DifficultyLevel.HARD)) == 1
+    assert extended.categories() == ["arte", "geografía"]
+    assert extended.fragment(bank[0]) is bank.fragment(bank[0])
+
+def test_store_loads_once(tmp_path):
+    path = tmp_path / "questions.json"
+    write_questions(path, [sample_question(1), sample_question(2)])
+    store = QuestionBankStore(str(path))
+
+    bank = store.current()
+
+    assert len(bank) == 2
+    assert store.current() is bank
+    assert store.reload_if_changed() is False
+
+def test_store_reloads_when_mtime_changes(tmp_path):
+    path = tmp_path / "questions.json"
+    write_questions(path, [sample_question(1)], mtime_ns=1_000_000_000)
+    store = QuestionBankStore(str(path))
+    old_bank = store.current()
+
+    write_questions(path, [sample_question(1), sample_question(2)], mtime_ns=2_000_000_000)
+
+    assert store.reload_if_changed() is True
+    assert len(store.current()) == 2
+    assert len(old_bank) == 1
+
+def test_reload_keeps_the_current_bank_when_the_file_is_corrupt(tmp_path):
+    path = tmp_path / "questions.json"
+    write_questions(path, [sample_question(1), sample_question(2)], mtime_ns=1_000_000_000)
+    store = QuestionBankStore(str(path))
+    bank = store.current()
+
+    path.write_text('{"questions": [', encoding="utf-8")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+    assert store.reload_if_changed() is False
+    assert store.current() is bank
+    assert not bank.is_fallback
+    assert store.reload_if_changed() is False
+
+    write_questions(path, [sample_question(3)], mtime_ns=3_000_000_000)
+    assert store.reload_if_changed() is True
+    assert [q.id for q in store.current().questions] == [3]
+
+def test_store_falls_back_when_file_missing(tmp_path):
+    store = QuestionBankStore(str(tmp_path / "missing.json"))
+
+    bank = store.current()
+
+    assert bank.is_fallback
+    assert bank.questions == (FALLBACK_QUESTION,)
+
+def test_search_index_is_built_on_demand_and_published_with_its_bank(tmp_path):
+    path = tmp_path / "questions.json"
+    write_questions(path, [sample_question(1), sample_question(2)])
+    store = QuestionBankStore(str(path), search=True)
+
+    assert store.search_snapshot() is None
+    store.build_search_index()
+
+    bank, index = store.search_snapshot()
+    assert bank is store.current()
+    assert sorted(index.search("pregunta")) == [1, 2]
+    assert QuestionBankStore(str(path), search=False).build_search_index() is None
+
+def test_search_keeps_working_while_the_bank_reloads(tmp_path):
+    path = tmp_path / "questions.json"
+    versions = [
+        [sample_question(n) for n in range(1, 200)],
+        [dict(sample_question(n), description=f"¿Pregunta editada {n}?") for n in range(100, 300)]
+    ]
+    write_questions(path, versions[0], mtime_ns=1)
+    store = QuestionBankStore(str(path), search=True)
+    store.build_search_index()
+    errors = []
+    done = threading.Event()
+
+    def reload_repeatedly():
+        try:
+            for round_number in range(30):
+                write_questions(path, versions[(round_number + 1) % 2], mtime_ns=round_number + 2)
+                store.reload_if_changed()
+                store.build_search_index()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    reloader = threading.Thread(target=reload_repeatedly)
+    reloader.start()
+    while not done.is_set():
+        try:
+            bank, index = store.search_snapshot()
+            for question_id in index.search("pregunta", limit=100):
+                assert bank.get(question_id) is not None
+        except Exception as e:
+            errors.append(e)
+            break
+    reloader.join()
+
+    assert errors == []
@@ -0,0 +1,59 @@
+from app.models.question_deck import DeckStore, QuestionDeck
+
+def test_deck_is_a_permutation_and_reshuffles_when_exhausted():
+    deck = QuestionDeck(50)
+
+    first = [deck.draw() for _ in range(50)]
+    assert sorted(first) == list(range(50))
+    assert len(deck) == 0
+    assert not deck._swaps
+
+    second = [deck.draw() for _ in range(50)]
+    assert sorted(second) == list(range(50))
+
+def test_deck_memory_grows_only_with_draws():
+    deck = QuestionDeck(1_000_000)
+
+    drawn = {deck.draw() for _ in range(100)}
+
+    assert len(drawn) == 100
+    assert len(deck._swaps) <= 100
+
+def test_store_never_repeats_within_a_session():
+    store = DeckStore()
+    bucket = tuple(range(30))
+
+    seen = store.draw("a", bucket, 10) + store.draw("a", bucket, 10) + store.draw("a", bucket, 10)
+
+    assert sorted(seen) == list(bucket)
+    assert len(store.draw("a", bucket, 100)) == 30
+    assert len(store.draw("a", (), 5)) == 0
+
+def test_store_keeps_one_deck_per_filter_and_resets_on_new_bucket():
+    store = DeckStore()
+    easy, hard = tuple(range(10)), tuple(range(100, 105))
+
+    first = store.draw("a", easy, 8, key="easy")
+    assert sorted(store.draw("a", hard, 5, key="hard")) == list(hard)
+    crossing = store.draw("a", easy, 5, key="easy")
+    assert len(set(crossing)) == 5
+    assert set(easy) - set(first) <= set(crossing)
+
+    reloaded = tuple(range(10))
+    assert sorted(store.draw("a", reloaded, 10, key="easy")) == list(reloaded)
+
+def test_store_evicts_idle_and_overflowing_sessions(clock):
+    store = DeckStore(idle_timeout=60, max_sessions=2, clock=clock)
+    bucket = tuple(range(5))
+
+    store.draw("a", bucket, 1)
+    clock.now = 30
+    store.draw("b", bucket, 1)
+    clock.now = 70
+    store.draw("b", bucket, 1)
+    assert len(store) == 1
+
+    store.draw("c", bucket, 1)
+    store.draw("d", bucket, 1)
+    assert len(store) == 2
+    assert store.stats()["evictions"] == 2
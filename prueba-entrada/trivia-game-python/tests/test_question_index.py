@@ -0,0 +1,96 @@
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.models.question_bank import QuestionBank
+from app.models.question_index import QuestionIndex, compose_quiz
+
+def build_questions():
+    questions = []
+    for i in range(30):
+        difficulty = [DifficultyLevel.EASY, DifficultyLevel.MEDIUM, DifficultyLevel.HARD][i % 3]
+        category = "ciencia" if i % 2 else "Historia"
+        questions.append(Question(f"¿Pregunta {i}?", ["1", "2"], "1", difficulty, category=category, question_id=i))
+    return questions
+
+def test_sample_returns_exact_count_from_bucket():
+    index = QuestionIndex(build_questions())
+
+    selected = index.sample(10, DifficultyLevel.HARD)
+
+    assert len(selected) == 10
+    assert all(q.difficulty == DifficultyLevel.HARD for q in selected)
+    assert len({q.id for q in selected}) == 10
+
+def test_sample_by_difficulty_and_category():
+    index = QuestionIndex(build_questions())
+
+    selected = index.sample(3, "medium", "historia")
+
+    assert len(selected) == 3
+    assert all(q.difficulty == DifficultyLevel.MEDIUM and q.category == "Historia" for q in selected)
+
+def test_sample_is_capped_by_bucket_size():
+    index = QuestionIndex(build_questions())
+
+    assert len(index.sample(100)) == 30
+    assert len(index.sample(100, DifficultyLevel.EASY, "ciencia")) == index.count(DifficultyLevel.EASY, "ciencia")
+    assert index.sample(5, category="arte") == []
+    assert index.sample(0) == []
+
+def test_categories():
+    index = QuestionIndex(build_questions())
+
+    assert index.categories() == ["ciencia", "historia"]
+
+def test_uncategorized_questions_are_counted_and_sampled_once():
+    questions = [Question(f"¿Sin categoría {n}?", ["1", "2"], "1", DifficultyLevel.EASY, question_id=n) for n in range(3)]
+    index = QuestionIndex(questions)
+
+    assert index.count() == 3
+    assert index.count(DifficultyLevel.EASY) == 3
+    assert sorted(q.id for q in index.sample(6)) == [0, 1, 2]
+    assert sorted(q.id for q in index.sample(6, DifficultyLevel.EASY)) == [0, 1, 2]
+
+def build_spread_bank():
+    questions = []
+    categories = ["arte", "ciencia", "deportes", "historia", "música"]
+    for i in range(50):
+        difficulty = [DifficultyLevel.EASY, DifficultyLevel.MEDIUM][i % 2]
+        questions.append(Question(f"¿Pregunta {i}?", ["1", "2"], "1", difficulty,
+                                  category=categories[i % 5], question_id=i))
+    questions.append(Question("¿Difícil?", ["1", "2"], "1", DifficultyLevel.HARD, category="arte", question_id=99))
+    return QuestionBank(questions)
+
+def test_compose_quiz_follows_composition():
+    bank = QuestionBank(build_questions())
+
+    selected = compose_quiz(bank, {DifficultyLevel.EASY: 5, DifficultyLevel.MEDIUM: 3, DifficultyLevel.HARD: 2})
+
+    assert [q.difficulty for q in selected] == [DifficultyLevel.EASY] * 5 + [DifficultyLevel.MEDIUM] * 3 + [DifficultyLevel.HARD] * 2
+    assert len({q.id for q in selected}) == 10
+
+def test_compose_quiz_spreads_categories():
+    bank = build_spread_bank()
+
+    selected = compose_quiz(bank, {DifficultyLevel.EASY: 3, DifficultyLevel.MEDIUM: 2}, distinct_categories=True)
+
+    assert len(selected) == 5
+    assert len({q.category for q in selected}) == 5
+
+def test_compose_quiz_tops_up_when_categories_run_out():
+    bank = build_spread_bank()
+
+    selected = compose_quiz(bank, {DifficultyLevel.EASY: 12, DifficultyLevel.HARD: 3}, distinct_categories=True)
+
+    easy = [q for q in selected if q.difficulty == DifficultyLevel.EASY]
+    assert len(easy) == 12
+    assert len({q.id for q in easy}) == 12
+    assert len({q.category for q in easy}) == 5
+    assert [q.id for q in selected if q.difficulty == DifficultyLevel.HARD] == [99]
+
+def test_compose_quiz_respects_category_filter():
+    bank = build_spread_bank()
+
+    selected = compose_quiz(bank, {DifficultyLevel.MEDIUM: 4}, category="Música", distinct_categories=True)
+
+    assert len(selected) == 4
+    assert all(q.category == "música" for q in selected)
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question_bank import QuestionBankStore, parse_questions
+from app.models.question_snapshot import QuestionSnapshot, SnapshotQuestionBank, open_snapshot_bank, write_snapshot
+from app.serialization import question_fragment
+
+RAW_QUESTIONS = [
+    {"id": 30, "description": "¿Capital de Perú?", "options": ["Lima", "Cusco"], "correct_answer": "Lima",
+     "category": "Geografía", "difficulty": "fácil"},
+    {"id": 10, "description": "¿2 + 2?", "options": ["3", "4", "5"], "correct_answer": "4",
+     "category": "matemáticas", "difficulty": "hard"},
+    {"id": 20, "description": "¿Río más largo?", "options": ["Amazonas", "Nilo"], "correct_answer": "Amazonas",
+     "category": "geografía", "difficulty": "medio"},
+    {"id": 40, "description": "¿Sin categoría?", "options": ["Sí", "No"], "correct_answer": "Sí"}
+]
+
+@pytest.fixture
+def files(tmp_path):
+    json_file = tmp_path / "questions.json"
+    json_file.write_text(json.dumps({"questions": RAW_QUESTIONS}), encoding="utf-8")
+    snapshot_file = tmp_path / "questions.snapshot"
+    write_snapshot(str(snapshot_file), parse_questions(RAW_QUESTIONS), os.stat(json_file).st_mtime_ns)
+    return str(json_file), str(snapshot_file)
+
+def test_snapshot_round_trip(files):
+    json_file, snapshot_file = files
+    snapshot = QuestionSnapshot(snapshot_file)
+
+    for position, expected in enumerate(parse_questions(RAW_QUESTIONS)):
+        question = snapshot.question(position)
+        assert (question.id, question.description, question.options, question.correct_answer,
+                question.difficulty, question.category) == \
+               (expected.id, expected.description, expected.options, expected.correct_answer,
+                expected.difficulty, expected.category)
+        assert snapshot.fragment(position) == question_fragment(expected)
+
+def test_snapshot_bank_lookup_and_sampling(files):
+    bank = open_snapshot_bank(files[1], files[0])
+
+    assert isinstance(bank, SnapshotQuestionBank)
+    assert len(bank) == 4
+    assert bank.get(20).description == "¿Río más largo?"
+    assert bank.get(99) is None
+    assert bank.get("20") is None
+    assert {q.id for q in bank.sample(10)} == {10, 20, 30, 40}
+    assert {q.id for q in bank.sample(10, category=" GEOGRAFÍA ")} == {20, 30}
+    assert [q.id for q in bank.sample(10, DifficultyLevel.HARD)] == [10]
+    assert [q.id for q in bank.sample(10, "medium", "geografía")] == [20]
+    assert bank.sample(10, category="historia") == []
+    assert len(bank.sample(2)) == 2
+    assert bank.fragment(bank.get(10)) == question_fragment(bank.get(10))
+
+    bucket = bank.bucket(category="geografía")
+    assert bank.bucket(category="Geografía") is bucket
+    assert sorted(bucket[i].id for i in range(len(bucket))) == [20, 30]
+
+def test_stale_or_invalid_snapshot_is_ignored(files, tmp_path):
+    json_file, snapshot_file = files
+    os.utime(json_file, ns=(1, 1))
+    assert open_snapshot_bank(snapshot_file, json_file) is None
+
+    broken = tmp_path / "broken.snapshot"
+    broken.write_bytes(b"no es un snapshot")
+    assert open_snapshot_bank(str(broken)) is None
+
+def test_write_snapshot_requires_integer_ids(tmp_path):
+    questions = parse_questions([dict(RAW_QUESTIONS[0], id="abc")])
+    with pytest.raises(ValueError):
+        write_snapshot(str(tmp_path / "q.snapshot"), questions)
+
+def test_store_prefers_snapshot_and_reloads_when_it_changes(files):
+    json_file, snapshot_file = files
+    store = QuestionBankStore(json_file, snapshot_file)
+
+    assert isinstance(store.current(), SnapshotQuestionBank)
+    assert store.reload_if_changed() is False
+
+    write_snapshot(snapshot_file, parse_questions(RAW_QUESTIONS[:2]), os.stat(json_file).st_mtime_ns)
+    os.utime(snapshot_file, ns=(5_000_000_000, 5_000_000_000))
+
+    assert store.reload_if_changed() is True
+    assert len(store.current()) == 2
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from scripts.question_stream import iter_question_records
+from scripts.load_questions import IngestStats, normalize_question, stream_questions
+
+RECORDS = [
+    {"description": "¿Pregunta {}?".format(n), "options": ["1", "2", "3"], "correct_answer": "1",
+     "category": "ciencia", "difficulty": difficulty, "score": 1.25}
+    for n, difficulty in enumerate(["fácil", "medio", "hard", "easy", "desconocida"])
+]
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_streams_questions_key_with_small_chunks(tmp_path, chunk_size):
+    content = json.dumps({"version": 2, "meta": {"a": [1, 2]}, "questions": RECORDS}, ensure_ascii=False, indent=2)
+    path = write(tmp_path, "questions.json", content)
+
+    assert list(iter_question_records(path, chunk_size=chunk_size)) == RECORDS
+
+@pytest.mark.parametrize("chunk_size", [1, 5])
+def test_streams_plain_array(tmp_path, chunk_size):
+    path = write(tmp_path, "questions.json", json.dumps(RECORDS))
+
+    assert list(iter_question_records(path, chunk_size=chunk_size)) == RECORDS
+
+def test_streams_jsonl(tmp_path):
+    content = "\n".join(json.dumps(record) for record in RECORDS) + "\n\n"
+    path = write(tmp_path, "questions.jsonl", content)
+
+    assert list(iter_question_records(path)) == RECORDS
+
+def test_empty_array_and_missing_key(tmp_path):
+    assert list(iter_question_records(write(tmp_path, "a.json", " [ ] "))) == []
+    assert list(iter_question_records(write(tmp_path, "b.json", '{"other": 1}'))) == []
+
+def test_rejects_invalid_files(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_question_records(write(tmp_path, "a.json", '"texto"')))
+    with pytest.raises(ValueError):
+        list(iter_question_records(write(tmp_path, "b.json", '[{"a": 1} {"b": 2}]')))
+    with pytest.raises(ValueError):
+        list(iter_question_records(write(tmp_path, "c.jsonl", '{"a": 1}\n{roto\n')))
+
+def test_normalize_question_rejects_incomplete_records():
+    assert normalize_question({"description": "x", "options": ["a"], "correct_answer": "a"}) is None
+    assert normalize_question({"description": "x", "options": "ab", "correct_answer": "a"}) is None
+    assert normalize_question({"options": ["a", "b"], "correct_answer": "a"}) is None
+
+    question = normalize_question({"description": "x", "options": ["a", "b"], "correct_answer": "a", "difficulty": "Difícil"})
+    assert question["difficulty"] == "hard"
+    assert question["category"] == "general"
+
+def test_stream_questions_counts_in_a_single_pass(tmp_path):
+    records = RECORDS + [{"description": "sin opciones"}]
+    path = write(tmp_path, "questions.json", json.dumps({"questions": records}))
+    stats = IngestStats()
+
+    questions = list(stream_questions(path, stats))
+
+    assert len(questions) == len(RECORDS)
+    assert stats.total == len(records)
+    assert stats.invalid == 1
+    assert stats.difficulty_counts == {"easy": 2, "medium": 1, "hard": 1, "unknown": 1}
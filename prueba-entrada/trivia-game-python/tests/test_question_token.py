@@ -0,0 +1,56 @@
+from app.models.question_token import GradedTokens, QuestionTokenSigner
+
+def test_issue_and_verify_roundtrip(clock):
+    clock.now = 1_700_000_000
+    signer = QuestionTokenSigner("secreto", clock=clock)
+
+    token = signer.issue(42, "db")
+
+    assert signer.verify(token) == ("db", 42, 1_700_000_000)
+
+def test_text_ids_keep_their_type(clock):
+    clock.now = 1_700_000_000
+    signer = QuestionTokenSigner("secreto", clock=clock)
+
+    assert signer.verify(signer.issue("geo.1", "local")) == ("local", "geo.1", 1_700_000_000)
+    assert signer.verify(signer.issue("42")) == ("local", "42", 1_700_000_000)
+    assert signer.verify(signer.issue("canción"))[1] == "canción"
+    assert signer.verify("l.~%%%.1.abc") is None
+
+def test_token_from_other_worker_with_same_key_is_valid():
+    token = QuestionTokenSigner("secreto").issue(7)
+
+    assert QuestionTokenSigner("secreto").verify(token)[1] == 7
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    signer = QuestionTokenSigner("secreto")
+    token = signer.issue(7)
+    source, _, issued_at, signature = token.split(".")
+
+    assert signer.verify(f"{source}.8.{issued_at}.{signature}") is None
+    assert QuestionTokenSigner("otro").verify(token) is None
+    assert signer.verify("basura") is None
+    assert signer.verify("x.1.2.abc") is None
+    assert signer.verify("l.1.1.é") is None
+
+def test_expired_token_is_rejected(clock):
+    clock.now = 1_700_000_000
+    signer = QuestionTokenSigner("secreto", max_age=60, clock=clock)
+    token = signer.issue(1)
+
+    clock.now += 61
+
+    assert signer.verify(token) is None
+
+def test_graded_tokens_are_remembered_until_they_expire(clock):
+    graded = GradedTokens(max_age=60, capacity=2, clock=clock)
+
+    assert graded.mark("a")
+    assert not graded.mark("a")
+
+    clock.now = 61
+    assert graded.mark("b")
+    assert len(graded) == 1
+    assert graded.mark("c")
+    assert graded.mark("d")
+    assert len(graded) == 2
@@ -0,0 +1,79 @@
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.models.search_index import SearchIndex, fold, tokenize
+
+def make_question(question_id, description, options=("Lima", "Cusco")):
+    return Question(description, list(options), options[0], DifficultyLevel.EASY, question_id=question_id)
+
+QUESTIONS = [
+    make_question(1, "¿Cuál es la capital de Perú?"),
+    make_question(2, "¿Quién compuso la canción 'Oración del remanso'?", ("Chabuca Granda", "Susana Baca")),
+    make_question(3, "¿Cuál es el río más largo de América?", ("Amazonas", "Nilo")),
+    make_question(4, "¿Capital de Francia?", ("París", "Lyon"))
+]
+
+def test_fold_and_tokenize_remove_accents_and_stopwords():
+    assert fold("Canción ÁRBOL ñandú") == "cancion arbol nandu"
+    assert tokenize("¿Cuál es la capital de Perú?") == ["capital", "peru"]
+
+def test_search_is_accent_insensitive_and_matches_options():
+    index = SearchIndex()
+    index.update(QUESTIONS)
+
+    assert index.search("CANCION") == [2]
+    assert index.search("capital") == [1, 4]
+    assert index.search("capital paris") == [4]
+    assert index.search("amazonas rio") == [3]
+    assert index.search("capital inexistente") == []
+    assert index.search("de la") == []
+    assert index.search("capital", limit=1) == [1]
+
+def test_update_reindexes_only_changes():
+    index = SearchIndex()
+    assert index.update(QUESTIONS) == (4, 0)
+
+    changed = [QUESTIONS[0], make_question(2, "¿Quién escribió Los ríos profundos?", ("Arguedas", "Vargas Llosa")),
+               QUESTIONS[3], make_question(5, "¿Capital de Chile?", ("Santiago", "Lima"))]
+
+    assert index.update(changed) == (2, 2)
+    assert index.search("cancion") == []
+    assert index.search("rios profundos") == [2]
+    assert index.search("amazonas") == []
+    assert sorted(index.search("capital")) == [1, 4, 5]
+    assert len(index) == 4
+
+def test_frequent_terms_use_bitmaps():
+    questions = [make_question(i, f"¿Pregunta común número {i}?", (f"op{i % 7}", "x")) for i in range(200)]
+    index = SearchIndex(bitmap_ratio=4)
+    index.update(questions)
+
+    assert index.stats()["bitmaps"] > 0
+    assert index.search("comun pregunta", limit=500) == list(range(200))
+    assert index.search("comun op3", limit=500) == [i for i in range(200) if i % 7 == 3]
+    assert index.search("numero 17 comun") == [17]
+
+    index.update(questions[:100])
+    assert index.search("comun pregunta", limit=500) == list(range(100))
+
+def test_updated_leaves_the_published_index_untouched():
+    index = SearchIndex()
+    index.update(QUESTIONS)
+
+    changed, added, removed = index.updated(QUESTIONS[2:])
+
+    assert (added, removed) == (0, 2)
+    assert index.search("capital") == [1, 4]
+    assert changed.search("capital") == [4]
+    assert index.updated(QUESTIONS)[0] is index
+
+def test_bitmap_matches_past_the_first_window_are_found():
+    # Más de 32768 documentos: los resultados escasos quedan fuera de la primera ventana
+    questions = [make_question(i, "par" if i % 2 else "impar", ("raro" if i % 9000 == 1 else "comun", "x"))
+                 for i in range(40000)]
+    index = SearchIndex(bitmap_ratio=10000)
+    index.update(questions)
+
+    assert index.search("par raro", limit=10) == [1, 9001, 18001, 27001, 36001]
+    assert index.search("impar comun", limit=3) == [0, 2, 4]
+    assert index.search("par comun x", limit=40000) == [i for i in range(1, 40000, 2) if i % 9000 != 1]
+
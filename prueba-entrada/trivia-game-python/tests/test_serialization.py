@@ -0,0 +1,21 @@
+import json
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.serialization import question_fragment, questions_payload
+
+def test_payload_matches_question_response_shape():
+    question = Question("¿Cuál es la capital de Francia?", ["Madrid", "París"], "París", DifficultyLevel.MEDIUM)
+
+    payload = questions_payload([(5, question_fragment(question)), ("l.1.2.firma", question_fragment(question))])
+
+    assert json.loads(payload) == [
+        {"id": 5, "description": "¿Cuál es la capital de Francia?", "options": ["Madrid", "París"],
+         "difficulty": "medium", "points": 2},
+        {"id": "l.1.2.firma", "description": "¿Cuál es la capital de Francia?", "options": ["Madrid", "París"],
+         "difficulty": "medium", "points": 2},
+    ]
+    assert "París".encode("utf-8") in payload
+
+def test_empty_payload():
+    assert questions_payload([]) == b"[]"
@@ -0,0 +1,83 @@
+import multiprocessing
+
+import pytest
+
+from app.models.difficulty import DifficultyLevel
+from app.models.question import Question
+from app.models.shared_game_stats import SharedGameStats
+
+pytest.importorskip("fcntl")
+
+EASY = Question("¿Fácil?", ["1", "2"], "1", DifficultyLevel.EASY)
+HARD = Question("¿Difícil?", ["1", "2"], "1", DifficultyLevel.HARD)
+
+def answer_in_worker(path, answers):
+    stats = SharedGameStats(path, slots=4)
+    for difficulty_is_hard, is_correct in answers:
+        stats.update_stats(HARD if difficulty_is_hard else EASY, is_correct)
+    stats.close()
+
+def run_worker(path, answers):
+    process = multiprocessing.get_context("fork").Process(target=answer_in_worker, args=(path, answers))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+def test_summary_aggregates_all_workers(tmp_path):
+    path = str(tmp_path / "stats.bin")
+    run_worker(path, [(False, True), (True, True)])
+    run_worker(path, [(True, False)])
+
+    stats = SharedGameStats(path, slots=4)
+    stats.update_stats(EASY, False)
+    summary = stats.get_summary()
+
+    assert summary['total_rounds'] == 4
+    assert summary['correct_answers'] == 2
+    assert summary['incorrect_answers'] == 2
+    assert summary['total_score'] == 4
+    assert summary['accuracy'] == 50
+    assert summary['difficulty_stats'][DifficultyLevel.HARD] == {'correct': 1, 'total': 2}
+    assert summary['difficulty_stats'][DifficultyLevel.EASY] == {'correct': 1, 'total': 2}
+    stats.close()
+
+def test_reset_clears_every_slot(tmp_path):
+    path = str(tmp_path / "stats.bin")
+    run_worker(path, [(False, True)])
+    stats = SharedGameStats(path, slots=4)
+
+    stats.reset()
+    assert stats.get_summary()['total_rounds'] == 0
+
+    stats.update_stats(HARD, True)
+    assert stats.get_summary()['total_score'] == 3
+    stats.close()
+
+def record_games_in_worker(path, scores):
+    stats = SharedGameStats(path, slots=4)
+    for score in scores:
+        stats.record_game(score, 100.0)
+    stats.record_answer_times([2.0] * len(scores))
+    stats.close()
+
+def test_distributions_are_merged_across_workers(tmp_path):
+    path = str(tmp_path / "stats.bin")
+    for scores in ([1, 2, 3], [4, 5, 6, 7]):
+        process = multiprocessing.get_context("fork").Process(target=record_games_in_worker, args=(path, scores))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+
+    stats = SharedGameStats(path, slots=4)
+    stats.record_game(8, 50.0)
+    distributions = stats.get_summary()['distributions']
+
+    assert distributions['game_score'] == {"count": 8, "p50": 4.0, "p90": 8.0, "p99": 8.0}
+    assert distributions['game_accuracy']['p50'] == 100.0
+    assert distributions['answer_seconds']['count'] == 7
+
+    stats.reset()
+    assert stats.get_summary()['distributions']['game_score']['count'] == 0
+    stats.record_game(3, 100.0)
+    assert stats.get_summary()['distributions']['game_score']['count'] == 1
+    stats.close()